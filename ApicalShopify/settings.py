@@ -134,6 +134,10 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Media files
+MEDIA_URL = '/media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -229,5 +233,66 @@ APPEND_SLASH = True  # This will automatically handle trailing slashes
 PAYMENT_SUCCESS_URL = os.getenv('PAYMENT_SUCCESS_URL', 'http://localhost:8000/api/shopify/payment/success/')
 PAYMENT_ERROR_URL = os.getenv('PAYMENT_ERROR_URL', 'http://localhost:8000/api/shopify/payment/error/')
 
+# Cache Configuration
+# Rendered PDFs are shared between gunicorn workers through Redis when
+# REDIS_URL is set; without it each process falls back to local memory
+REDIS_URL = os.getenv('REDIS_URL')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'default',
+    },
+    'pdf': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': REDIS_URL,
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+        },
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'pdf',
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+}
+
+# PDF Settings
+PDF_CACHE_ALIAS = 'pdf'
+PDF_CACHE_LOCAL_MAX_BYTES = int(os.getenv('PDF_CACHE_LOCAL_MAX_BYTES', 64 * 1024 * 1024))
+PDF_CACHE_LOCAL_MAX_ENTRY_BYTES = 8 * 1024 * 1024  # Larger PDFs skip the in-process tier
+PDF_CACHE_COMPRESSION_LEVEL = 6
+# Queue a low-priority labels job for run_pdf_worker after an order changes.
+# Only useful when the worker and the web processes share the 'pdf' cache;
+# with local memory the worker would only warm its own.
+PDF_CACHE_PREWARM = bool(REDIS_URL)
+# Cache keys hash the rendered content and template version, so entries never go stale
+PDF_CACHE_TIMEOUT = 60 * 60 * 24 * 30  # 30 days
+PDF_CACHE_PREFIX = 'pdf_'
+# Hit/miss counters are added to the shared cache in batches of this many, or this often
+PDF_CACHE_STATS_FLUSH_EVERY = 100
+PDF_CACHE_STATS_FLUSH_SECONDS = 30
+PDF_STORAGE_BACKEND = 'shopify.services.pdf_storage.PDFStorage'
+PDF_STORAGE_LOCATION = 'pdfs'  # Relative to MEDIA_ROOT
+PDF_STORAGE_MAX_BYTES = int(os.getenv('PDF_STORAGE_MAX_BYTES', 2 * 1024 * 1024 * 1024))  # Pruned by manage.py pdf_artifacts --prune
+PDF_STORAGE_MAX_AGE_DAYS = 30
+PDF_LABEL_BARCODE = 'code128'  # code128, qr, or None for text-only labels
+PDF_LABEL_PAGE_WINDOW = 200  # Label pages per reportlab canvas before a long order is rendered in windows
+LABEL_PRINTER_DPI = 203  # Thermal printer head resolution for ?format=zpl and ?format=epl labels
+PDF_BATCH_MODE = os.getenv('PDF_BATCH_MODE') or None  # canvas (the default), parallel, merge or stream
+PDF_BATCH_WORKERS = int(os.getenv('PDF_BATCH_WORKERS', os.cpu_count() or 1))
+PDF_BATCH_CHUNKSIZE = int(os.getenv('PDF_BATCH_CHUNKSIZE', 4))
+PDF_BATCH_PARALLEL_MIN_ORDERS = 20  # With PDF_BATCH_MODE=parallel, smaller batches still use one canvas
+PDF_BATCH_STREAM_CHUNK_SIZE = 50  # Orders loaded per query while streaming a batch
+PDF_JOB_STALE_AFTER = 10 * 60  # Seconds without progress before a running job is requeued
+PDF_JOB_MAX_ATTEMPTS = 3
+# Larger label renders go to the bulk lane instead of rendering in the request. A QR
+# code takes about 3 ms to encode the first time against 0.04 ms for Code 128, so only
+# about a tenth as many QR label pages fit in a request's second
+PDF_INTERACTIVE_MAX_PAGES = 10 if PDF_LABEL_BARCODE == 'qr' else 100
+PDF_JOB_RETRY_FAILED_AFTER = 10 * 60  # Seconds a failed render is reported back before asking for it again requeues it
+PDF_LABELS_INLINE_AFTER = 2 * 60  # Seconds a large order's labels job may wait unclaimed before the request renders it itself
+PDF_JOB_LANE_CONCURRENCY = {'INTERACTIVE': None, 'BULK': int(os.getenv('PDF_JOB_BULK_CONCURRENCY', 2))}  # Running jobs per lane across all workers; None is unlimited
+ORDER_IMPORT_CHUNK_SIZE = 1000  # Orders validated and inserted per bulk_create by the bulk import
+ORDER_IMPORT_MAX_ERRORS = 1000  # Per-row errors listed in an import report; the rest are only counted
+
 # Add to your settings.py
 TEST_RUNNER = 'django.test.runner.DiscoverRunner'
@@ -1,14 +1,26 @@
 from django.contrib import admin
-from .models import ShopifyOrder, PaymentAttempt
+from .models import ShopifyOrder, PaymentAttempt, PDFRenderJob, Sample
 
 @admin.register(ShopifyOrder)
 class ShopifyOrderAdmin(admin.ModelAdmin):
-    list_display = ('id', 'order_reference', 'amount', 'currency', 'customer_name', 'created_at')
-    list_filter = ('currency', 'created_at')
-    search_fields = ('order_reference', 'customer_email', 'customer_name')
-    readonly_fields = ('created_at', 'updated_at')
+    list_display = ('id', 'order_reference', 'amount', 'currency', 'customer_name', 'paid_total', 'payment_state', 'sample_count', 'created_at')
+    list_filter = ('currency', 'payment_status', 'created_at')
+    # =samples__sample_id finds the order a sample ID belongs to
+    search_fields = ('order_reference', 'customer_email', 'customer_name', '=samples__sample_id')
+    readonly_fields = ('total_paid', 'payment_count', 'payment_status', 'sample_count', 'estimated_pages', 'created_at', 'updated_at')
     ordering = ('-created_at',)
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_payment_summary()
+
+    @admin.display(description='Total paid', ordering='live_total_paid')
+    def paid_total(self, obj):
+        return obj.live_total_paid
+
+    @admin.display(description='Payment status', ordering='live_payment_status')
+    def payment_state(self, obj):
+        return dict(ShopifyOrder.PAYMENT_STATUS_CHOICES)[obj.live_payment_status]
+
 @admin.register(PaymentAttempt)
 class PaymentAttemptAdmin(admin.ModelAdmin):
     list_display = ('id', 'order', 'amount', 'status', 'payment_method', 'created_at')
@@ -21,3 +33,22 @@ class PaymentAttemptAdmin(admin.ModelAdmin):
         if obj:  # editing an existing object
             return self.readonly_fields + ('order', 'amount')
         return self.readonly_fields
+
+@admin.register(PDFRenderJob)
+class PDFRenderJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'lane', 'priority', 'estimated_pages', 'progress', 'total', 'attempts', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status', 'lane', 'created_at')
+    readonly_fields = ('dedupe_key', 'artifact', 'worker', 'created_at', 'started_at', 'heartbeat_at', 'finished_at')
+    ordering = ('-created_at',)
+
+@admin.register(Sample)
+class SampleAdmin(admin.ModelAdmin):
+    list_display = ('sample_id', 'order', 'field', 'crop', 'cultivar')
+    list_select_related = ('order',)
+    # Prefix search on the indexed sample_id column
+    search_fields = ('^sample_id',)
+    raw_id_fields = ('order',)
+
+    def has_add_permission(self, request):
+        # Rows are rebuilt from order_data whenever the order is saved
+        return False
@@ -0,0 +1,63 @@
+from rest_framework.exceptions import ValidationError
+from typing import Dict, FrozenSet, Optional, Tuple
+from .filters import comma_list
+
+class SparseFieldsetMixin:
+    """
+    Lets GET requests choose the fields they get back with ?fields=a,b
+    or ?exclude=c. The choice is pushed down to the queryset with
+    only(), so columns nobody asked for, like a large order_data, are
+    never read from the database. Lists default to summary_fields.
+
+    Serializer fields that are not model columns name the columns they
+    read in field_dependencies. Writes always use every field.
+    """
+    summary_fields: Optional[Tuple[str, ...]] = None
+    field_dependencies: Dict[str, Tuple[str, ...]] = {}
+    # Needed whatever is shown: the key and the pagination position
+    always_load: Tuple[str, ...] = ('id', 'created_at')
+
+    def get_requested_fields(self) -> Optional[FrozenSet[str]]:
+        """Serializer field names to render, or None for all of them"""
+        if hasattr(self, '_requested_fields'):
+            return self._requested_fields
+
+        requested = None
+        if self.request.method in ('GET', 'HEAD'):
+            available = set(self.get_serializer_class()().fields)
+            params = self.request.query_params
+            if params.get('fields'):
+                requested = set(self._parse_fields('fields', available))
+            elif params.get('exclude'):
+                requested = available - set(self._parse_fields('exclude', available))
+            elif self.summary_fields and self.is_list_request():
+                requested = set(self.summary_fields)
+        self._requested_fields = None if requested is None else frozenset(requested)
+        return self._requested_fields
+
+    def is_list_request(self) -> bool:
+        return (self.lookup_url_kwarg or self.lookup_field) not in self.kwargs
+
+    def _parse_fields(self, param: str, available: set) -> list:
+        names = comma_list(self.request.query_params[param])
+        unknown = sorted(set(names) - available)
+        if unknown:
+            raise ValidationError({param: [f"Unknown fields: {', '.join(unknown)}"]})
+        return names
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.get_requested_fields()
+        return context
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        requested = self.get_requested_fields()
+        if requested is None:
+            return queryset
+
+        columns = {field.name for field in queryset.model._meta.concrete_fields}
+        load = set(self.always_load)
+        for name in requested:
+            load.update(self.field_dependencies.get(name, (name,) if name in columns else ()))
+        return queryset.only(*sorted(load))
@@ -0,0 +1,44 @@
+from datetime import datetime, time
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+from typing import List
+
+def comma_list(value: str) -> List[str]:
+    """'PAID,FAILED' -> ['PAID', 'FAILED']"""
+    values = [part.strip() for part in value.split(',') if part.strip()]
+    if not values:
+        raise ValueError(value)
+    return values
+
+def timestamp(value: str) -> datetime:
+    """An ISO datetime, or a date meaning its midnight, in the current time zone"""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        parsed = datetime.combine(day, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+class QueryParamFilter(BaseFilterBackend):
+    """
+    Filters declared on the view as query_filters, a mapping of query
+    parameter to (ORM lookup, parser). Each lookup should lead an index
+    so filtered pages stay as cheap as unfiltered ones.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        filters = {}
+        for param, (lookup, parse) in getattr(view, 'query_filters', {}).items():
+            value = request.query_params.get(param)
+            if value in (None, ''):
+                continue
+            try:
+                filters[lookup] = parse(value)
+            except (TypeError, ValueError):
+                raise ValidationError({param: [f"Invalid value {value!r}"]})
+        return queryset.filter(**filters)
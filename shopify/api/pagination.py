@@ -0,0 +1,129 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from typing import List, NamedTuple, Optional, Tuple
+import json
+
+class Cursor(NamedTuple):
+    created_at: datetime
+    id: int
+    reverse: bool = False
+
+class KeysetPagination(BasePagination):
+    """
+    Newest-first pages keyed on (created_at, id). A page is fetched with
+    a WHERE on the last row seen rather than an OFFSET, so page 1,000
+    costs the same as page one, and there is no COUNT query. Rows added
+    while a client pages through never shift or repeat later pages.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 50
+    max_page_size = 500
+
+    def paginate_queryset(self, queryset, request, view=None) -> List:
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+
+        if cursor is None or not cursor.reverse:
+            queryset = queryset.order_by('-created_at', '-id')
+            if cursor is not None:
+                queryset = queryset.filter(
+                    Q(created_at__lt=cursor.created_at)
+                    | Q(created_at=cursor.created_at, id__lt=cursor.id)
+                )
+            rows = list(queryset[:self.page_size + 1])
+            self.has_next = len(rows) > self.page_size
+            self.has_previous = cursor is not None
+            rows = rows[:self.page_size]
+        else:
+            # Walk back towards newer rows, then restore newest-first order
+            queryset = queryset.order_by('created_at', 'id').filter(
+                Q(created_at__gt=cursor.created_at)
+                | Q(created_at=cursor.created_at, id__gt=cursor.id)
+            )
+            rows = list(queryset[:self.page_size + 1])
+            self.has_previous = len(rows) > self.page_size
+            self.has_next = True
+            rows = rows[:self.page_size][::-1]
+
+        self.rows = rows
+        return rows
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_cursor(self, request) -> Optional[Cursor]:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            created_at, pk, reverse = json.loads(urlsafe_b64decode(encoded.encode()))
+            position = parse_datetime(created_at)
+            if position is None:
+                raise ValueError(created_at)
+            return Cursor(position, int(pk), bool(reverse))
+        except (TypeError, ValueError):
+            raise NotFound('Invalid cursor')
+
+    @staticmethod
+    def position(row) -> Tuple[datetime, int]:
+        # Rows from values() are dicts
+        if isinstance(row, dict):
+            return row['created_at'], row['id']
+        return row.created_at, row.pk
+
+    def encode_cursor(self, row, reverse: bool = False) -> str:
+        created_at, pk = self.position(row)
+        # isoformat keeps microseconds and the offset, so the position is exact
+        payload = json.dumps([created_at.isoformat(), pk, int(reverse)])
+        encoded = urlsafe_b64encode(payload.encode()).decode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.has_next or not self.rows:
+            return None
+        return self.encode_cursor(self.rows[-1])
+
+    def get_previous_link(self) -> Optional[str]:
+        if not self.has_previous:
+            return None
+        if not self.rows:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.rows[0], reverse=True)
+
+    def get_paginated_response(self, data) -> Response:
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+class SamplePagination(CursorPagination):
+    """Samples in sample ID order, so a prefix search walks the sample_id index"""
+    ordering = ('sample_id', 'id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
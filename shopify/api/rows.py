@@ -0,0 +1,127 @@
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import fields as drf_fields, serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+Converter = Optional[Callable[[Any], Any]]
+
+# to_representation() returns database values of these unchanged
+IDENTITY_FIELDS = (
+    drf_fields.BooleanField, drf_fields.CharField, drf_fields.EmailField, drf_fields.IntegerField,
+)
+
+def converter_for(field: drf_fields.Field) -> Converter:
+    """
+    A function giving field.to_representation(value) for a database
+    value, or None when that is the value itself. Common field types get
+    a shortcut that skips the checks to_representation repeats per call.
+    """
+    kind = type(field)
+    if kind in IDENTITY_FIELDS:
+        return None
+    if kind is drf_fields.BigIntegerField:
+        if getattr(field, 'coerce_to_string', api_settings.COERCE_BIGINT_TO_STRING):
+            return str
+        return None
+    if kind is drf_fields.ChoiceField:
+        if all(key == value for key, value in field.choice_strings_to_values.items()):
+            return None
+    if kind is drf_fields.JSONField and not field.binary:
+        return None
+    if kind is drf_fields.DecimalField:
+        coerce = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+        if coerce and not field.localize and not field.normalize_output:
+            quantize = field.quantize
+            return lambda value: f'{quantize(value):f}'
+    if kind is drf_fields.DateTimeField:
+        return _datetime_converter(field)
+    return field.to_representation
+
+def _datetime_converter(field: drf_fields.DateTimeField) -> Callable[[Any], Any]:
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    zone = getattr(field, 'timezone', field.default_timezone())
+    if output_format is None or output_format.lower() != drf_fields.ISO_8601 or zone is None:
+        return field.to_representation
+
+    def convert(value):
+        if value.tzinfo is None:
+            return field.to_representation(value)
+        value = value.astimezone(zone).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+class RowSerializer:
+    """
+    Read-only counterpart of a ModelSerializer for values() rows. The
+    serializer's fields are compiled once into (name, column, converter)
+    steps, so each row costs a dict lookup and at most one call per
+    field instead of a model instance and a walk over field objects.
+
+    Method fields and other computed fields have no column of their own;
+    sources maps each to (column, converter), where the converter may be
+    a serializer field or None to pass the value through.
+    """
+
+    def __init__(
+        self,
+        serializer: serializers.Serializer,
+        sources: Optional[Dict[str, Tuple[str, Any]]] = None,
+        extra_columns: Iterable[str] = ()
+    ):
+        sources = sources or {}
+        model = serializer.Meta.model
+        self.steps: List[Tuple[str, str, Converter]] = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if name in sources:
+                column, convert = sources[name]
+                if isinstance(convert, drf_fields.Field):
+                    convert = converter_for(convert)
+            elif isinstance(field, PrimaryKeyRelatedField) and field.pk_field is None:
+                column, convert = model._meta.get_field(field.source).attname, None
+            elif field.source != '*' and '.' not in field.source and not isinstance(field, serializers.SerializerMethodField):
+                column, convert = field.source, converter_for(field)
+            else:
+                raise ImproperlyConfigured(
+                    f"{type(serializer).__name__}.{name} has no column; give it a source"
+                )
+            self.steps.append((name, column, convert))
+
+        columns = dict.fromkeys(column for _, column, _ in self.steps)
+        columns.update(dict.fromkeys(extra_columns))
+        self.columns = tuple(columns)
+
+    def to_representation(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        ret = {}
+        for name, column, convert in self.steps:
+            value = row[column]
+            # None skips the converter, as Serializer.to_representation does
+            ret[name] = value if convert is None or value is None else convert(value)
+        return ret
+
+    def serialize(self, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        to_representation = self.to_representation
+        return [to_representation(row) for row in rows]
+
+class ValuesListMixin:
+    """
+    list() built from values() rows with a RowSerializer, for list
+    endpoints whose row count makes ModelSerializer the bottleneck.
+    Output matches serializer_class field for field.
+    """
+    value_sources: Dict[str, Tuple[str, Any]] = {}
+    # The pagination cursor is read from these
+    key_columns: Tuple[str, ...] = ('id', 'created_at')
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = RowSerializer(self.get_serializer(), self.value_sources, self.key_columns)
+        queryset = queryset.values(*rows.columns)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(rows.serialize(page))
+        return Response(rows.serialize(queryset))
@@ -1,12 +1,49 @@
 from rest_framework import serializers
-from ..models import ShopifyOrder, PaymentAttempt
+from django.urls import reverse
+from ..models import ShopifyOrder, PaymentAttempt, PDFRenderJob, Sample
+
+# Formats computed amounts like the model's money fields
+MONEY = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+class SparseFieldsMixin:
+    """Renders only the field names given as the 'fields' context entry"""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested = self.context.get('fields')
+        if requested is None:
+            return fields
+        return {name: field for name, field in fields.items() if name in requested}
+
+class OrderSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    # From with_payment_summary() annotations when the queryset has them,
+    # else the totals stored on the order
+    total_paid = serializers.SerializerMethodField()
+    payment_status = serializers.SerializerMethodField()
+    is_paid = serializers.SerializerMethodField()
 
-class OrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = ShopifyOrder
         fields = '__all__'
 
-class PaymentSerializer(serializers.ModelSerializer):
+    def get_total_paid(self, order):
+        return MONEY.to_representation(getattr(order, 'live_total_paid', order.total_paid))
+
+    def get_payment_status(self, order):
+        return getattr(order, 'live_payment_status', order.payment_status)
+
+    def get_is_paid(self, order):
+        return getattr(order, 'live_is_paid', order.is_paid)
+
+# Where RowSerializer reads OrderSerializer's method fields in rows from
+# a with_payment_summary() queryset
+ORDER_VALUE_SOURCES = {
+    'total_paid': ('live_total_paid', MONEY),
+    'payment_status': ('live_payment_status', None),
+    'is_paid': ('live_is_paid', None),
+}
+
+class PaymentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = PaymentAttempt
         fields = '__all__'
@@ -21,3 +58,34 @@ class PaymentSerializer(serializers.ModelSerializer):
                 'amount': 'Payment amount must match order amount'
             })
         return data
+
+class SampleSerializer(serializers.ModelSerializer):
+    order_reference = serializers.CharField(source='order.order_reference', read_only=True)
+
+    class Meta:
+        model = Sample
+        fields = ('sample_id', 'field', 'crop', 'cultivar', 'position', 'order', 'order_reference')
+        read_only_fields = fields
+
+
+class PDFRenderJobSerializer(serializers.ModelSerializer):
+    status_url = serializers.SerializerMethodField()
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PDFRenderJob
+        fields = (
+            'id', 'kind', 'status', 'priority', 'lane', 'estimated_pages', 'order_ids',
+            'progress', 'total',
+            'error_message', 'created_at', 'started_at', 'finished_at',
+            'status_url', 'download_url',
+        )
+        read_only_fields = fields
+
+    def get_status_url(self, job):
+        return reverse('api:pdf-job-detail', args=[job.id])
+
+    def get_download_url(self, job):
+        if job.status != PDFRenderJob.STATUS_COMPLETED:
+            return None
+        return reverse('api:pdf-job-download', args=[job.id])
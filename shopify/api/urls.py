@@ -7,6 +7,7 @@ app_name = 'api'
 router = DefaultRouter()
 router.register(r'orders', views.OrderViewSet, basename='order')
 router.register(r'payments', views.PaymentViewSet, basename='payment')
+router.register(r'samples', views.SampleViewSet, basename='sample')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -16,4 +17,16 @@ urlpatterns = [
     path('batch/generate-pdfs/', 
          views.BatchPDFGeneration.as_view(), 
          name='batch-pdf-generate'),
+    path('pdf-jobs/lanes/',
+         views.PDFJobLaneStats.as_view(),
+         name='pdf-job-lanes'),
+    path('pdf-jobs/<int:pk>/',
+         views.PDFRenderJobDetail.as_view(),
+         name='pdf-job-detail'),
+    path('pdf-jobs/<int:pk>/download/',
+         views.PDFRenderJobDownload.as_view(),
+         name='pdf-job-download'),
+    path('pdf-cache/stats/',
+         views.PDFCacheStats.as_view(),
+         name='pdf-cache-stats'),
 ] 
\ No newline at end of file
@@ -1,40 +1,193 @@
-from rest_framework import viewsets, generics
+from rest_framework import serializers, viewsets, generics
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import status
-from ..models import ShopifyOrder, PaymentAttempt
-from .serializers import OrderSerializer, PaymentSerializer
-from ..services.pdf_generator import PDFGenerator
+from rest_framework.permissions import IsAdminUser
+from rest_framework.renderers import BrowsableAPIRenderer
+from django.http import FileResponse, HttpResponse
+from ..models import ShopifyOrder, PaymentAttempt, PDFRenderJob, Sample
+from .fieldsets import SparseFieldsetMixin
+from .filters import QueryParamFilter, comma_list, timestamp
+from .pagination import KeysetPagination, SamplePagination
+from .renderers import FastJSONRenderer
+from .rows import ValuesListMixin
+from .serializers import ORDER_VALUE_SOURCES, OrderSerializer, PaymentSerializer, PDFRenderJobSerializer, SampleSerializer
+from ..services.batch_pdf_generator import BatchPDFGenerator
+from ..services.cache_manager import PDFCacheManager
+from ..services.label_printer import get_printer_renderer
+from ..services.order_import import OrderImporter, iter_ndjson
+from ..services.render_jobs import PDFJobQueue
 from django.core.exceptions import ValidationError
 from typing import List, Optional
 
-class OrderViewSet(viewsets.ModelViewSet):
+# Each filter leads a composite index ending in (-created_at, -id), the
+# pagination order, so filtered pages are index range scans
+ORDER_FILTERS = {
+    'status': ('status__in', comma_list),
+    'currency': ('currency__in', comma_list),
+    'customer_email': ('customer_email', str),
+    'created_after': ('created_at__gte', timestamp),
+    'created_before': ('created_at__lt', timestamp),
+}
+
+PAYMENT_FILTERS = {
+    'status': ('status__in', comma_list),
+    'payment_method': ('payment_method__in', comma_list),
+    'order': ('order_id', int),
+    'created_after': ('created_at__gte', timestamp),
+    'created_before': ('created_at__lt', timestamp),
+}
+
+# Serializer fields computed from with_payment_summary() annotations
+PAYMENT_SUMMARY_FIELDS = frozenset({'total_paid', 'payment_status', 'is_paid'})
+
+class OrderFieldsetMixin(SparseFieldsetMixin):
+    # Everything but order_data, which can be far larger than the rest
+    summary_fields = (
+        'id', 'order_reference', 'amount', 'currency', 'customer_email',
+        'customer_name', 'status', 'created_at', 'sample_count',
+        'total_paid', 'payment_status', 'is_paid',
+    )
+    field_dependencies = {
+        'total_paid': ('total_paid',),
+        'payment_status': ('payment_status',),
+        'is_paid': ('payment_count',),
+    }
+
+    def get_queryset(self):
+        # Payment state comes from the same query, not one aggregate per
+        # order, and only when it is asked for
+        queryset = super().get_queryset()
+        requested = self.get_requested_fields()
+        if requested is None or requested & PAYMENT_SUMMARY_FIELDS:
+            queryset = queryset.with_payment_summary()
+        return queryset
+
+    def perform_update(self, serializer):
+        # The payment annotations were computed before the save, and an
+        # amount change restates payment_status, so answer from a fresh read
+        super().perform_update(serializer)
+        serializer.instance = self.get_queryset().get(pk=serializer.instance.pk)
+
+# Lists are serialized from values() rows and encoded with orjson when
+# it is installed; the browsable API is unchanged
+LIST_RENDERERS = [FastJSONRenderer, BrowsableAPIRenderer]
+
+class OrderViewSet(OrderFieldsetMixin, ValuesListMixin, viewsets.ModelViewSet):
     queryset = ShopifyOrder.objects.all()
     serializer_class = OrderSerializer
+    renderer_classes = LIST_RENDERERS
+    value_sources = ORDER_VALUE_SOURCES
+    pagination_class = KeysetPagination
+    filter_backends = [QueryParamFilter]
+    query_filters = ORDER_FILTERS
 
-class PaymentViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Create many orders in one request from {"orders": [...]}, an
+        application/x-ndjson body or an NDJSON file uploaded as "file".
+        NDJSON is read line by line, so uploads of any size stream
+        through without being held in memory.
+        """
+        if request.content_type.startswith('application/x-ndjson'):
+            if request.stream is None:
+                return Response({'error': 'Request body is empty'}, status=status.HTTP_400_BAD_REQUEST)
+            rows = iter_ndjson(request.stream)
+        elif 'file' in request.FILES:
+            rows = iter_ndjson(request.FILES['file'])
+        else:
+            orders = request.data.get('orders')
+            if not isinstance(orders, list):
+                return Response(
+                    {'error': 'orders must be a list, or send NDJSON'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            rows = enumerate(orders, 1)
+
+        report = OrderImporter().import_rows(rows)
+        return Response(
+            report.as_dict(),
+            status=status.HTTP_201_CREATED if report.created else status.HTTP_400_BAD_REQUEST
+        )
+
+class PaymentViewSet(SparseFieldsetMixin, ValuesListMixin, viewsets.ModelViewSet):
     queryset = PaymentAttempt.objects.all()
     serializer_class = PaymentSerializer
+    renderer_classes = LIST_RENDERERS
+    pagination_class = KeysetPagination
+    filter_backends = [QueryParamFilter]
+    query_filters = PAYMENT_FILTERS
+
+class SampleViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Finds samples, and the orders they belong to, by exact sample ID
+    (?sample_id=SC001) or ID prefix (?prefix=SC0), from the indexed
+    Sample table rather than each order's order_data
+    """
+    # The order's reference comes from the join; its order_data is not loaded
+    queryset = Sample.objects.select_related('order').only(
+        'id', 'sample_id', 'field', 'crop', 'cultivar', 'position', 'order__id', 'order__order_reference'
+    )
+    serializer_class = SampleSerializer
+    pagination_class = SamplePagination
+    filter_backends = [QueryParamFilter]
+    query_filters = {
+        'sample_id': ('sample_id', str),
+        'prefix': ('sample_id__startswith', str),
+        'order': ('order_id', int),
+    }
 
-class OrderList(generics.ListCreateAPIView):
+class OrderList(OrderFieldsetMixin, ValuesListMixin, generics.ListCreateAPIView):
     queryset = ShopifyOrder.objects.all()
     serializer_class = OrderSerializer
+    renderer_classes = LIST_RENDERERS
+    value_sources = ORDER_VALUE_SOURCES
+    pagination_class = KeysetPagination
+    filter_backends = [QueryParamFilter]
+    query_filters = ORDER_FILTERS
 
-class OrderDetail(generics.RetrieveUpdateDestroyAPIView):
+class OrderDetail(OrderFieldsetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = ShopifyOrder.objects.all()
     serializer_class = OrderSerializer
 
+# Accepts 0, 5 or 10, as numbers or strings
+PRIORITY_FIELD = serializers.ChoiceField(choices=PDFRenderJob.PRIORITY_CHOICES)
+
+def job_priority(request) -> int:
+    """Priority requested in the body, defaulting to normal"""
+    try:
+        return PRIORITY_FIELD.run_validation(request.data.get('priority', PDFRenderJob.PRIORITY_NORMAL))
+    except serializers.ValidationError:
+        choices = ', '.join(str(value) for value, _ in PDFRenderJob.PRIORITY_CHOICES)
+        raise ValidationError(f'priority must be one of {choices}')
+
+def job_response(job: PDFRenderJob, created: bool) -> Response:
+    """202 for a job still to finish, 200 when an identical job already has"""
+    return Response(
+        dict(PDFRenderJobSerializer(job).data, deduplicated=not created),
+        status=status.HTTP_200_OK if job.is_finished else status.HTTP_202_ACCEPTED
+    )
+
 class OrderPDFGeneration(APIView):
+    """Queue an order PDF for the background worker"""
+
     def post(self, request, pk):
         try:
-            order = ShopifyOrder.objects.get(pk=pk)
-            pdf_generator = PDFGenerator()
-            pdf_file = pdf_generator.generate_order_pdf(order.order_data)
-            return Response({'pdf_url': pdf_file}, status=status.HTTP_200_OK)
-        except ShopifyOrder.DoesNotExist:
+            if not ShopifyOrder.objects.filter(pk=pk).exists():
+                return Response(
+                    {'error': 'Order not found'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            job, created = PDFJobQueue().enqueue(
+                PDFRenderJob.KIND_ORDER, [pk], priority=job_priority(request)
+            )
+            return job_response(job, created)
+        except ValidationError as e:
             return Response(
-                {'error': 'Order not found'}, 
-                status=status.HTTP_404_NOT_FOUND
+                {'error': e.message},
+                status=status.HTTP_400_BAD_REQUEST
             )
         except Exception as e:
             return Response(
@@ -43,6 +196,11 @@ class OrderPDFGeneration(APIView):
             )
 
 class BatchPDFGeneration(APIView):
+    """
+    Queue a batch labels PDF for the background worker, or return ZPL/EPL
+    printer commands straight away when format is zpl or epl
+    """
+
     def validate_order_ids(self, order_ids) -> Optional[Response]:
         """Validate order_ids input"""
         if not isinstance(order_ids, list):
@@ -57,13 +215,18 @@ class BatchPDFGeneration(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Validate that all IDs exist
-        invalid_ids = []
-        for order_id in order_ids:
-            try:
-                ShopifyOrder.objects.get(pk=order_id)
-            except (ShopifyOrder.DoesNotExist, ValueError):
-                invalid_ids.append(order_id)
+        # Validate that all IDs exist, in one query
+        valid_ids = [
+            order_id for order_id in order_ids
+            if isinstance(order_id, int) or (isinstance(order_id, str) and order_id.isdigit())
+        ]
+        existing = set(
+            ShopifyOrder.objects.filter(pk__in=valid_ids).values_list('id', flat=True)
+        )
+        invalid_ids = [
+            order_id for order_id in order_ids
+            if order_id not in valid_ids or int(order_id) not in existing
+        ]
         
         if invalid_ids:
             return Response(
@@ -80,24 +243,88 @@ class BatchPDFGeneration(APIView):
         validation_error = self.validate_order_ids(order_ids)
         if validation_error:
             return validation_error
+
+        label_format = request.data.get('format', 'pdf')
+        if label_format != 'pdf':
+            return self.printer_labels(order_ids, label_format)
             
         try:
-            pdf_generator = PDFGenerator()
-            pdf_files = []
-            
-            for order_id in order_ids:
-                order = ShopifyOrder.objects.get(pk=order_id)
-                pdf_file = pdf_generator.generate_order_pdf(order.order_data)
-                pdf_files.append(pdf_file)
-                
-            return Response({'pdf_urls': pdf_files}, status=status.HTTP_200_OK)
-            
+            job, created = PDFJobQueue().enqueue(
+                PDFRenderJob.KIND_BATCH, order_ids, priority=job_priority(request)
+            )
+            return job_response(job, created)
+        except ValidationError as e:
+            return Response(
+                {'error': e.message},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         except Exception as e:
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def printer_labels(self, order_ids: List, label_format: str) -> HttpResponse:
+        """
+        ZPL/EPL commands render in milliseconds, so they are returned
+        directly rather than queued
+        """
+        try:
+            renderer = get_printer_renderer(label_format)
+        except ValueError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        commands = BatchPDFGenerator().stream_batch_labels(order_ids, renderer)
+        response = HttpResponse(b''.join(commands), content_type=renderer.content_type)
+        response['Content-Disposition'] = f'attachment; filename="batch_labels.{renderer.format}"'
+        return response
+
+class PDFRenderJobDetail(generics.RetrieveAPIView):
+    """Status and progress of a queued PDF render"""
+    queryset = PDFRenderJob.objects.all()
+    serializer_class = PDFRenderJobSerializer
+
+class PDFRenderJobDownload(APIView):
+    """Serve the PDF a completed job rendered"""
+
+    def get(self, request, pk):
+        try:
+            job = PDFRenderJob.objects.get(pk=pk)
+        except PDFRenderJob.DoesNotExist:
+            return Response(
+                {'error': 'Job not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        if job.status != PDFRenderJob.STATUS_COMPLETED:
+            return Response(
+                {'error': f'Job is {job.status.lower()}', 'status': job.status},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        storage = PDFJobQueue().storage
+        if not storage.exists(job.artifact):
+            return Response(
+                {'error': 'Rendered PDF is no longer available'},
+                status=status.HTTP_410_GONE
+            )
+        filename = f"{job.kind.lower()}_{job.id}.pdf"
+        return FileResponse(
+            storage.open(job.artifact),
+            content_type='application/pdf',
+            as_attachment=True,
+            filename=filename
+        )
+
+class PDFJobLaneStats(APIView):
+    """Queue depth, running jobs and wait times for each render lane"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(PDFJobQueue().lane_stats(), status=status.HTTP_200_OK)
+
 class BatchEmailSend(APIView):
     def post(self, request):
         order_ids = request.data.get('order_ids', [])
@@ -112,10 +339,25 @@ class BatchEmailSend(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-class PaymentList(generics.ListCreateAPIView):
+class PDFCacheStats(APIView):
+    """Hit and miss counters for the rendered PDF cache"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(PDFCacheManager().stats(), status=status.HTTP_200_OK)
+
+    def delete(self, request):
+        PDFCacheManager().reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class PaymentList(SparseFieldsetMixin, ValuesListMixin, generics.ListCreateAPIView):
     queryset = PaymentAttempt.objects.all()
     serializer_class = PaymentSerializer
+    renderer_classes = LIST_RENDERERS
+    pagination_class = KeysetPagination
+    filter_backends = [QueryParamFilter]
+    query_filters = PAYMENT_FILTERS
 
-class PaymentDetail(generics.RetrieveUpdateDestroyAPIView):
+class PaymentDetail(SparseFieldsetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = PaymentAttempt.objects.all()
     serializer_class = PaymentSerializer
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+class ShopifyConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'shopify'
+
+    def ready(self):
+        # Connect model signal handlers
+        from . import signals  # noqa: F401
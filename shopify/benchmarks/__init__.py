@@ -0,0 +1,14 @@
+"""Performance benchmarks for PDF rendering and the API, run with ``manage.py benchmark_pdf``"""
+from . import api_lists, barcodes, baseline, batch, chrome, labels, order_pdf
+
+SUITES = {
+    'api-lists': api_lists.run,
+    'barcodes': barcodes.run,
+    'baseline': baseline.run,
+    'batch': batch.run,
+    'batch-modes': batch.run_modes,
+    'batch-dedupe': batch.run_dedupe,
+    'chrome': chrome.run,
+    'labels': labels.run,
+    'order-pdf': order_pdf.run,
+}
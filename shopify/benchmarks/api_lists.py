@@ -0,0 +1,73 @@
+"""
+Order list serialization: ModelSerializer over instances plus DRF's
+JSON encoder, versus RowSerializer over values() rows plus
+FastJSONRenderer. Rows are built in memory, so only serialization and
+encoding are timed, not the database.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from typing import Any, Dict, List
+import json
+from ..api import renderers
+from ..api.renderers import FastJSONRenderer
+from ..api.rows import RowSerializer
+from ..api.serializers import ORDER_VALUE_SOURCES, OrderSerializer
+from ..models import ShopifyOrder
+from .utils import synthetic_order_data, time_calls
+
+def _orders(count: int) -> List[ShopifyOrder]:
+    now = timezone.now()
+    order_data = synthetic_order_data(fields=2, crops=2, cultivars=5)
+    orders = []
+    for i in range(count):
+        order = ShopifyOrder(
+            id=i + 1,
+            order_reference=f'BENCH-{i:06}',
+            amount=Decimal('125.00'),
+            currency='USD',
+            customer_email=f'bench{i}@example.com',
+            customer_name=f'Bench User {i}',
+            created_at=now - timedelta(minutes=i),
+            updated_at=now,
+            order_data=order_data,
+            sample_count=20,
+        )
+        # As with_payment_summary() would annotate them
+        order.live_total_paid = Decimal('125.00') if i % 2 else Decimal('0.00')
+        order.live_payment_count = i % 2
+        order.live_is_paid = bool(i % 2)
+        order.live_payment_status = 'PAID' if i % 2 else 'UNPAID'
+        orders.append(order)
+    return orders
+
+def _as_row(order: ShopifyOrder, columns) -> Dict[str, Any]:
+    return {column: getattr(order, column) for column in columns}
+
+def _rate(rows: int, timing: Dict[str, float]) -> Dict[str, float]:
+    return dict(timing, rows_per_sec=round(rows / (timing['mean_ms'] / 1000), 1))
+
+def run(iterations: int = 20, rows: int = 1000) -> Dict[str, Any]:
+    orders = _orders(rows)
+    row_serializer = RowSerializer(OrderSerializer(), ORDER_VALUE_SOURCES)
+    values_rows = [_as_row(order, row_serializer.columns) for order in orders]
+
+    def model_serializer() -> bytes:
+        return JSONRenderer().render({'results': OrderSerializer(orders, many=True).data})
+
+    def values_serializer() -> bytes:
+        return FastJSONRenderer().render({'results': row_serializer.serialize(values_rows)})
+
+    return {
+        'iterations': iterations,
+        'rows': rows,
+        'orjson': renderers.orjson is not None,
+        'same_json': json.loads(model_serializer()) == json.loads(values_serializer()),
+        'model_serializer': _rate(rows, time_calls(model_serializer, iterations)),
+        'values_serializer': _rate(rows, time_calls(values_serializer, iterations)),
+        'serialize_only': {
+            'model_serializer': _rate(rows, time_calls(lambda: OrderSerializer(orders, many=True).data, iterations)),
+            'values_serializer': _rate(rows, time_calls(lambda: row_serializer.serialize(values_rows), iterations)),
+        },
+    }
@@ -0,0 +1,32 @@
+"""Label render time for a 5,000 sample order with and without barcodes, cold and cached"""
+from typing import Any, Dict
+from ..services import barcodes
+from ..services.barcodes import SYMBOLOGIES, encode_barcode
+from ..services.pdf_generator import PDFGenerator
+from .utils import synthetic_order_data, time_calls
+
+def run(iterations: int = 10) -> Dict[str, Any]:
+    order_data = synthetic_order_data(fields=10, crops=10, cultivars=50)
+    results = {
+        'iterations': iterations,
+        'samples': 5000,
+        'qr_encoder': 'segno' if barcodes.segno is not None else 'reportlab',
+    }
+
+    text_only = PDFGenerator()
+    text_only.label_renderer.barcode = None
+    results['text'] = time_calls(lambda: text_only.generate_sample_labels(order_data), iterations)
+
+    for symbology in SYMBOLOGIES:
+        generator = PDFGenerator(barcode=symbology)
+
+        def cold():
+            encode_barcode.cache_clear()
+            generator.generate_sample_labels(order_data)
+
+        results[symbology] = {
+            'pdf_bytes': len(generator.generate_sample_labels(order_data)),
+            'cold': time_calls(cold, iterations),
+            'cached': time_calls(lambda: generator.generate_sample_labels(order_data), iterations),
+        }
+    return results
@@ -0,0 +1,70 @@
+"""
+Regression baseline across order sizes: single label renders, batch
+renders on one canvas and per-order renders merged with PyPDF2. Save
+the output with ``--output`` and check later runs with ``--compare``.
+"""
+from PyPDF2 import PdfReader
+from typing import Any, Callable, Dict
+import io
+from ..models import ShopifyOrder
+from ..services.batch_pdf_generator import BatchPDFGenerator
+from ..services.pdf_generator import PDFGenerator
+from .utils import peak_alloc_bytes, peak_rss_bytes, synthetic_order_data, time_calls
+
+# name: (fields, crops, cultivars, orders per batch)
+ORDER_SIZES = {
+    'small': (1, 2, 5, 50),
+    'medium': (5, 5, 10, 10),
+    'large': (10, 10, 50, 2),
+}
+
+def _measure(func: Callable[[], bytes], iterations: int, labels: int) -> Dict[str, Any]:
+    pdf_data = func()
+    pages = len(PdfReader(io.BytesIO(pdf_data)).pages)
+    timing = time_calls(func, iterations)
+    return {
+        'timing': timing,
+        'pages': pages,
+        'pages_per_sec': round(pages / (timing['mean_ms'] / 1000), 1),
+        'pdf_bytes': len(pdf_data),
+        'bytes_per_label': round(len(pdf_data) / labels, 1),
+        'peak_alloc_bytes': peak_alloc_bytes(func),
+        'peak_rss_bytes': peak_rss_bytes(),
+    }
+
+def run(iterations: int = 5) -> Dict[str, Any]:
+    generator = PDFGenerator()
+    batch_generator = BatchPDFGenerator()
+    results = {'iterations': iterations}
+
+    for name, (fields, crops, cultivars, batch_orders) in ORDER_SIZES.items():
+        order_data = synthetic_order_data(fields, crops, cultivars)
+        samples = fields * crops * cultivars
+        orders = [
+            ShopifyOrder(id=i, order_reference=f'BENCH-{i}', order_data=order_data)
+            for i in range(batch_orders)
+        ]
+
+        def batch():
+            output = io.BytesIO()
+            batch_generator.write_single_canvas(orders, output)
+            return output.getvalue()
+
+        def merge():
+            output = io.BytesIO()
+            batch_generator.merge_documents(
+                batch_generator.render_documents([order.order_data for order in orders]),
+                output
+            )
+            return output.getvalue()
+
+        results[name] = {
+            'samples': samples,
+            'batch_orders': batch_orders,
+            'single': _measure(
+                lambda: generator.generate_sample_labels(order_data), iterations, samples
+            ),
+            'batch': _measure(batch, iterations, samples * batch_orders),
+            'merge': _measure(merge, iterations, samples * batch_orders),
+        }
+    return results
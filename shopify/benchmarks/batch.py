@@ -0,0 +1,114 @@
+"""Batch label rendering: process-pool scaling, merge versus single-canvas modes, resource dedupe"""
+from PyPDF2 import PdfMerger
+from typing import Any, Dict
+import io
+import os
+from ..models import ShopifyOrder
+from ..services.batch_pdf_generator import BatchPDFGenerator
+from ..services.pdf_stream import StreamingPDFWriter
+from ..services.render_pool import shutdown_render_pool
+from .utils import peak_alloc_bytes, synthetic_order_data, time_calls
+
+def run(iterations: int = 3) -> Dict[str, Any]:
+    order_data_list = [synthetic_order_data(fields=2, crops=3, cultivars=10)] * 200
+    cpus = os.cpu_count() or 1
+    results = {'iterations': iterations, 'orders': len(order_data_list), 'cpus': cpus}
+
+    generator = BatchPDFGenerator()
+    results['serial'] = time_calls(
+        lambda: list(generator.render_documents(order_data_list, parallel=False)), iterations
+    )
+
+    workers = 1
+    while workers <= cpus:
+        generator = BatchPDFGenerator(workers=workers)
+        # time_calls' warm-up call starts the pool, so timings exclude process start
+        results[f'parallel_{workers}'] = time_calls(
+            lambda: generator.render_documents(order_data_list, parallel=True), iterations
+        )
+        workers *= 2
+    shutdown_render_pool()
+    return results
+
+class _NullSink:
+    """Stands in for the client socket: counts bytes and drops them"""
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data: bytes) -> None:
+        self.size += len(data)
+
+def run_modes(iterations: int = 3) -> Dict[str, Any]:
+    """Merge-based batches versus one shared canvas versus streaming concatenation"""
+    generator = BatchPDFGenerator()
+    order_data = synthetic_order_data(fields=1, crops=2, cultivars=15)
+    results = {'iterations': iterations, 'samples_per_order': 30}
+
+    for size in (10, 100, 1000):
+        orders = [
+            ShopifyOrder(id=i, order_reference=f'BENCH-{i}', order_data=order_data)
+            for i in range(size)
+        ]
+
+        def merge():
+            documents = generator.render_documents([order.order_data for order in orders])
+            generator.merge_documents(documents, io.BytesIO())
+
+        def single_canvas():
+            generator.write_single_canvas(orders, io.BytesIO())
+
+        def stream():
+            writer = StreamingPDFWriter(_NullSink())
+            documents = generator.render_documents([order.order_data for order in orders])
+            for order, pdf_data in zip(orders, documents):
+                writer.append(pdf_data, title=order.order_reference)
+            writer.close()
+
+        results[size] = {
+            name: {
+                'timing': time_calls(func, iterations),
+                'peak_alloc_bytes': peak_alloc_bytes(func),
+            }
+            for name, func in (('merge', merge), ('canvas', single_canvas), ('stream', stream))
+        }
+    return results
+
+def run_dedupe(iterations: int = 3) -> Dict[str, Any]:
+    """Merged size and merge time for 500 distinct orders, with and without shared resources"""
+    generator = BatchPDFGenerator()
+    documents = list(generator.render_documents([
+        synthetic_order_data(fields=1, crops=2, cultivars=15, prefix=f'O{i:03}-')
+        for i in range(500)
+    ]))
+    results = {'iterations': iterations, 'orders': len(documents)}
+
+    def pypdf2_merger():
+        merger = PdfMerger()
+        for pdf_data in documents:
+            merger.append(io.BytesIO(pdf_data))
+        output = io.BytesIO()
+        merger.write(output)
+        return output
+
+    def stream_writer(dedupe):
+        output = io.BytesIO()
+        writer = StreamingPDFWriter(output, dedupe=dedupe)
+        for pdf_data in documents:
+            writer.append(pdf_data)
+        writer.close()
+        return output
+
+    for name, func in (
+        ('pypdf2_merger', pypdf2_merger),
+        ('stream', lambda: stream_writer(False)),
+        ('stream_dedupe', lambda: stream_writer(True)),
+    ):
+        results[name] = {
+            'pdf_bytes': len(func().getvalue()),
+            'timing': time_calls(func, iterations),
+        }
+    results['size_reduction'] = round(
+        1 - results['stream_dedupe']['pdf_bytes'] / results['pypdf2_merger']['pdf_bytes'], 3
+    )
+    return results
@@ -0,0 +1,20 @@
+"""Label render time and file size with the static chrome as a form XObject versus redrawn per page"""
+from typing import Any, Dict
+from ..services.label_engine import LabelRenderer
+from ..services.pdf_generator import PDFGenerator
+from .utils import synthetic_order_data, time_calls
+
+def run(iterations: int = 10) -> Dict[str, Any]:
+    order_data = synthetic_order_data(fields=10, crops=10, cultivars=50)
+    results = {'iterations': iterations, 'samples': 5000}
+
+    for variant, use_forms in (('inline', False), ('form_xobject', True)):
+        generator = PDFGenerator()
+        generator.label_renderer = LabelRenderer(
+            use_forms=use_forms, barcode=generator.label_renderer.barcode
+        )
+        results[variant] = {
+            'pdf_bytes': len(generator.generate_sample_labels(order_data)),
+            'render': time_calls(lambda: generator.generate_sample_labels(order_data), iterations),
+        }
+    return results
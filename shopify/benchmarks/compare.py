@@ -0,0 +1,43 @@
+"""Compare two benchmark result documents and flag regressions"""
+from typing import Any, Dict, List
+
+# Metrics compared between runs, mapped to whether larger is better.
+# Peak RSS is left out: it is a process high-water mark, not per-variant.
+METRICS = {
+    'mean_ms': False,
+    'p50_ms': False,
+    'pages_per_sec': True,
+    'rows_per_sec': True,
+    'pdf_bytes': False,
+    'bytes_per_label': False,
+    'peak_alloc_bytes': False,
+}
+
+def compare_results(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = 0.1,
+    path: str = ''
+) -> List[Dict[str, Any]]:
+    """
+    Walk both documents and return one entry per metric present in each,
+    with the relative change and whether it is worse than threshold
+    """
+    changes = []
+    for key, value in current.items():
+        if key not in baseline:
+            continue
+        name = f"{path}.{key}" if path else str(key)
+        if isinstance(value, dict) and isinstance(baseline[key], dict):
+            changes.extend(compare_results(baseline[key], value, threshold, name))
+        elif key in METRICS and baseline[key]:
+            change = (value - baseline[key]) / baseline[key]
+            worse = -change if METRICS[key] else change
+            changes.append({
+                'metric': name,
+                'baseline': baseline[key],
+                'current': value,
+                'change': round(change, 4),
+                'regression': worse > threshold,
+            })
+    return changes
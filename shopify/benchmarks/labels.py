@@ -0,0 +1,15 @@
+"""Sample label render time for a 5,000 sample order"""
+from typing import Any, Dict
+from ..services.pdf_generator import PDFGenerator
+from .utils import synthetic_order_data, time_calls
+
+def run(iterations: int = 10) -> Dict[str, Any]:
+    generator = PDFGenerator()
+    order_data = synthetic_order_data(fields=10, crops=10, cultivars=50)
+    pdf_data = generator.generate_sample_labels(order_data)
+    return {
+        'iterations': iterations,
+        'samples': 5000,
+        'pdf_bytes': len(pdf_data),
+        'render': time_calls(lambda: generator.generate_sample_labels(order_data), iterations),
+    }
@@ -0,0 +1,61 @@
+"""
+Request latency of the in-memory order PDF path versus the legacy
+path that rendered ``order_<ref>.pdf`` into the working directory
+"""
+from django.http import HttpResponse
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import letter
+from typing import Any, Dict
+import os
+import tempfile
+from ..services.pdf_generator import PDFGenerator
+from .utils import time_calls
+
+SAMPLE_ORDER = {
+    'order_reference': 'BENCH-001',
+    'customer_name': 'Bench User',
+    'customer_email': 'bench@example.com',
+    'currency': 'USD',
+    'amount': '100.00',
+}
+
+def _file_based_response(generator: PDFGenerator, order_data: Dict[str, Any]) -> HttpResponse:
+    """Reproduces the old flow: write to disk, then read back to serve"""
+    filename = f"order_{order_data['order_reference']}.pdf"
+    c = canvas.Canvas(filename, pagesize=letter)
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(50, generator.height - 50, f"Order: {order_data['order_reference']}")
+    c.setFont("Helvetica", 12)
+    y_position = generator.height - 100
+    c.drawString(50, y_position, f"Customer: {order_data['customer_name']}")
+    c.drawString(50, y_position - 20, f"Email: {order_data['customer_email']}")
+    y_position -= 60
+    c.drawString(50, y_position, f"Amount: {order_data['currency']} {order_data['amount']}")
+    c.save()
+    with open(filename, 'rb') as pdf_file:
+        return HttpResponse(pdf_file.read(), content_type='application/pdf')
+
+def _in_memory_response(generator: PDFGenerator, order_data: Dict[str, Any]) -> HttpResponse:
+    return HttpResponse(generator.render_order_pdf(order_data), content_type='application/pdf')
+
+def run(iterations: int = 200) -> Dict[str, Any]:
+    generator = PDFGenerator()
+    results = {'iterations': iterations}
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            results['file_based'] = time_calls(
+                lambda: _file_based_response(generator, SAMPLE_ORDER), iterations
+            )
+        finally:
+            os.chdir(cwd)
+
+    results['in_memory'] = time_calls(
+        lambda: _in_memory_response(generator, SAMPLE_ORDER), iterations
+    )
+    results['speedup'] = round(
+        results['file_based']['mean_ms'] / results['in_memory']['mean_ms'], 2
+    )
+    return results
@@ -0,0 +1,55 @@
+from typing import Callable, Dict
+import math
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+
+def time_calls(func: Callable[[], object], iterations: int) -> Dict[str, float]:
+    """Call ``func`` repeatedly and summarise the latencies in milliseconds"""
+    func()  # Warm up imports and font caches
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    return {
+        'mean_ms': round(statistics.mean(timings), 3),
+        'p50_ms': round(timings[len(timings) // 2], 3),
+        'p95_ms': round(timings[math.ceil(len(timings) * 0.95) - 1], 3),
+        'max_ms': round(timings[-1], 3),
+    }
+
+def peak_alloc_bytes(func: Callable[[], object]) -> int:
+    """Peak Python heap allocated while func runs, as traced by tracemalloc"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def peak_rss_bytes() -> int:
+    """High-water resident set size of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def synthetic_order_data(fields: int, crops: int, cultivars: int, prefix: str = '') -> Dict[str, list]:
+    """Build an order_data tree with fields x crops x cultivars samples, ids starting with prefix"""
+    return {
+        'fields': [{
+            'name': f'Field {f + 1}',
+            'crops': [{
+                'name': f'Crop {c + 1}',
+                'cultivars': [{
+                    'name': f'Cultivar {k + 1}',
+                    'sample_id': f'{prefix}F{f:03}C{c:02}K{k:03}',
+                } for k in range(cultivars)],
+            } for c in range(crops)],
+        } for f in range(fields)],
+    }
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+import json
+from ...models import ShopifyOrder
+
+class Command(BaseCommand):
+    help = "Rebuilds each order's Sample rows from its order_data where they differ"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report orders whose samples differ and exit with an error if there are any'
+        )
+
+    def handle(self, *args, **options):
+        orders = ShopifyOrder.objects.only('id', 'order_reference', 'order_data')
+
+        drifted = []
+        checked = 0
+        for order in orders.iterator(chunk_size=500):
+            checked += 1
+            if order.sync_samples(commit=not options['check']):
+                drifted.append(order.order_reference)
+
+        self.stdout.write(json.dumps({
+            'checked': checked,
+            'drifted': drifted,
+            'rebuilt': 0 if options['check'] else len(drifted),
+        }, indent=2))
+        if options['check'] and drifted:
+            raise CommandError(f"{len(drifted)} orders have Sample rows that do not match order_data")
@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand, CommandError
+import json
+import platform
+from ...benchmarks import SUITES
+from ...benchmarks.compare import compare_results
+
+class Command(BaseCommand):
+    help = 'Runs a PDF rendering or API benchmark suite and prints the results as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('suite', choices=sorted(SUITES))
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=None,
+            help='Number of timed runs per variant (defaults to the suite\'s own)'
+        )
+        parser.add_argument(
+            '--output',
+            help='Also write the results to this JSON file'
+        )
+        parser.add_argument(
+            '--compare',
+            metavar='BASELINE',
+            help='Compare against results previously saved with --output'
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.1,
+            help='Relative slowdown or growth reported as a regression (default 0.1)'
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as baseline_file:
+                baseline = json.load(baseline_file)
+            if baseline.get('suite') != options['suite']:
+                raise CommandError(
+                    f"{options['compare']} holds results for {baseline.get('suite')!r}, "
+                    f"not {options['suite']!r}"
+                )
+
+        kwargs = {}
+        if options['iterations'] is not None:
+            kwargs['iterations'] = options['iterations']
+        report = {
+            'suite': options['suite'],
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'results': SUITES[options['suite']](**kwargs),
+        }
+
+        # JSON keys are strings; round-trip so results compare like for like
+        report = json.loads(json.dumps(report))
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                json.dump(report, output_file, indent=2)
+
+        if baseline is None:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        changes = compare_results(baseline['results'], report['results'], options['threshold'])
+        regressions = [change for change in changes if change['regression']]
+        self.stdout.write(json.dumps({'changes': changes}, indent=2))
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} metrics regressed by more than "
+                f"{options['threshold']:.0%}: "
+                + ', '.join(change['metric'] for change in regressions)
+            )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+import json
+from ...services.order_import import OrderImporter, iter_ndjson
+
+class Command(BaseCommand):
+    help = 'Creates orders in bulk from an NDJSON file, one order object per line'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='NDJSON file to import')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help='Orders validated and inserted per batch'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], 'rb') as ndjson:
+                report = OrderImporter(options['chunk_size']).import_rows(iter_ndjson(ndjson))
+        except OSError as e:
+            raise CommandError(str(e))
+        self.stdout.write(json.dumps(report.as_dict(), indent=2, default=str))
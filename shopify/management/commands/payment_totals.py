@@ -0,0 +1,51 @@
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Q, Sum
+import json
+from ...models import ShopifyOrder
+
+class Command(BaseCommand):
+    help = 'Checks the payment totals stored on each order against its payments and rebuilds any that drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report drifted orders and exit with an error if there are any'
+        )
+
+    def handle(self, *args, **options):
+        completed = Q(payments__status='COMPLETED')
+        orders = ShopifyOrder.objects.annotate(
+            actual_total=Sum('payments__amount', filter=completed),
+            actual_count=Count('payments', filter=completed),
+        ).only('id', 'order_reference', 'amount', 'total_paid', 'payment_count', 'payment_status')
+
+        drifted = []
+        checked = 0
+        for order in orders.iterator(chunk_size=500):
+            checked += 1
+            total = order.actual_total or Decimal('0.00')
+            actual = {
+                'total_paid': total,
+                'payment_count': order.actual_count,
+                'payment_status': ShopifyOrder.payment_status_for(order.amount, total),
+            }
+            stored = {field: getattr(order, field) for field in actual}
+            if stored == actual:
+                continue
+            drifted.append({
+                'order_reference': order.order_reference,
+                'stored': stored,
+                'actual': actual,
+            })
+            if not options['check']:
+                ShopifyOrder.objects.filter(pk=order.pk).update(**actual)
+
+        self.stdout.write(json.dumps({
+            'checked': checked,
+            'drifted': drifted,
+            'rebuilt': 0 if options['check'] else len(drifted),
+        }, indent=2, default=str))
+        if options['check'] and drifted:
+            raise CommandError(f"{len(drifted)} orders have drifted payment totals")
@@ -0,0 +1,47 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+import json
+from ...services.pdf_storage import get_pdf_storage
+
+class Command(BaseCommand):
+    help = 'Reports on stored PDF artifacts and prunes them by size and age'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Delete artifacts over the size or age limits'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='With --prune, list what would be deleted without deleting it'
+        )
+        parser.add_argument(
+            '--max-bytes',
+            type=int,
+            default=getattr(settings, 'PDF_STORAGE_MAX_BYTES', None),
+            help='Total size to prune the store down to'
+        )
+        parser.add_argument(
+            '--max-age-days',
+            type=float,
+            default=getattr(settings, 'PDF_STORAGE_MAX_AGE_DAYS', None),
+            help='Delete artifacts older than this many days'
+        )
+
+    def handle(self, *args, **options):
+        storage = get_pdf_storage()
+        report = {'usage': storage.usage()}
+
+        if options['prune']:
+            max_age = options['max_age_days']
+            report['pruned'] = storage.collect_garbage(
+                max_bytes=options['max_bytes'],
+                max_age=timedelta(days=max_age) if max_age is not None else None,
+                dry_run=options['dry_run']
+            )
+            report['dry_run'] = options['dry_run']
+
+        self.stdout.write(json.dumps(report, indent=2))
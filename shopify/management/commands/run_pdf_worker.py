@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+import time
+from ...models import PDFRenderJob
+from ...services.render_jobs import PDFJobQueue, default_worker_name
+
+class Command(BaseCommand):
+    help = 'Renders queued PDF jobs until stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the queue is empty instead of polling for new jobs'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait between checks of an empty queue'
+        )
+        parser.add_argument(
+            '--lane',
+            action='append',
+            choices=[lane.lower() for lane in PDFRenderJob.LANES],
+            help='Only claim jobs from this lane; repeat for several (default: all, interactive first)'
+        )
+        parser.add_argument(
+            '--max-jobs',
+            type=int,
+            default=None,
+            help='Exit after running this many jobs'
+        )
+
+    def handle(self, *args, **options):
+        queue = PDFJobQueue()
+        worker = default_worker_name()
+        lanes = [lane.upper() for lane in options['lane']] if options['lane'] else None
+        ran = 0
+        self.stdout.write(f"PDF worker {worker} started")
+
+        try:
+            while options['max_jobs'] is None or ran < options['max_jobs']:
+                close_old_connections()
+                queue.requeue_stale()
+                job = queue.run_next(worker, lanes)
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+                ran += 1
+                self.stdout.write(f"{job}: {job.artifact or job.error_message}")
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(f"PDF worker {worker} stopped after {ran} jobs")
@@ -0,0 +1,19 @@
+# Generated by Django 5.0 on 2026-10-18 12:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # PaymentAttempt.metadata was on the model before any migration added it
+
+    dependencies = [
+        ('shopify', '0002_alter_shopifyorder_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymentattempt',
+            name='metadata',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.0 on 2026-10-18 13:28
+
+from django.db import migrations, models
+
+
+# Copies of label_engine's counting as it was when this migration was
+# written, so later changes to that module cannot change what it does.
+# Rows saved before order_data was validated may be any shape; levels
+# that are not lists of objects are skipped.
+LABELS_PER_PAGE = 30  # Avery 5160, three columns of ten
+
+
+def _children(node, key):
+    items = node.get(key) if isinstance(node, dict) else None
+    if not isinstance(items, list):
+        return []
+    return [item for item in items if isinstance(item, dict)]
+
+
+def count_samples(order_data):
+    return sum(
+        1
+        for field in _children(order_data, 'fields')
+        for crop in _children(field, 'crops')
+        for cultivar in _children(crop, 'cultivars')
+        if cultivar.get('sample_id')
+    )
+
+
+def backfill_render_cost(apps, schema_editor):
+    ShopifyOrder = apps.get_model('shopify', 'ShopifyOrder')
+    orders = ShopifyOrder.objects.only('id', 'order_data')
+    for order in orders.iterator(chunk_size=500):
+        order.sample_count = count_samples(order.order_data)
+        order.estimated_pages = max(1, -(-order.sample_count // LABELS_PER_PAGE))
+        order.save(update_fields=['sample_count', 'estimated_pages'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shopify', '0004_pdfrenderjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pdfrenderjob',
+            name='estimated_pages',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='pdfrenderjob',
+            name='lane',
+            field=models.CharField(choices=[('INTERACTIVE', 'Interactive'), ('BULK', 'Bulk')], default='INTERACTIVE', max_length=12),
+        ),
+        migrations.AddField(
+            model_name='shopifyorder',
+            name='estimated_pages',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='shopifyorder',
+            name='sample_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='pdfrenderjob',
+            index=models.Index(fields=['status', 'lane', '-priority', 'created_at'], name='shopify_pdf_status_735a59_idx'),
+        ),
+        migrations.RunPython(backfill_render_cost, migrations.RunPython.noop),
+    ]
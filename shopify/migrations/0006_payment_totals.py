@@ -0,0 +1,47 @@
+# Generated by Django 5.0 on 2026-10-18 13:30
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_payment_totals(apps, schema_editor):
+    ShopifyOrder = apps.get_model('shopify', 'ShopifyOrder')
+    completed = Q(payments__status='COMPLETED')
+    orders = ShopifyOrder.objects.annotate(
+        paid=Sum('payments__amount', filter=completed),
+        paid_count=Count('payments', filter=completed),
+    ).filter(paid_count__gt=0)
+    for order in orders.iterator(chunk_size=500):
+        payment_status = 'PAID' if order.paid >= order.amount else 'PARTIALLY_PAID'
+        ShopifyOrder.objects.filter(pk=order.pk).update(
+            total_paid=order.paid,
+            payment_count=order.paid_count,
+            payment_status=payment_status,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shopify', '0005_render_cost_and_lanes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shopifyorder',
+            name='payment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='shopifyorder',
+            name='payment_status',
+            field=models.CharField(choices=[('UNPAID', 'Unpaid'), ('PARTIALLY_PAID', 'Partially paid'), ('PAID', 'Paid')], default='UNPAID', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='shopifyorder',
+            name='total_paid',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=10),
+        ),
+        migrations.RunPython(backfill_payment_totals, migrations.RunPython.noop),
+    ]
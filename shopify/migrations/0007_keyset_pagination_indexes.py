@@ -0,0 +1,65 @@
+# Generated by Django 5.0 on 2026-10-18 13:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shopify', '0006_payment_totals'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='paymentattempt',
+            name='shopify_pay_status_d26b2c_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='paymentattempt',
+            name='shopify_pay_payment_ef9ee4_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='paymentattempt',
+            name='shopify_pay_created_a2b0f9_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='shopifyorder',
+            name='shopify_sho_status_8c119e_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='shopifyorder',
+            name='shopify_sho_created_02d106_idx',
+        ),
+        migrations.AddIndex(
+            model_name='paymentattempt',
+            index=models.Index(fields=['-created_at', '-id'], name='shopify_pay_created_a907bb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paymentattempt',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='shopify_pay_status_3165c0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paymentattempt',
+            index=models.Index(fields=['payment_method', '-created_at', '-id'], name='shopify_pay_payment_c27552_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='paymentattempt',
+            index=models.Index(fields=['order', '-created_at', '-id'], name='shopify_pay_order_i_bf4730_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shopifyorder',
+            index=models.Index(fields=['-created_at', '-id'], name='shopify_sho_created_e76818_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shopifyorder',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='shopify_sho_status_76350f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shopifyorder',
+            index=models.Index(fields=['currency', '-created_at', '-id'], name='shopify_sho_currenc_85bde8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shopifyorder',
+            index=models.Index(fields=['customer_email', '-created_at', '-id'], name='shopify_sho_custome_06c9fa_idx'),
+        ),
+    ]
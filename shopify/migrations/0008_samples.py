@@ -0,0 +1,72 @@
+# Generated by Django 5.0 on 2026-10-18 13:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# A copy of label_engine.iter_samples as it was when this migration was
+# written, so later changes to that module cannot change what it does.
+# Rows saved before order_data was validated may be any shape; levels
+# that are not lists of objects are skipped.
+def _children(node, key):
+    items = node.get(key) if isinstance(node, dict) else None
+    if not isinstance(items, list):
+        return []
+    return [item for item in items if isinstance(item, dict)]
+
+
+def iter_samples(order_data):
+    for field in _children(order_data, 'fields'):
+        for crop in _children(field, 'crops'):
+            for cultivar in _children(crop, 'cultivars'):
+                sample_id = cultivar.get('sample_id')
+                if sample_id:
+                    yield (str(field.get('name', '')), str(crop.get('name', '')),
+                           str(cultivar.get('name', '')), str(sample_id))
+
+
+def backfill_samples(apps, schema_editor):
+    ShopifyOrder = apps.get_model('shopify', 'ShopifyOrder')
+    Sample = apps.get_model('shopify', 'Sample')
+    orders = ShopifyOrder.objects.only('id', 'order_data')
+    rows = []
+    for order in orders.iterator(chunk_size=500):
+        rows.extend(
+            Sample(order_id=order.id, position=position, field=field, crop=crop,
+                   cultivar=cultivar, sample_id=sample_id)
+            for position, (field, crop, cultivar, sample_id) in enumerate(iter_samples(order.order_data))
+        )
+        if len(rows) >= 5000:
+            Sample.objects.bulk_create(rows)
+            rows = []
+    Sample.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shopify', '0007_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sample',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('field', models.TextField()),
+                ('crop', models.TextField()),
+                ('cultivar', models.TextField()),
+                ('sample_id', models.CharField(db_index=True, max_length=255)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='samples', to='shopify.shopifyorder')),
+            ],
+            options={
+                'ordering': ['order', 'position'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='sample',
+            constraint=models.UniqueConstraint(fields=('order', 'position'), name='unique_sample_position'),
+        ),
+        migrations.RunPython(backfill_samples, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 13:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shopify', '0008_samples'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pdfrenderjob',
+            name='kind',
+            field=models.CharField(choices=[('ORDER', 'Order PDF'), ('BATCH', 'Batch labels PDF'), ('LABELS', 'Order labels PDF')], max_length=10),
+        ),
+    ]
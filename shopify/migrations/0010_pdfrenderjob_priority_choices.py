@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 14:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shopify', '0009_labels_job_kind'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pdfrenderjob',
+            name='priority',
+            field=models.SmallIntegerField(choices=[(0, 'Low'), (5, 'Normal'), (10, 'High')], default=5),
+        ),
+    ]
@@ -1,8 +1,42 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
 from decimal import Decimal
 from datetime import datetime
+from .services.label_engine import count_samples, estimate_pages, iter_samples, order_data_error
+from typing import Any, Dict, List, Optional
+
+class ShopifyOrderQuerySet(models.QuerySet):
+    def with_payment_summary(self):
+        """
+        Annotate payment state computed from the payments table in the
+        same query, for when the stored totals should not be trusted:
+        live_total_paid, live_payment_count, live_is_paid and
+        live_payment_status. The names differ from the stored columns,
+        which Django does not allow annotations to shadow.
+        """
+        completed = models.Q(payments__status='COMPLETED')
+        return self.annotate(
+            live_total_paid=Coalesce(
+                models.Sum('payments__amount', filter=completed),
+                models.Value(Decimal('0.00')),
+                output_field=models.DecimalField(max_digits=10, decimal_places=2),
+            ),
+            live_payment_count=models.Count('payments', filter=completed),
+        ).annotate(
+            live_is_paid=models.Case(
+                models.When(live_payment_count__gt=0, then=models.Value(True)),
+                default=models.Value(False),
+                output_field=models.BooleanField(),
+            ),
+            live_payment_status=models.Case(
+                models.When(live_total_paid__gte=models.F('amount'), then=models.Value('PAID')),
+                models.When(live_total_paid__gt=0, then=models.Value('PARTIALLY_PAID')),
+                default=models.Value('UNPAID'),
+                output_field=models.CharField(),
+            ),
+        )
 
 class ShopifyOrder(models.Model):
     ORDER_STATUS_CHOICES = [
@@ -15,6 +49,12 @@ class ShopifyOrder(models.Model):
 
     ALLOWED_CURRENCIES = ['USD', 'EUR', 'GBP', 'CAD', 'AUD']
 
+    PAYMENT_STATUS_CHOICES = [
+        ('UNPAID', 'Unpaid'),
+        ('PARTIALLY_PAID', 'Partially paid'),
+        ('PAID', 'Paid'),
+    ]
+
     order_reference = models.CharField(max_length=100, unique=True)
     amount = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(Decimal('0.01'))])
     currency = models.CharField(max_length=3)
@@ -24,13 +64,31 @@ class ShopifyOrder(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     order_data = models.JSONField(default=dict, blank=True)
+    # Render cost, computed from order_data on save so work can be routed
+    # without walking the JSON again
+    sample_count = models.PositiveIntegerField(default=0, editable=False)
+    estimated_pages = models.PositiveIntegerField(default=1, editable=False)
+    # Totals over completed payments, kept current by PaymentAttempt.save()
+    # and delete(); rebuild with manage.py payment_totals
+    total_paid = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'), editable=False)
+    payment_count = models.PositiveIntegerField(default=0, editable=False)
+    payment_status = models.CharField(max_length=20, choices=PAYMENT_STATUS_CHOICES, default='UNPAID', editable=False)
+
+    objects = ShopifyOrderQuerySet.as_manager()
+
+    # Written by refresh_payment_totals() alone, so a stale instance never
+    # saves them back over the totals of a payment made since it was loaded
+    PAYMENT_TOTAL_FIELDS = frozenset({'total_paid', 'payment_count', 'payment_status'})
 
     class Meta:
         ordering = ['-created_at']
+        # Composite indexes end in the API's page order, (-created_at, -id)
         indexes = [
             models.Index(fields=['order_reference']),
-            models.Index(fields=['status']),
-            models.Index(fields=['created_at']),
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['status', '-created_at', '-id']),
+            models.Index(fields=['currency', '-created_at', '-id']),
+            models.Index(fields=['customer_email', '-created_at', '-id']),
         ]
 
     def __str__(self):
@@ -39,28 +97,137 @@ class ShopifyOrder(models.Model):
     def clean(self):
         if self.currency not in self.ALLOWED_CURRENCIES:
             raise ValidationError({'currency': f'Currency must be one of {", ".join(self.ALLOWED_CURRENCIES)}'})
+        shape_error = order_data_error(self.order_data)
+        if shape_error:
+            raise ValidationError({'order_data': shape_error})
+        max_length = Sample._meta.get_field('sample_id').max_length
+        if any(len(sample.sample_id) > max_length for sample in iter_samples(self.order_data or {}, warn=False)):
+            raise ValidationError({'order_data': f'Sample IDs must be at most {max_length} characters'})
 
     def save(self, *args, **kwargs):
         self.full_clean()
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        touches_order_data = update_fields is None or 'order_data' in update_fields
+        if touches_order_data:
+            self.update_render_cost()
+            if update_fields is not None:
+                update_fields = {*update_fields, 'sample_count', 'estimated_pages'}
+        with transaction.atomic():
+            stored = None
+            if not self._state.adding and self.pk is not None and not kwargs.get('force_insert'):
+                if update_fields is None:
+                    update_fields = self._ordinary_fields()
+                if touches_order_data or 'amount' in update_fields:
+                    stored = self._lock_stored()
+                if 'amount' in update_fields:
+                    self.update_payment_status(stored)
+                    update_fields = {*update_fields, 'payment_status'}
+            if update_fields is not None:
+                kwargs['update_fields'] = update_fields
+            # Compared by the post_save signal as well as below
+            self._previous_order_data = stored['order_data'] if stored else None
+            super().save(*args, **kwargs)
+            if touches_order_data and (stored is None or stored['order_data'] != self.order_data):
+                self.rebuild_samples(replace=stored is not None)
 
-    @property
-    def is_paid(self):
-        return self.payments.filter(status='COMPLETED').exists()
+    def _ordinary_fields(self) -> set:
+        """What a full save of a loaded order writes: every loaded column but the payment totals"""
+        deferred = self.get_deferred_fields()
+        return {
+            field.name for field in self._meta.concrete_fields
+            if not field.primary_key and field.attname not in deferred
+            and field.name not in self.PAYMENT_TOTAL_FIELDS
+        }
 
-    @property
-    def total_paid(self):
-        return self.payments.filter(status='COMPLETED').aggregate(
-            total=models.Sum('amount'))['total'] or Decimal('0.00')
+    def _lock_stored(self) -> Optional[Dict[str, Any]]:
+        """
+        The stored order_data and payment totals, read under the row lock
+        refresh_payment_totals() takes, or None if the row is gone
+        """
+        return ShopifyOrder.objects.select_for_update().filter(pk=self.pk).values(
+            'order_data', 'total_paid', 'payment_count'
+        ).first()
+
+    def update_payment_status(self, stored: Optional[Dict[str, Any]] = None):
+        """
+        Restate payment_status for the current amount, from the totals in
+        stored when given, since they are what the payments last wrote
+        """
+        if stored is not None:
+            self.total_paid = stored['total_paid']
+            self.payment_count = stored['payment_count']
+        self.payment_status = self.payment_status_for(self.amount, self.total_paid)
+
+    def update_render_cost(self):
+        """Recount samples and label pages from order_data"""
+        self.sample_count = count_samples(self.order_data)
+        self.estimated_pages = estimate_pages(self.sample_count)
+
+    def build_samples(self) -> List['Sample']:
+        """Unsaved Sample rows for order_data, in label order"""
+        return [
+            Sample(order=self, position=position, field=sample.field, crop=sample.crop,
+                   cultivar=sample.cultivar, sample_id=sample.sample_id)
+            for position, sample in enumerate(iter_samples(self.order_data or {}, warn=False))
+        ]
+
+    def sync_samples(self, commit: bool = True) -> bool:
+        """
+        Rebuild the Sample rows from order_data if they no longer match it,
+        returning whether they differed. With commit=False only compare.
+        """
+        wanted = [
+            (sample.field, sample.crop, sample.cultivar, sample.sample_id)
+            for sample in iter_samples(self.order_data or {}, warn=False)
+        ]
+        if self.pk is None:
+            return bool(wanted)
+        stored = list(self.samples.values_list('field', 'crop', 'cultivar', 'sample_id'))
+        if stored == wanted:
+            return False
+        if commit:
+            self.rebuild_samples()
+        return True
+
+    def rebuild_samples(self, replace: bool = True):
+        """Write the Sample rows for order_data, first deleting any old ones when replace"""
+        with transaction.atomic():
+            if replace:
+                self.samples.all().delete()
+            Sample.objects.bulk_create(self.build_samples())
 
     @property
-    def payment_status(self):
-        if self.total_paid >= self.amount:
+    def is_paid(self):
+        return self.payment_count > 0
+
+    @staticmethod
+    def payment_status_for(amount, total_paid):
+        if total_paid >= amount:
             return 'PAID'
-        elif self.total_paid > 0:
+        elif total_paid > 0:
             return 'PARTIALLY_PAID'
         return 'UNPAID'
 
+    def refresh_payment_totals(self):
+        """
+        Recompute total_paid, payment_count and payment_status from the
+        completed payments. The order row is locked first, so concurrent
+        payments for one order update the totals one after another.
+        """
+        with transaction.atomic():
+            ShopifyOrder.objects.select_for_update().filter(pk=self.pk).values_list('pk', flat=True).first()
+            totals = self.payments.filter(status='COMPLETED').aggregate(
+                total=models.Sum('amount'), count=models.Count('id'))
+            self.total_paid = totals['total'] or Decimal('0.00')
+            self.payment_count = totals['count']
+            self.payment_status = self.payment_status_for(self.amount, self.total_paid)
+            # A queryset update, so neither validation nor the PDF signals run
+            ShopifyOrder.objects.filter(pk=self.pk).update(
+                total_paid=self.total_paid,
+                payment_count=self.payment_count,
+                payment_status=self.payment_status,
+            )
+
     def can_cancel(self):
         return self.status not in ['COMPLETED', 'CANCELLED', 'REFUNDED']
 
@@ -70,6 +237,29 @@ class ShopifyOrder(models.Model):
         self.status = 'CANCELLED'
         self.save()
 
+class Sample(models.Model):
+    """
+    One sample from an order's order_data, stored as a row so samples can
+    be looked up by ID without parsing every order's JSON. Derived data:
+    ShopifyOrder.save() rebuilds an order's rows when order_data changes.
+    """
+    order = models.ForeignKey(ShopifyOrder, on_delete=models.CASCADE, related_name='samples')
+    position = models.PositiveIntegerField()  # Label order within the order
+    field = models.TextField()
+    crop = models.TextField()
+    cultivar = models.TextField()
+    # db_index also gives PostgreSQL a pattern_ops index for prefix search
+    sample_id = models.CharField(max_length=255, db_index=True)
+
+    class Meta:
+        ordering = ['order', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['order', 'position'], name='unique_sample_position'),
+        ]
+
+    def __str__(self):
+        return f"{self.sample_id} ({self.order_id})"
+
 class PaymentAttempt(models.Model):
     PAYMENT_STATUS_CHOICES = [
         ('INITIATED', 'Initiated'),
@@ -92,9 +282,10 @@ class PaymentAttempt(models.Model):
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['status']),
-            models.Index(fields=['payment_method']),
-            models.Index(fields=['created_at']),
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['status', '-created_at', '-id']),
+            models.Index(fields=['payment_method', '-created_at', '-id']),
+            models.Index(fields=['order', '-created_at', '-id']),
         ]
 
     def __str__(self):
@@ -109,11 +300,19 @@ class PaymentAttempt(models.Model):
 
     def save(self, *args, **kwargs):
         self.full_clean()
-        if not self.pk:  # New payment attempt
-            if self.status == 'COMPLETED':
-                self.order.status = 'COMPLETED'
-                self.order.save()
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            if not self.pk:  # New payment attempt
+                if self.status == 'COMPLETED':
+                    self.order.status = 'COMPLETED'
+                    self.order.save()
+            super().save(*args, **kwargs)
+            self.order.refresh_payment_totals()
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            self.order.refresh_payment_totals()
+        return result
 
     def can_refund(self):
         return self.status == 'COMPLETED'
@@ -132,4 +331,88 @@ class PaymentAttempt(models.Model):
         # If this was the only payment and it's fully refunded
         if refund_amount == self.amount and not self.order.payments.exclude(id=self.id).exists():
             self.order.status = 'REFUNDED'
-            self.order.save()
\ No newline at end of file
+            self.order.save()
+
+class PDFRenderJob(models.Model):
+    """A PDF render queued for the background worker (manage.py run_pdf_worker)"""
+
+    KIND_ORDER = 'ORDER'
+    KIND_BATCH = 'BATCH'
+    KIND_LABELS = 'LABELS'
+    KIND_CHOICES = [
+        (KIND_ORDER, 'Order PDF'),
+        (KIND_BATCH, 'Batch labels PDF'),
+        (KIND_LABELS, 'Order labels PDF'),
+    ]
+
+    STATUS_QUEUED = 'QUEUED'
+    STATUS_RUNNING = 'RUNNING'
+    STATUS_COMPLETED = 'COMPLETED'
+    STATUS_FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    ACTIVE_STATUSES = [STATUS_QUEUED, STATUS_RUNNING]
+
+    # Small renders someone is waiting on, and large ones capped so they
+    # cannot occupy every worker
+    LANE_INTERACTIVE = 'INTERACTIVE'
+    LANE_BULK = 'BULK'
+    LANE_CHOICES = [
+        (LANE_INTERACTIVE, 'Interactive'),
+        (LANE_BULK, 'Bulk'),
+    ]
+    LANES = [LANE_INTERACTIVE, LANE_BULK]  # Claimed in this order
+
+    PRIORITY_LOW = 0
+    PRIORITY_NORMAL = 5
+    PRIORITY_HIGH = 10
+    PRIORITY_CHOICES = [
+        (PRIORITY_LOW, 'Low'),
+        (PRIORITY_NORMAL, 'Normal'),
+        (PRIORITY_HIGH, 'High'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    priority = models.SmallIntegerField(choices=PRIORITY_CHOICES, default=PRIORITY_NORMAL)  # Higher runs first
+    lane = models.CharField(max_length=12, choices=LANE_CHOICES, default=LANE_INTERACTIVE)
+    estimated_pages = models.PositiveIntegerField(default=1)
+    order_ids = models.JSONField(default=list)
+    # Identical requests share a key, and only one active job may hold it
+    dedupe_key = models.CharField(max_length=64)
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    artifact = models.CharField(max_length=255, blank=True)  # Name in the PDF storage
+    error_message = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', '-priority', 'created_at']),
+            models.Index(fields=['status', 'lane', '-priority', 'created_at']),
+            models.Index(fields=['dedupe_key']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedupe_key'],
+                condition=models.Q(status__in=['QUEUED', 'RUNNING']),
+                name='unique_active_pdf_render_job',
+            ),
+        ]
+
+    def __str__(self):
+        return f"PDF job {self.id} ({self.kind}, {self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_COMPLETED, self.STATUS_FAILED)
@@ -1,7 +1,12 @@
-from typing import List, Dict
-from PyPDF2 import PdfMerger
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional
+from django.conf import settings
+from reportlab.pdfgen import canvas
 import io
+from .label_engine import iter_samples
+from .label_printer import LabelCommandRenderer
 from .pdf_generator import PDFGenerator
+from .pdf_stream import StreamingPDFWriter
+from .render_pool import render_sample_labels_parallel
 from ..models import ShopifyOrder
 import logging
 
@@ -9,32 +14,201 @@ logger = logging.getLogger(__name__)
 
 class BatchPDFGenerator:
     """Handles generation of PDFs for multiple orders"""
+
+    # Every order drawn straight into one shared canvas; no merge step
+    MODE_CANVAS = 'canvas'
+    # Per-order PDFs rendered in the process pool, then merged
+    MODE_PARALLEL = 'parallel'
+    # Per-order PDFs rendered in this process, then merged
+    MODE_MERGE = 'merge'
+    # Per-order PDFs copied to the output as each one is rendered
+    MODE_STREAM = 'stream'
+    MODES = (MODE_CANVAS, MODE_PARALLEL, MODE_MERGE, MODE_STREAM)
+
+    # Orders whose order_data is loaded at a time while streaming
+    STREAM_CHUNK_SIZE = getattr(settings, 'PDF_BATCH_STREAM_CHUNK_SIZE', 50)
+
+    # Even with PDF_BATCH_MODE=parallel, smaller batches stay on one canvas;
+    # the pool round trip isn't worth it
+    PARALLEL_MIN_ORDERS = getattr(settings, 'PDF_BATCH_PARALLEL_MIN_ORDERS', 20)
     
-    def __init__(self):
+    def __init__(self, workers: Optional[int] = None, chunksize: Optional[int] = None):
         self.pdf_generator = PDFGenerator()
+        self.workers = workers or getattr(settings, 'PDF_BATCH_WORKERS', None)
+        self.chunksize = chunksize or getattr(settings, 'PDF_BATCH_CHUNKSIZE', 4)
 
-    def generate_batch_pdf(self, order_ids: List[int]) -> bytes:
+    def choose_mode(self, order_count: int) -> str:
+        """
+        Default mode: one canvas, which needs no merge step. The pool and
+        its merge are opt-in through PDF_BATCH_MODE, and even then only
+        used for batches of PARALLEL_MIN_ORDERS or more.
+        """
+        mode = getattr(settings, 'PDF_BATCH_MODE', None) or self.MODE_CANVAS
+        if mode == self.MODE_PARALLEL and (order_count < self.PARALLEL_MIN_ORDERS or (self.workers or 1) < 2):
+            return self.MODE_CANVAS
+        return mode
+
+    def generate_batch_pdf(self, order_ids: List[int], mode: Optional[str] = None) -> bytes:
         """
         Generates a single PDF containing labels for multiple orders
         """
-        merger = PdfMerger()
-        
+        output = io.BytesIO()
+        self.write_batch_pdf(order_ids, output, mode=mode)
+        return output.getvalue()
+
+    def write_batch_pdf(
+        self,
+        order_ids: List[int],
+        output: BinaryIO,
+        mode: Optional[str] = None
+    ) -> None:
+        """Render the batch PDF into a writable binary file object"""
         try:
-            for order_id in order_ids:
-                order = ShopifyOrder.objects.get(id=order_id)
-                pdf_data = self.pdf_generator.generate_sample_labels(order.order_data)
-                
-                # Add the PDF to the merger
-                pdf_buffer = io.BytesIO(pdf_data)
-                merger.append(pdf_buffer)
-            
-            # Create the final merged PDF
-            output = io.BytesIO()
-            merger.write(output)
-            merger.close()
-            
-            return output.getvalue()
+            mode = mode or self.choose_mode(len(order_ids))
+            if mode not in self.MODES:
+                raise ValueError(f"Unknown batch mode {mode!r}")
+
+            if mode == self.MODE_STREAM:
+                for chunk in self.stream_batch_pdf(order_ids):
+                    output.write(chunk)
+                return
+
+            orders = self.load_orders(order_ids)
+            if mode == self.MODE_CANVAS:
+                self.write_single_canvas(orders, output)
+            else:
+                documents = self.render_documents(
+                    [order.order_data for order in orders],
+                    parallel=mode == self.MODE_PARALLEL
+                )
+                self.merge_documents(
+                    documents,
+                    output,
+                    titles=[order.order_reference for order in orders]
+                )
             
         except Exception as e:
             logger.error(f"Error in batch PDF generation: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
+
+    @staticmethod
+    def load_orders(order_ids: List[int]) -> List[ShopifyOrder]:
+        """Fetch every order in one query, keeping the requested order"""
+        orders = ShopifyOrder.objects.only('id', 'order_reference', 'order_data').in_bulk(order_ids)
+        loaded = []
+        for order_id in order_ids:
+            order = orders.get(int(order_id))
+            if order is None:
+                raise ShopifyOrder.DoesNotExist(f"Order {order_id} does not exist")
+            loaded.append(order)
+        return loaded
+
+    def stream_batch_pdf(self, order_ids: List[int], parallel: bool = False) -> Iterator[bytes]:
+        """
+        Return an iterator over the batch PDF's bytes, suitable for a
+        StreamingHttpResponse. Every id is checked up front, so a missing
+        order fails before any bytes are sent.
+        """
+        return self._iter_batch_pdf(self.check_orders_exist(order_ids), parallel)
+
+    def stream_batch_labels(self, order_ids: List[int], renderer: LabelCommandRenderer) -> Iterator[bytes]:
+        """
+        Return an iterator over printer commands for the batch's labels,
+        rendered by renderer (ZPL or EPL). Checked up front like
+        stream_batch_pdf.
+        """
+        return renderer.render_orders(self._iter_order_data(self.check_orders_exist(order_ids)))
+
+    @staticmethod
+    def check_orders_exist(order_ids: List[int]) -> List[int]:
+        """order_ids as ints, raising DoesNotExist naming any that are missing"""
+        order_ids = [int(order_id) for order_id in order_ids]
+        existing = set(ShopifyOrder.objects.filter(id__in=order_ids).values_list('id', flat=True))
+        missing = [order_id for order_id in order_ids if order_id not in existing]
+        if missing:
+            raise ShopifyOrder.DoesNotExist(f"Orders {missing} do not exist")
+        return order_ids
+
+    def _iter_order_data(self, order_ids: List[int]) -> Iterator[Dict[str, Any]]:
+        # From order_data, like every other label path, one chunk at a time
+        for start in range(0, len(order_ids), self.STREAM_CHUNK_SIZE):
+            for order in self.load_orders(order_ids[start:start + self.STREAM_CHUNK_SIZE]):
+                yield order.order_data
+
+    def _iter_batch_pdf(self, order_ids: List[int], parallel: bool) -> Iterator[bytes]:
+        # Peak memory is one chunk of order_data plus one rendered order
+        buffer = io.BytesIO()
+        writer = StreamingPDFWriter(buffer)
+
+        for start in range(0, len(order_ids), self.STREAM_CHUNK_SIZE):
+            orders = self.load_orders(order_ids[start:start + self.STREAM_CHUNK_SIZE])
+            documents = self.render_documents(
+                [order.order_data for order in orders],
+                parallel=parallel
+            )
+            for order, pdf_data in zip(orders, documents):
+                writer.append(pdf_data, title=order.order_reference)
+                yield _drain(buffer)
+
+        writer.close()
+        yield _drain(buffer)
+
+    def write_single_canvas(self, orders: Iterable[ShopifyOrder], output: BinaryIO) -> None:
+        """
+        Draw every order's labels into one canvas. Each order starts on a
+        new page and gets a top-level bookmark, so the result needs no merge.
+        """
+        renderer = self.pdf_generator.label_renderer
+        c = canvas.Canvas(output, pagesize=renderer.layout.stock.page_size, invariant=1)
+        for position, order in enumerate(orders):
+            # By position, as an order may appear in the batch more than once
+            key = f"order-{position}"
+            c.bookmarkPage(key)
+            c.addOutlineEntry(order.order_reference, key, level=0)
+            samples = list(iter_samples(order.order_data))
+            renderer.prepare(samples)
+            renderer.render_samples(c, samples, order.order_data)
+        c.showOutline()
+        c.save()
+
+    def render_documents(
+        self,
+        order_data_list: List[Dict[str, Any]],
+        parallel: bool = False
+    ) -> Iterable[bytes]:
+        """
+        Render one labels PDF per order, in input order. Serial rendering
+        is lazy, so each document is produced only when it is consumed.
+        """
+        if parallel:
+            return render_sample_labels_parallel(
+                order_data_list,
+                workers=self.workers,
+                chunksize=self.chunksize
+            )
+        return (
+            self.pdf_generator.generate_sample_labels(order_data)
+            for order_data in order_data_list
+        )
+
+    @staticmethod
+    def merge_documents(
+        documents: Iterable[bytes],
+        output: BinaryIO,
+        titles: Optional[List[str]] = None
+    ) -> None:
+        """
+        Concatenate documents, writing resources they share (fonts, the
+        label chrome form) once rather than once per order
+        """
+        writer = StreamingPDFWriter(output)
+        for index, pdf_data in enumerate(documents):
+            writer.append(pdf_data, title=titles[index] if titles else None)
+        writer.close()
+
+def _drain(buffer: io.BytesIO) -> bytes:
+    """Return everything written to buffer so far and empty it"""
+    data = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return data
@@ -1,30 +1,106 @@
-from django.core.cache import cache
 from django.conf import settings
 import hashlib
-from typing import Optional
+import json
+import logging
+from typing import Any, Callable, Dict, Optional
+from .label_engine import DEFAULT_LABEL_STOCK, LABEL_TEMPLATE_VERSION
+from .tiered_cache import TieredPDFCache
+
+logger = logging.getLogger(__name__)
 
 class PDFCacheManager:
-    """Manages caching of generated PDFs"""
-    
-    CACHE_TIMEOUT = getattr(settings, 'PDF_CACHE_TIMEOUT', 3600)  # 1 hour default
-    
+    """
+    Manages caching of generated PDFs. Keys are derived from the content
+    being rendered and the template version, so an edited order gets a new
+    key immediately and orders with identical content share one entry.
+    """
+
+    # Keys change whenever the content does, so entries can live long
+    CACHE_TIMEOUT = getattr(settings, 'PDF_CACHE_TIMEOUT', 60 * 60 * 24 * 30)  # 30 days default
+    KEY_PREFIX = getattr(settings, 'PDF_CACHE_PREFIX', 'pdf_')
+    HITS_KEY = f"{KEY_PREFIX}stats_hits"
+    MISSES_KEY = f"{KEY_PREFIX}stats_misses"
+
+    def __init__(
+        self,
+        template_version: Optional[str] = None,
+        backend: Optional[TieredPDFCache] = None
+    ):
+        self.template_version = template_version or self.default_template_version()
+        self.backend = backend or TieredPDFCache()
+
+    @staticmethod
+    def default_template_version() -> str:
+        """The label layout the renderer currently produces"""
+        barcode = getattr(settings, 'PDF_LABEL_BARCODE', None) or 'text'
+        return f"{DEFAULT_LABEL_STOCK.name}-{LABEL_TEMPLATE_VERSION}-{barcode}"
+
     @staticmethod
-    def get_cache_key(order_id: int, template_version: str = '1.0') -> str:
+    def content_hash(order_data: Dict[str, Any]) -> str:
+        """Stable hash of order_data, independent of key order and whitespace"""
+        normalized = json.dumps(
+            order_data,
+            sort_keys=True,
+            separators=(',', ':'),
+            default=str
+        )
+        return hashlib.sha256(normalized.encode()).hexdigest()
+
+    def get_cache_key(self, order_data: Dict[str, Any], kind: str = 'labels') -> str:
         """Generate a unique cache key for the PDF"""
-        key = f"pdf_order_{order_id}_v{template_version}"
-        return hashlib.md5(key.encode()).hexdigest()
+        return f"{self.KEY_PREFIX}{kind}_{self.template_version}_{self.content_hash(order_data)}"
+
+    def etag(self, order_data: Dict[str, Any], kind: str = 'labels') -> str:
+        """Strong HTTP validator for the PDF rendered from order_data"""
+        return f'"{kind}-{self.template_version}-{self.content_hash(order_data)[:32]}"'
 
-    def get_pdf(self, order_id: int) -> Optional[bytes]:
+    def get_pdf(self, order_data: Dict[str, Any], kind: str = 'labels') -> Optional[bytes]:
         """Retrieve PDF from cache"""
-        cache_key = self.get_cache_key(order_id)
-        return cache.get(cache_key)
+        pdf_data = self.backend.get(self.get_cache_key(order_data, kind))
+        self.backend.incr(self.HITS_KEY if pdf_data is not None else self.MISSES_KEY)
+        return pdf_data
+
+    def has_pdf(self, order_data: Dict[str, Any], kind: str = 'labels') -> bool:
+        """Whether a rendered PDF is cached, without fetching it or counting a hit"""
+        return self.backend.contains(self.get_cache_key(order_data, kind))
 
-    def save_pdf(self, order_id: int, pdf_data: bytes) -> None:
+    def save_pdf(self, order_data: Dict[str, Any], pdf_data: bytes, kind: str = 'labels') -> None:
         """Save PDF to cache"""
-        cache_key = self.get_cache_key(order_id)
-        cache.set(cache_key, pdf_data, self.CACHE_TIMEOUT)
+        self.backend.set(self.get_cache_key(order_data, kind), pdf_data, self.CACHE_TIMEOUT)
 
-    def invalidate_pdf(self, order_id: int) -> None:
+    def get_or_render(
+        self,
+        order_data: Dict[str, Any],
+        render: Callable[[Dict[str, Any]], bytes],
+        kind: str = 'labels'
+    ) -> bytes:
+        """Return the cached PDF, rendering and caching it on a miss"""
+        pdf_data = self.get_pdf(order_data, kind)
+        if pdf_data is None:
+            pdf_data = render(order_data)
+            self.save_pdf(order_data, pdf_data, kind)
+        return pdf_data
+
+    def invalidate_pdf(self, order_data: Dict[str, Any], kind: str = 'labels') -> None:
         """Remove PDF from cache"""
-        cache_key = self.get_cache_key(order_id)
-        cache.delete(cache_key) 
\ No newline at end of file
+        self.backend.delete(self.get_cache_key(order_data, kind))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Overall hit and miss counters, shared by every process, plus a
+        breakdown per tier. Local tier figures cover this process only.
+        """
+        counters = self.backend.get_counters(self.HITS_KEY, self.MISSES_KEY)
+        hits = counters[self.HITS_KEY]
+        misses = counters[self.MISSES_KEY]
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / lookups, 4) if lookups else None,
+            'tiers': self.backend.stats(),
+        }
+
+    def reset_stats(self) -> None:
+        self.backend.delete_counters(self.HITS_KEY, self.MISSES_KEY)
+        self.backend.reset_stats()
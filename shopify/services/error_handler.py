@@ -1,7 +1,7 @@
 import logging
 from functools import wraps
 from typing import Callable, Any
-from django.http import HttpResponse, JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +15,9 @@ def handle_pdf_errors(func: Callable) -> Callable:
     def wrapper(*args, **kwargs) -> Any:
         try:
             return func(*args, **kwargs)
+        except Http404:
+            # A missing order is the caller's mistake, answered as a 404
+            raise
         except PDFGenerationError as e:
             logger.error(f"PDF Generation Error: {str(e)}", exc_info=True)
             return HttpResponse(
@@ -0,0 +1,369 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from typing import Any, Dict, Iterable, Iterator, NamedTuple, Optional, Sequence, Tuple
+import logging
+from .barcodes import draw_barcode, encode_barcode, encode_barcodes
+
+logger = logging.getLogger(__name__)
+
+class Sample(NamedTuple):
+    """One physical sample taken from an order's field/crop/cultivar tree"""
+    field: str
+    crop: str
+    cultivar: str
+    sample_id: str
+
+@dataclass(frozen=True)
+class LabelStock:
+    """Physical geometry of a sheet of labels"""
+    name: str
+    columns: int
+    rows: int
+    label_width: float
+    label_height: float
+    left_margin: float
+    top_margin: float
+    column_gap: float = 0
+    row_gap: float = 0
+    page_size: Tuple[float, float] = letter
+    padding: float = 0.08 * inch
+
+    @property
+    def labels_per_page(self) -> int:
+        return self.columns * self.rows
+
+# Avery 5160 / 8160 address labels, the lab's standard sample stock
+AVERY_5160 = LabelStock(
+    name='avery-5160',
+    columns=3,
+    rows=10,
+    label_width=2.625 * inch,
+    label_height=1 * inch,
+    left_margin=0.1875 * inch,
+    top_margin=0.5 * inch,
+    column_gap=0.125 * inch,
+)
+
+# Avery 5163 shipping labels for larger sample bags
+AVERY_5163 = LabelStock(
+    name='avery-5163',
+    columns=2,
+    rows=5,
+    label_width=4 * inch,
+    label_height=2 * inch,
+    left_margin=0.15625 * inch,
+    top_margin=0.5 * inch,
+    column_gap=0.1875 * inch,
+)
+
+LABEL_STOCKS = {stock.name: stock for stock in (AVERY_5160, AVERY_5163)}
+DEFAULT_LABEL_STOCK = AVERY_5160
+
+# Bump whenever the static chrome or the layout of the variable text changes
+LABEL_TEMPLATE_VERSION = '4'
+
+CAPTIONS = ('SAMPLE', 'CULTIVAR', 'CROP / FIELD')
+
+class TextLine(NamedTuple):
+    """A text baseline relative to the label's bottom-left corner"""
+    font_name: str
+    font_size: float
+    x: float
+    y: float
+
+@dataclass(frozen=True)
+class LabelLayout:
+    """
+    Precomputed grid for a label stock. Everything that depends only on
+    the stock (slot origins, baselines, usable text width) is calculated
+    once so rendering only has to place text.
+    """
+    stock: LabelStock
+    slots: Tuple[Tuple[float, float], ...]
+    sample_line: TextLine
+    cultivar_line: TextLine
+    detail_line: TextLine
+    caption_size: float
+    text_width: float
+    # x, y, width, height of the sample barcode, below the text lines
+    barcode_box: Tuple[float, float, float, float]
+
+    @classmethod
+    def for_stock(cls, stock: LabelStock) -> 'LabelLayout':
+        return _layout_for_stock(stock)
+
+@lru_cache(maxsize=None)
+def _layout_for_stock(stock: LabelStock) -> LabelLayout:
+    page_height = stock.page_size[1]
+    slots = []
+    for row in range(stock.rows):
+        y = page_height - stock.top_margin - (row + 1) * stock.label_height - row * stock.row_gap
+        for column in range(stock.columns):
+            x = stock.left_margin + column * (stock.label_width + stock.column_gap)
+            slots.append((x, y))
+
+    # Scale type with the label so larger stock stays readable
+    sample_size = round(stock.label_height * 0.2, 1)
+    body_size = round(stock.label_height * 0.12, 1)
+    caption_size = round(stock.label_height * 0.06, 1)
+    pad = stock.padding
+    top = stock.label_height - pad
+    caption_width = max(stringWidth(caption, 'Helvetica', caption_size) for caption in CAPTIONS)
+    text_width = stock.label_width - 2 * pad - caption_width - pad
+    detail_y = top - sample_size - body_size * 3.0
+    # Clear the detail line's descenders by a third of its size
+    barcode_height = detail_y - body_size * 0.3 - pad
+
+    return LabelLayout(
+        stock=stock,
+        slots=tuple(slots),
+        sample_line=TextLine('Helvetica-Bold', sample_size, pad, top - sample_size),
+        cultivar_line=TextLine('Helvetica', body_size, pad, top - sample_size - body_size * 1.6),
+        detail_line=TextLine('Helvetica', body_size, pad, detail_y),
+        caption_size=caption_size,
+        text_width=text_width,
+        barcode_box=(pad, pad, text_width, barcode_height),
+    )
+
+class LabelChrome:
+    """
+    The static parts of a label page: header, logo, label borders and
+    field captions. They are compiled into one form XObject per document
+    and each page only references it, so page content and file size grow
+    with the sample data alone.
+    """
+
+    def __init__(self, layout: LabelLayout, version: str = LABEL_TEMPLATE_VERSION):
+        self.layout = layout
+        self.version = version
+        self.form_name = f"LabelChrome_{layout.stock.name.replace('-', '_')}_v{version}"
+
+    def place(self, c) -> None:
+        """Reference the chrome form on the current page, compiling it on first use"""
+        if not c.hasForm(self.form_name):
+            c.beginForm(self.form_name)
+            self.draw(c)
+            c.endForm()
+        c.doForm(self.form_name)
+
+    def draw(self, c) -> None:
+        """Draw the chrome directly into the current page or form"""
+        layout = self.layout
+        stock = layout.stock
+        page_width, page_height = stock.page_size
+
+        # Header with the Apical mark
+        header_y = page_height - stock.top_margin / 2
+        c.setFillColor(colors.darkgreen)
+        c.circle(stock.left_margin + 7, header_y, 7, stroke=0, fill=1)
+        c.setFillColor(colors.white)
+        c.setFont('Helvetica-Bold', 9)
+        c.drawCentredString(stock.left_margin + 7, header_y - 3, 'A')
+        c.setFillColor(colors.black)
+        c.setFont('Helvetica-Bold', 10)
+        c.drawString(stock.left_margin + 18, header_y - 3.5, 'Apical Ag - Sample Labels')
+        c.setStrokeColor(colors.darkgreen)
+        c.setLineWidth(0.5)
+        c.line(stock.left_margin, header_y - 9, page_width - stock.left_margin, header_y - 9)
+
+        # Label borders and captions
+        c.setStrokeColor(colors.lightgrey)
+        c.setLineWidth(0.25)
+        c.setFillColor(colors.grey)
+        c.setFont('Helvetica', layout.caption_size)
+        caption_x = stock.label_width - stock.padding
+        lines = (layout.sample_line, layout.cultivar_line, layout.detail_line)
+        for x, y in layout.slots:
+            c.roundRect(x, y, stock.label_width, stock.label_height, 4, stroke=1, fill=0)
+            for line, caption in zip(lines, CAPTIONS):
+                c.drawRightString(x + caption_x, y + line.y, caption)
+        c.setFillColor(colors.black)
+
+@lru_cache(maxsize=None)
+def get_label_chrome(stock: LabelStock, version: str = LABEL_TEMPLATE_VERSION) -> LabelChrome:
+    """Compiled chrome is shared by every render of the same stock and template version"""
+    return LabelChrome(LabelLayout.for_stock(stock), version)
+
+@lru_cache(maxsize=8192)
+def fit_text(text: str, font_name: str, font_size: float, max_width: float) -> str:
+    """
+    Truncate text with an ellipsis so it fits max_width. Field, crop and
+    cultivar names repeat across thousands of labels, so results are cached
+    rather than re-measured per label.
+    """
+    if stringWidth(text, font_name, font_size) <= max_width:
+        return text
+
+    ellipsis = '...'
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if stringWidth(text[:middle] + ellipsis, font_name, font_size) <= max_width:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low] + ellipsis
+
+# Nesting of order_data walked by iter_samples, outermost first
+ORDER_DATA_LEVELS = ('fields', 'crops', 'cultivars')
+
+def order_data_error(order_data: Any) -> Optional[str]:
+    """
+    Why order_data does not have the fields -> crops -> cultivars shape
+    iter_samples walks, or None when it does. Missing or empty levels
+    are allowed.
+    """
+    if not order_data:
+        return None
+    if not isinstance(order_data, dict):
+        return 'Order data must be a JSON object'
+
+    # (node, depth, path) for every object whose child list is still unchecked
+    pending = [(order_data, 0, '')]
+    while pending:
+        node, depth, path = pending.pop()
+        level = ORDER_DATA_LEVELS[depth]
+        items = node.get(level)
+        if not items:
+            continue
+        path = f"{path}.{level}" if path else level
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            return f"{path} must be a list of objects"
+        if depth + 1 < len(ORDER_DATA_LEVELS):
+            pending.extend(
+                (item, depth + 1, f"{path}[{index}]") for index, item in reversed(list(enumerate(items)))
+            )
+    return None
+
+def iter_samples(order_data: Dict[str, Any], warn: bool = True) -> Iterator[Sample]:
+    """Walk fields -> crops -> cultivars, yielding one Sample per sample_id"""
+    for field in order_data.get('fields') or []:
+        field_name = str(field.get('name', ''))
+        for crop in field.get('crops') or []:
+            crop_name = str(crop.get('name', ''))
+            for cultivar in crop.get('cultivars') or []:
+                sample_id = cultivar.get('sample_id')
+                if not sample_id:
+                    if warn:
+                        logger.warning(
+                            f"Skipping cultivar without sample_id in field {field_name!r}"
+                        )
+                    continue
+                yield Sample(field_name, crop_name, str(cultivar.get('name', '')), str(sample_id))
+
+def count_samples(order_data: Optional[Dict[str, Any]]) -> int:
+    """Number of labels iter_samples yields for order_data, without logging skips"""
+    return sum(
+        1
+        for field in (order_data or {}).get('fields') or []
+        for crop in field.get('crops') or []
+        for cultivar in crop.get('cultivars') or []
+        if cultivar.get('sample_id')
+    )
+
+def estimate_pages(sample_count: int, stock: Optional[LabelStock] = None) -> int:
+    """Label pages for sample_count samples; an empty order still gets one page"""
+    per_page = (stock or DEFAULT_LABEL_STOCK).labels_per_page
+    return max(1, -(-sample_count // per_page))
+
+class LabelRenderer:
+    """
+    Draws sample labels onto a reportlab canvas in a single pass over the
+    order, tracking only the current page's slot index. The canvas itself
+    keeps every finished page until save(), so a document's memory still
+    grows with its sample count; PDFGenerator bounds it by rendering long
+    orders in page windows.
+    """
+
+    def __init__(
+        self,
+        stock: Optional[LabelStock] = None,
+        use_forms: bool = True,
+        barcode: Optional[str] = None
+    ):
+        stock = stock or DEFAULT_LABEL_STOCK
+        self.layout = LabelLayout.for_stock(stock)
+        self.chrome = get_label_chrome(stock)
+        self.use_forms = use_forms
+        # Symbology drawn under each label's text, or None for text only
+        self.barcode = barcode
+
+    def prepare(self, samples: Sequence[Sample]) -> None:
+        """Encode the barcodes for samples up front, one pass over distinct ids"""
+        if self.barcode:
+            encode_barcodes((sample.sample_id for sample in samples), self.barcode)
+
+    def render(self, c, order_data: Dict[str, Any]) -> int:
+        """
+        Draw every sample label in order_data onto the canvas, finishing
+        with a completed page. Returns the number of labels drawn.
+        """
+        if order_data is None:
+            raise ValueError('order_data is required to render sample labels')
+        return self.render_samples(c, iter_samples(order_data), order_data)
+
+    def render_samples(self, c, samples: Iterable[Sample], order_data: Dict[str, Any]) -> int:
+        """
+        Draw labels for samples, which may be any slice of an order's
+        samples that starts on a page boundary. order_data is only used
+        for the empty-state page.
+        """
+        layout = self.layout
+        slots = layout.slots
+        per_page = len(slots)
+        count = 0
+        text = None
+
+        for sample in samples:
+            slot = count % per_page
+            if slot == 0:
+                if text is not None:
+                    c.drawText(text)
+                    c.showPage()
+                self._start_page(c)
+                text = c.beginText()
+            self._draw_label(text, slots[slot], sample)
+            if self.barcode:
+                self._draw_barcode(c, slots[slot], sample)
+            count += 1
+
+        if text is None:
+            self._draw_empty_page(c, order_data)
+        else:
+            c.drawText(text)
+        c.showPage()
+        return count
+
+    def _start_page(self, c) -> None:
+        if self.use_forms:
+            self.chrome.place(c)
+        else:
+            self.chrome.draw(c)
+
+    def _draw_label(self, text, origin: Tuple[float, float], sample: Sample) -> None:
+        layout = self.layout
+        x, y = origin
+        width = layout.text_width
+        for line, value in (
+            (layout.sample_line, sample.sample_id),
+            (layout.cultivar_line, sample.cultivar),
+            (layout.detail_line, f"{sample.crop} / {sample.field}"),
+        ):
+            text.setFont(line.font_name, line.font_size)
+            text.setTextOrigin(x + line.x, y + line.y)
+            text.textOut(fit_text(value, line.font_name, line.font_size, width))
+
+    def _draw_barcode(self, c, origin: Tuple[float, float], sample: Sample) -> None:
+        x, y = origin
+        box_x, box_y, width, height = self.layout.barcode_box
+        draw_barcode(c, encode_barcode(sample.sample_id, self.barcode), x + box_x, y + box_y, width, height)
+
+    def _draw_empty_page(self, c, order_data: Dict[str, Any]) -> None:
+        _, height = self.layout.stock.page_size
+        c.setFont('Helvetica', 12)
+        reference = order_data.get('order_reference', '')
+        c.drawString(50, height - 50, f"No samples found for order {reference}".rstrip())
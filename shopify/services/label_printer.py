@@ -0,0 +1,247 @@
+from django.conf import settings
+from typing import Any, Dict, Iterable, Iterator, Optional
+from .barcodes import SYMBOLOGY_CODE128, SYMBOLOGY_QR, code128_encodable
+from .error_handler import PDFGenerationError
+from .label_engine import (
+    CAPTIONS,
+    DEFAULT_LABEL_STOCK,
+    LabelLayout,
+    LabelStock,
+    Sample,
+    TextLine,
+    fit_text,
+    iter_samples,
+)
+
+class LabelCommandRenderer:
+    """
+    Renders sample labels as thermal printer commands instead of PDF.
+    Each sample is one label on the roll, laid out with the same geometry
+    as the PDF sheet label, and the printer draws text and barcodes
+    itself, so output is a few hundred bytes per label at most.
+    """
+    format = None
+    content_type = 'text/plain'
+    encoding = 'utf-8'
+    # Dots per inch of the target printer; 203 and 300 are the common heads
+    DPI = getattr(settings, 'LABEL_PRINTER_DPI', 203)
+    # Same symbology as the PDF labels, so scanners read both alike
+    BARCODE = getattr(settings, 'PDF_LABEL_BARCODE', None)
+
+    def __init__(
+        self,
+        stock: Optional[LabelStock] = None,
+        barcode: Optional[str] = None,
+        dpi: Optional[int] = None
+    ):
+        self.layout = LabelLayout.for_stock(stock or DEFAULT_LABEL_STOCK)
+        self.barcode = barcode or self.BARCODE
+        self.dpi = dpi or self.DPI
+
+    def dots(self, points: float) -> int:
+        """Convert a layout measurement in points to printer dots"""
+        return round(points * self.dpi / 72)
+
+    def top(self, y: float, height: float) -> int:
+        """Printer y of a box's top edge; layouts measure up from the bottom"""
+        return self.dots(self.layout.stock.label_height - y - height)
+
+    def header(self) -> str:
+        """Commands sent once per job, before any label"""
+        return ''
+
+    def label(self, sample: Sample) -> str:
+        raise NotImplementedError
+
+    def fitted(self, sample: Sample):
+        """The three text values of a label, truncated as on the PDF"""
+        layout = self.layout
+        for line, value in (
+            (layout.sample_line, sample.sample_id),
+            (layout.cultivar_line, sample.cultivar),
+            (layout.detail_line, f"{sample.crop} / {sample.field}"),
+        ):
+            yield line, fit_text(value, line.font_name, line.font_size, layout.text_width)
+
+    def render(self, order_data: Dict[str, Any]) -> bytes:
+        """Commands printing every sample label in order_data"""
+        if order_data is None:
+            raise ValueError('order_data is required to render sample labels')
+        return b''.join(self.render_orders([order_data]))
+
+    def render_samples(self, samples: Iterable[Sample]) -> bytes:
+        """Commands printing a label for each of samples"""
+        return b''.join(self.render_sample_lists([samples]))
+
+    def render_orders(self, order_data_list: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+        """Yield one job's commands: the header, then each order's labels"""
+        return self.render_sample_lists(iter_samples(order_data) for order_data in order_data_list)
+
+    def render_sample_lists(self, sample_lists: Iterable[Iterable[Sample]]) -> Iterator[bytes]:
+        """render_orders for samples already extracted, one iterable per order"""
+        yield self.header().encode(self.encoding)
+        for samples in sample_lists:
+            labels = ''.join(self.label(sample) for sample in samples)
+            yield labels.encode(self.encoding, errors='replace')
+
+class ZPLRenderer(LabelCommandRenderer):
+    """
+    Zebra ZPL II. The label layout, captions included, is stored on the
+    printer as a format once per job; each label then only recalls it
+    with its own field data.
+    """
+    format = 'zpl'
+    content_type = 'application/x-zpl'
+    FORMAT_NAME = 'R:APSAMPLE.ZPL'
+
+    def header(self) -> str:
+        layout = self.layout
+        stock = layout.stock
+        caption_height = self.dots(layout.caption_size)
+        caption_right = self.dots(stock.label_width - stock.padding)
+        commands = [
+            f"^XA^CI28^PW{self.dots(stock.label_width)}^LL{self.dots(stock.label_height)}",
+            f"^DF{self.FORMAT_NAME}^FS",
+        ]
+        lines = (layout.sample_line, layout.cultivar_line, layout.detail_line)
+        for number, line in enumerate(lines, 1):
+            height = self.dots(line.font_size)
+            commands.append(
+                f"^FT{self.dots(line.x)},{self.top(line.y, 0)}^A0N,{height},{height}^FN{number}^FS"
+            )
+        for line, caption in zip(lines, CAPTIONS):
+            commands.append(
+                f"^FO0,{self.top(line.y, layout.caption_size)}"
+                f"^A0N,{caption_height},{caption_height}"
+                f"^FB{caption_right},1,0,R^FD{caption}^FS"
+            )
+        if self.barcode:
+            commands.append(self._barcode_field())
+        commands.append('^XZ\n')
+        return ''.join(commands)
+
+    def _barcode_origin(self) -> str:
+        box_x, box_y, _, box_height = self.layout.barcode_box
+        return f"^FO{self.dots(box_x)},{self.top(box_y, box_height)}"
+
+    def _qr_command(self) -> str:
+        # Sized so a version 2 code (25 modules) fills the box height
+        magnification = max(1, min(10, self.dots(self.layout.barcode_box[3]) // 25))
+        return f"^BQN,2,{magnification}"
+
+    def _barcode_field(self) -> str:
+        origin = self._barcode_origin()
+        if self.barcode == SYMBOLOGY_CODE128:
+            # Narrow bars of about 0.25mm, whatever the print head
+            module = max(1, round(self.dpi / 100))
+            return f"{origin}^BY{module}^BCN,{self.dots(self.layout.barcode_box[3])},N,N,N^FN4^FS"
+        if self.barcode == SYMBOLOGY_QR:
+            return f"{origin}{self._qr_command()}^FN4^FS"
+        raise ValueError(f"Unknown barcode symbology {self.barcode!r}")
+
+    def label(self, sample: Sample) -> str:
+        fields = [
+            _zpl_field(number, value)
+            for number, (_, value) in enumerate(self.fitted(sample), 1)
+        ]
+        if self.barcode == SYMBOLOGY_CODE128 and not code128_encodable(sample.sample_id):
+            # Code 128 would drop characters, so this ID is printed as a QR
+            # code in place of the format's empty barcode field, as on the PDF
+            fields.append(
+                f"{self._barcode_origin()}{self._qr_command()}{_zpl_data(sample.sample_id, 'MA,')}"
+            )
+        elif self.barcode:
+            # QR field data starts with the error correction level and input mode
+            prefix = 'MA,' if self.barcode == SYMBOLOGY_QR else ''
+            fields.append(_zpl_field(4, sample.sample_id, prefix))
+        return f"^XA^XF{self.FORMAT_NAME}^FS{''.join(fields)}^XZ\n"
+
+ZPL_SPECIAL = str.maketrans({'_': '_5F', '^': '_5E', '~': '_7E'})
+
+def _zpl_data(value: str, prefix: str = '') -> str:
+    """Field data, hex-escaped only when it contains ZPL control characters"""
+    escaped = value.translate(ZPL_SPECIAL)
+    if escaped == value:
+        return f"^FD{prefix}{value}^FS"
+    return f"^FH^FD{prefix}{escaped}^FS"
+
+def _zpl_field(number: int, value: str, prefix: str = '') -> str:
+    """Field data for ^FN number"""
+    return f"^FN{number}{_zpl_data(value, prefix)}"
+
+# EPL2 resident fonts: number -> (width, height) in dots at 203 dpi
+EPL_FONTS = {1: (8, 12), 2: (10, 16), 3: (12, 20), 4: (14, 24), 5: (32, 48)}
+
+class EPLRenderer(LabelCommandRenderer):
+    """
+    Eltron/Zebra EPL2 for older desktop printers. EPL only has fixed
+    bitmap fonts, so each line uses the largest font that fits its height
+    and is truncated by character count. Barcodes are Code 128 only.
+    """
+    format = 'epl'
+    content_type = 'application/x-epl'
+    encoding = 'latin-1'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.barcode and self.barcode != SYMBOLOGY_CODE128:
+            raise ValueError(f"EPL labels support code128 barcodes, not {self.barcode!r}")
+        # EPL font sizes are dots at 203 dpi and scale with the head
+        self.scale = self.dpi / 203
+        layout = self.layout
+        self.fonts = [
+            self._font_for(line)
+            for line in (layout.sample_line, layout.cultivar_line, layout.detail_line)
+        ]
+
+    def _font_for(self, line: TextLine):
+        target = self.dots(line.font_size)
+        fitting = [
+            number for number, (_, height) in EPL_FONTS.items()
+            if height * self.scale <= target
+        ]
+        number = max(fitting, key=lambda n: EPL_FONTS[n][1]) if fitting else 1
+        width, height = (round(size * self.scale) for size in EPL_FONTS[number])
+        # Resident fonts add a two dot gap between characters
+        max_chars = max(1, self.dots(self.layout.text_width) // (width + 2))
+        return number, height, max_chars
+
+    def header(self) -> str:
+        stock = self.layout.stock
+        return f"\nq{self.dots(stock.label_width)}\nQ{self.dots(stock.label_height)},24\n"
+
+    def label(self, sample: Sample) -> str:
+        commands = ['N']
+        for (line, value), (font, height, max_chars) in zip(self.fitted(sample), self.fonts):
+            if len(value) > max_chars:
+                value = value[:max_chars - 3] + '...'
+            commands.append(
+                f'A{self.dots(line.x)},{self.top(line.y, 0) - height},0,{font},1,1,N,"{_epl_escape(value)}"'
+            )
+        if self.barcode:
+            if not code128_encodable(sample.sample_id):
+                # The Latin-1 job would print '?' in its place, scanning as another ID
+                raise PDFGenerationError(
+                    f"Sample ID {sample.sample_id!r} cannot be printed as an EPL Code 128 barcode"
+                )
+            box_x, box_y, _, box_height = self.layout.barcode_box
+            module = max(1, round(self.dpi / 100))
+            commands.append(
+                f'B{self.dots(box_x)},{self.top(box_y, box_height)},0,1,{module},{module},'
+                f'{self.dots(box_height)},N,"{_epl_escape(sample.sample_id)}"'
+            )
+        commands.append('P1\n')
+        return '\n'.join(commands)
+
+def _epl_escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+PRINTER_FORMATS = {renderer.format: renderer for renderer in (ZPLRenderer, EPLRenderer)}
+
+def get_printer_renderer(format: str, **kwargs) -> LabelCommandRenderer:
+    """Renderer for a printer command format, raising ValueError if unknown"""
+    try:
+        renderer = PRINTER_FORMATS[format]
+    except KeyError:
+        raise ValueError(f"Unknown label format {format!r}")
+    return renderer(**kwargs)
@@ -0,0 +1,166 @@
+from dataclasses import dataclass, field
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+import json
+import logging
+from ..models import Sample, ShopifyOrder
+
+logger = logging.getLogger(__name__)
+
+# Fields an imported order may set; the rest are computed or defaulted
+IMPORT_FIELDS = (
+    'order_reference', 'amount', 'currency', 'customer_email',
+    'customer_name', 'status', 'order_data',
+)
+
+class RowError(Exception):
+    """A row that could not be read, reported against its row number"""
+
+@dataclass
+class ImportReport:
+    created: int = 0
+    failed: int = 0
+    # Per-row errors, capped at max_errors so a bad file cannot bloat the report
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    max_errors: int = 1000
+
+    def add_error(self, row: int, reference: Any, errors: Dict[str, List[str]]) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'row': row, 'order_reference': reference, 'errors': errors})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+def iter_ndjson(lines: Iterable[Union[bytes, str]]) -> Iterator[Tuple[int, Any]]:
+    """
+    Yield (line number, parsed value) for each non-blank line. Lines that
+    are not valid JSON yield a RowError instead of stopping the import.
+    """
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError as e:
+            yield number, RowError(f"Invalid JSON: {e}")
+
+class OrderImporter:
+    """
+    Creates orders in bulk. Each chunk of rows is validated in memory,
+    checked against existing order references with one query and
+    inserted with a single bulk_create, instead of the uniqueness query
+    and INSERT per order that ShopifyOrder.save() costs.
+
+    bulk_create skips save() and the post_save signals, so imported
+    orders are not pre-rendered into the PDF cache. Their Sample rows
+    are bulk inserted alongside them.
+    """
+
+    CHUNK_SIZE = getattr(settings, 'ORDER_IMPORT_CHUNK_SIZE', 1000)
+    MAX_ERRORS = getattr(settings, 'ORDER_IMPORT_MAX_ERRORS', 1000)
+
+    def __init__(self, chunk_size: Optional[int] = None):
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
+
+    def import_rows(self, rows: Iterable[Tuple[int, Any]]) -> ImportReport:
+        """
+        Import numbered rows, each an order dict or a RowError. Rows are
+        consumed a chunk at a time, so rows may be a lazy stream.
+        """
+        report = ImportReport(max_errors=self.MAX_ERRORS)
+        # References accepted so far, to catch duplicates across chunks
+        seen: Set[str] = set()
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                self._import_chunk(chunk, seen, report)
+                chunk = []
+        if chunk:
+            self._import_chunk(chunk, seen, report)
+        return report
+
+    def _import_chunk(self, rows: List[Tuple[int, Any]], seen: Set[str], report: ImportReport) -> None:
+        candidates = []
+        for number, row in rows:
+            try:
+                order = self.build_order(row)
+            except RowError as e:
+                report.add_error(number, _reference(row), {'__all__': [str(e)]})
+            except ValidationError as e:
+                report.add_error(number, _reference(row), e.message_dict)
+            else:
+                candidates.append((number, order))
+
+        references = {order.order_reference for _, order in candidates}
+        existing = set(
+            ShopifyOrder.objects.filter(order_reference__in=references).values_list('order_reference', flat=True)
+        )
+        accepted = []
+        for number, order in candidates:
+            reference = order.order_reference
+            if reference in existing or reference in seen:
+                report.add_error(number, reference, {
+                    'order_reference': ['Shopify order with this Order reference already exists.']
+                })
+                continue
+            seen.add(reference)
+            accepted.append((number, order))
+
+        report.created += self._insert(accepted, report)
+
+    @staticmethod
+    def build_order(row: Any) -> ShopifyOrder:
+        """A validated, unsaved order for row, raising RowError or ValidationError"""
+        if isinstance(row, RowError):
+            raise row
+        if not isinstance(row, dict):
+            raise RowError('Each order must be a JSON object')
+        unknown = set(row) - set(IMPORT_FIELDS)
+        if unknown:
+            raise RowError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+        order = ShopifyOrder(**row)
+        # Uniqueness is checked for the whole chunk at once by the caller
+        order.full_clean(validate_unique=False)
+        order.update_render_cost()
+        return order
+
+    def _insert(self, accepted: List[Tuple[int, ShopifyOrder]], report: ImportReport) -> int:
+        if not accepted:
+            return 0
+        try:
+            with transaction.atomic():
+                orders = ShopifyOrder.objects.bulk_create([order for _, order in accepted], batch_size=self.chunk_size)
+                self._insert_samples(orders)
+            return len(accepted)
+        except IntegrityError:
+            # A concurrent request created one of these references after
+            # the lookup; insert one by one so only the clashes fail
+            logger.warning('Bulk order insert conflicted, retrying row by row')
+
+        created = 0
+        for number, order in accepted:
+            try:
+                with transaction.atomic():
+                    self._insert_samples(ShopifyOrder.objects.bulk_create([order]))
+                created += 1
+            except IntegrityError as e:
+                report.add_error(number, order.order_reference, {'__all__': [str(e)]})
+        return created
+
+    def _insert_samples(self, orders: List[ShopifyOrder]) -> None:
+        # bulk_create has set the orders' primary keys by now
+        samples = [sample for order in orders for sample in order.build_samples()]
+        Sample.objects.bulk_create(samples, batch_size=self.chunk_size)
+
+def _reference(row: Any) -> Any:
+    return row.get('order_reference') if isinstance(row, dict) else None
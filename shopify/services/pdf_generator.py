@@ -1,229 +1,149 @@
-"""
-Django settings for ApicalShopify project.
-
-Generated by 'django-admin startproject' using Django 5.1.4.
-
-For more information on this file, see
-https://docs.djangoproject.com/en/5.1/topics/settings/
-
-For the full list of settings and their values, see
-https://docs.djangoproject.com/en/5.1/ref/settings/
-"""
-
-from pathlib import Path
-import os
-from dotenv import load_dotenv
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Build paths inside the project like this: BASE_DIR / 'subdir'.
-BASE_DIR = Path(__file__).resolve().parent.parent
-
-
-# Quick-start development settings - unsuitable for production
-# See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
-
-# SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-*puip0ps$*)g%@^^yb3b$(%i%m8((af5)xe$2cuoykl654_%=$'
-
-# SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
-
-ALLOWED_HOSTS = []
-
-
-# Application definition
-
-INSTALLED_APPS = [
-    'django.contrib.admin',
-    'django.contrib.auth',
-    'django.contrib.contenttypes',
-    'django.contrib.sessions',
-    'django.contrib.messages',
-    'django.contrib.staticfiles',
-    'shopify',  # Our Shopify app
-]
-
-MIDDLEWARE = [
-    'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
-    'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
-]
-
-ROOT_URLCONF = 'ApicalShopify.urls'
-
-TEMPLATES = [
-    {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [os.path.join(BASE_DIR, 'shopify', 'templates')],
-        'APP_DIRS': True,
-        'OPTIONS': {
-            'context_processors': [
-                'django.template.context_processors.debug',
-                'django.template.context_processors.request',
-                'django.contrib.auth.context_processors.auth',
-                'django.contrib.messages.context_processors.messages',
-            ],
-        },
-    },
-]
-
-WSGI_APPLICATION = 'ApicalShopify.wsgi.application'
-
-
-# Database
-# https://docs.djangoproject.com/en/5.1/ref/settings/#databases
-
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
-
-
-# Password validation
-# https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
-
-AUTH_PASSWORD_VALIDATORS = [
-    {
-        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
-    },
-]
-
-
-# Internationalization
-# https://docs.djangoproject.com/en/5.1/topics/i18n/
-
-LANGUAGE_CODE = 'en-us'
-
-TIME_ZONE = 'UTC'
-
-USE_I18N = True
-
-USE_TZ = True
-
-
-# Static files (CSS, JavaScript, Images)
-# https://docs.djangoproject.com/en/5.1/howto/static-files/
-
-STATIC_URL = 'static/'
-
-# Default primary key field type
-# https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
-
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
-
-# Shopify Settings
-SHOPIFY_SETTINGS = {
-    'SHOP_NAME': os.getenv('SHOPIFY_SHOP_NAME', ''),
-    'ACCESS_TOKEN': os.getenv('SHOPIFY_ACCESS_TOKEN', ''),
-    'API_SECRET': os.getenv('SHOPIFY_API_SECRET', ''),
-    'API_VERSION': '2024-01',
-}
-
-# Cache Configuration
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
-    }
-}
-
-# PDF Settings
-PDF_CACHE_TIMEOUT = 3600  # 1 hour
-PDF_CACHE_PREFIX = 'pdf_'
-
-# Email Configuration
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
-EMAIL_HOST = os.getenv('EMAIL_HOST', 'smtp.gmail.com')
-EMAIL_PORT = int(os.getenv('EMAIL_PORT', 587))
-EMAIL_USE_TLS = True
-EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
-EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
-DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'your@email.com')
-
-# Media files
-MEDIA_URL = '/media/'
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
-
-# Logging Configuration
-LOGGING = {
-    'version': 1,
-    'disable_existing_loggers': False,
-    'formatters': {
-        'verbose': {
-            'format': '{levelname} {asctime} {module} {message}',
-            'style': '{',
-        },
-    },
-    'handlers': {
-        'file': {
-            'level': 'ERROR',
-            'class': 'logging.FileHandler',
-            'filename': os.path.join(BASE_DIR, 'logs', 'debug.log'),
-            'formatter': 'verbose',
-        },
-        'console': {
-            'level': 'DEBUG',
-            'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
-        },
-    },
-    'loggers': {
-        'shopify': {
-            'handlers': ['file', 'console'],
-            'level': 'DEBUG',
-            'propagate': True,
-        },
-    },
-}
-
-# Ensure the logs directory exists
-LOGS_DIR = os.path.join(BASE_DIR, 'logs')
-if not os.path.exists(LOGS_DIR):
-    os.makedirs(LOGS_DIR)
+from django.conf import settings
+from itertools import chain, islice
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional
+import io
+import tempfile
+from .label_engine import LabelRenderer, LabelStock, Sample, iter_samples
+from .pdf_stream import StreamingPDFWriter
 
 class PDFGenerator:
-    def __init__(self):
+    # reportlab holds every page of a canvas until save(), so orders longer
+    # than this many pages are rendered a window at a time and concatenated
+    PAGE_WINDOW = getattr(settings, 'PDF_LABEL_PAGE_WINDOW', 200)
+    # Rendered windows stay in memory up to this size, then spill to disk
+    WINDOW_SPOOL_BYTES = 8 * 1024 * 1024
+    # Barcode symbology printed on each label, or None for text only
+    BARCODE = getattr(settings, 'PDF_LABEL_BARCODE', None)
+
+    def __init__(
+        self,
+        label_stock: Optional[LabelStock] = None,
+        page_window: Optional[int] = None,
+        barcode: Optional[str] = None
+    ):
         self.width, self.height = letter
+        self.label_renderer = LabelRenderer(label_stock, barcode=barcode or self.BARCODE)
+        self.page_window = page_window or self.PAGE_WINDOW
+
+    @staticmethod
+    def order_context(order) -> Dict[str, Any]:
+        """Merge an order's model fields over its order_data for rendering"""
+        context = dict(order.order_data or {})
+        context.update({
+            'order_reference': order.order_reference,
+            'customer_name': order.customer_name,
+            'customer_email': order.customer_email,
+            'currency': order.currency,
+            'amount': order.amount,
+        })
+        return context
+
+    def write_order_pdf(self, order_data: Dict[str, Any], output: BinaryIO) -> None:
+        """Render the order PDF into a writable binary file object"""
+        # invariant output keeps identical orders byte-for-byte identical
+        c = canvas.Canvas(output, pagesize=letter, invariant=1)
 
-    def generate_order_pdf(self, order_data):
-        """Generate PDF for an order"""
-        filename = f"order_{order_data['order_reference']}.pdf"
-        c = canvas.Canvas(filename, pagesize=letter)
-        
         # Add content
         c.setFont("Helvetica-Bold", 16)
         c.drawString(50, self.height - 50, f"Order: {order_data['order_reference']}")
-        
+
         c.setFont("Helvetica", 12)
         y_position = self.height - 100
-        
+
         # Customer details
         c.drawString(50, y_position, f"Customer: {order_data['customer_name']}")
         c.drawString(50, y_position - 20, f"Email: {order_data['customer_email']}")
-        
+
         # Order details
         y_position -= 60
         c.drawString(50, y_position, f"Amount: {order_data['currency']} {order_data['amount']}")
-        
+
+        c.save()
+
+    def render_order_pdf(self, order_data: Dict[str, Any]) -> bytes:
+        """Render the order PDF in memory and return its bytes"""
+        buffer = io.BytesIO()
+        self.write_order_pdf(order_data, buffer)
+        return buffer.getvalue()
+
+    def write_sample_labels(
+        self,
+        order_data: Dict[str, Any],
+        output: BinaryIO,
+        on_window: Optional[Callable[[int], None]] = None
+    ) -> int:
+        """
+        Render sample labels into a writable binary file object. Orders
+        that fit in one page window are drawn on a single canvas; longer
+        ones are rendered window by window so memory stays bounded by the
+        window size rather than the order size. on_window, if given, is
+        called with the labels drawn so far after each window.
+        """
+        if order_data is None:
+            raise ValueError('order_data is required to render sample labels')
+
+        windows = self._sample_windows(iter_samples(order_data))
+        first = next(windows, [])
+        second = next(windows, None)
+        if second is None:
+            count = self._write_label_window(first, order_data, output)
+            if on_window:
+                on_window(count)
+            return count
+        return self._write_windowed_labels(chain([first, second], windows), order_data, output, on_window)
+
+    def _sample_windows(self, samples: Iterator[Sample]) -> Iterator[List[Sample]]:
+        # Windows hold whole pages, so page breaks match the single canvas
+        size = self.page_window * self.label_renderer.layout.stock.labels_per_page
+        while True:
+            window = list(islice(samples, size))
+            if not window:
+                return
+            yield window
+
+    def _write_label_window(
+        self,
+        samples: List[Sample],
+        order_data: Dict[str, Any],
+        output: BinaryIO
+    ) -> int:
+        self.label_renderer.prepare(samples)
+        c = canvas.Canvas(
+            output,
+            pagesize=self.label_renderer.layout.stock.page_size,
+            invariant=1
+        )
+        count = self.label_renderer.render_samples(c, samples, order_data)
         c.save()
-        return filename
\ No newline at end of file
+        return count
+
+    def _write_windowed_labels(
+        self,
+        windows: Iterable[List[Sample]],
+        order_data: Dict[str, Any],
+        output: BinaryIO,
+        on_window: Optional[Callable[[int], None]] = None
+    ) -> int:
+        writer = StreamingPDFWriter(output)
+        count = 0
+        for window in windows:
+            with tempfile.SpooledTemporaryFile(max_size=self.WINDOW_SPOOL_BYTES) as part:
+                count += self._write_label_window(window, order_data, part)
+                part.seek(0)
+                writer.append(part)
+            if on_window:
+                on_window(count)
+        writer.close()
+        return count
+
+    def generate_sample_labels(
+        self,
+        order_data: Dict[str, Any],
+        on_window: Optional[Callable[[int], None]] = None
+    ) -> bytes:
+        """Render one label per sample_id in order_data and return the PDF bytes"""
+        buffer = io.BytesIO()
+        self.write_sample_labels(order_data, buffer, on_window)
+        return buffer.getvalue()
@@ -0,0 +1,102 @@
+from datetime import datetime
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_etags
+from typing import Callable, Optional, Tuple
+import re
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+def parse_range(header: str, length: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single byte range into inclusive (start, end) offsets. Returns
+    None for a header this view should ignore (malformed or several ranges)
+    and raises ValueError when the range lies outside the document.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the final N bytes
+        suffix = int(last)
+        if suffix == 0:
+            raise ValueError(header)
+        return max(length - suffix, 0), length - 1
+    start = int(first)
+    end = min(int(last), length - 1) if last else length - 1
+    if start >= length or start > end:
+        raise ValueError(header)
+    return start, end
+
+def _if_range_matches(request, etag: str) -> bool:
+    """A Range is honoured only while the client's copy is still current"""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    return if_range is None or if_range in parse_etags(etag)
+
+def pdf_response(
+    request,
+    render: Callable[[], bytes],
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    disposition: str = 'inline',
+    content_type: str = 'application/pdf'
+) -> HttpResponse:
+    """
+    Serve a PDF with validators and byte-range support. Conditional
+    requests are answered before render() is called, so a 304 never
+    touches the renderer or the cache.
+    """
+    response = conditional_response(request, etag, last_modified)
+    if response is not None:
+        return response
+    pdf_data = render()
+    response = _content_response(request, pdf_data, etag, content_type)
+    response['Content-Disposition'] = disposition
+    return _add_validators(response, etag, last_modified)
+
+def conditional_response(
+    request,
+    etag: str,
+    last_modified: Optional[datetime] = None
+) -> Optional[HttpResponse]:
+    """
+    The 304 (or 412) for a conditional request whose copy is current,
+    with the headers pdf_response() sends, or None to serve the PDF
+    """
+    timestamp = last_modified.timestamp() if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        return None
+    return _add_validators(response, etag, last_modified)
+
+def _add_validators(response: HttpResponse, etag: str, last_modified: Optional[datetime]) -> HttpResponse:
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    response['Accept-Ranges'] = 'bytes'
+    # Viewers may keep their copy but must revalidate it before use
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+def _content_response(request, pdf_data: bytes, etag: str, content_type: str) -> HttpResponse:
+    range_header = request.META.get('HTTP_RANGE')
+    if not range_header or not _if_range_matches(request, etag):
+        return HttpResponse(pdf_data, content_type=content_type)
+
+    length = len(pdf_data)
+    try:
+        byte_range = parse_range(range_header, length)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{length}'
+        return response
+    if byte_range is None:
+        return HttpResponse(pdf_data, content_type=content_type)
+
+    start, end = byte_range
+    response = HttpResponse(pdf_data[start:end + 1], content_type=content_type, status=206)
+    response['Content-Range'] = f'bytes {start}-{end}/{length}'
+    return response
@@ -0,0 +1,154 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from django.utils.module_loading import import_string
+import hashlib
+import os
+import posixpath
+import tempfile
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+class PDFStorage:
+    """
+    Persists rendered PDFs through a Django storage backend, by default
+    under MEDIA_ROOT. Files are named by content hash, so an identical
+    render is stored once, and old files are pruned by collect_garbage().
+    """
+
+    LOCATION = getattr(settings, 'PDF_STORAGE_LOCATION', 'pdfs')
+    # Size over which save_chunks() spills to disk rather than memory
+    SPOOL_BYTES = 4 * 1024 * 1024
+
+    def __init__(self, storage=None, location: Optional[str] = None):
+        self.storage = storage or default_storage
+        self.location = location if location is not None else self.LOCATION
+
+    def get_name(self, prefix: str, pdf_data: bytes) -> str:
+        """
+        Build a content-derived name so concurrent writers never
+        overwrite each other's files
+        """
+        return self._name_for_digest(prefix, hashlib.sha256(pdf_data).hexdigest())
+
+    def _name_for_digest(self, prefix: str, digest: str) -> str:
+        return posixpath.join(self.location, f"{prefix}_{digest[:16]}.pdf")
+
+    def save(self, prefix: str, pdf_data: bytes) -> str:
+        """Save PDF bytes and return the stored name"""
+        name = self.get_name(prefix, pdf_data)
+        if self._reuse(name):
+            return name
+        return self.storage.save(name, ContentFile(pdf_data))
+
+    def save_chunks(self, prefix: str, chunks: Iterable[bytes]) -> str:
+        """
+        Save a PDF produced piece by piece, such as a streamed batch,
+        without ever holding the whole document in memory
+        """
+        digest = hashlib.sha256()
+        with tempfile.SpooledTemporaryFile(max_size=self.SPOOL_BYTES) as spool:
+            for chunk in chunks:
+                digest.update(chunk)
+                spool.write(chunk)
+            name = self._name_for_digest(prefix, digest.hexdigest())
+            if self._reuse(name):
+                return name
+            spool.seek(0)
+            return self.storage.save(name, File(spool, name=name))
+
+    def _reuse(self, name: str) -> bool:
+        """
+        Whether name is already stored. A local file is touched as well:
+        collect_garbage() prunes oldest first, and a render that is still
+        being asked for is not old.
+        """
+        try:
+            path = self.storage.path(name)
+        except NotImplementedError:
+            return self.storage.exists(name)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def exists(self, name: str) -> bool:
+        return bool(name) and self.storage.exists(name)
+
+    def open(self, name: str):
+        """Open a stored PDF for reading"""
+        return self.storage.open(name, 'rb')
+
+    def url(self, name: str) -> str:
+        """Public URL for a stored PDF"""
+        return self.storage.url(name)
+
+    def delete(self, name: str) -> None:
+        """Remove a stored PDF"""
+        self.storage.delete(name)
+
+    def artifacts(self) -> List[Tuple[str, int, Any]]:
+        """(name, size, modified time) for every stored PDF, oldest first"""
+        if not self.storage.exists(self.location):
+            return []
+        _, files = self.storage.listdir(self.location)
+        entries = []
+        for filename in files:
+            name = posixpath.join(self.location, filename)
+            entries.append((name, self.storage.size(name), self.storage.get_modified_time(name)))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def usage(self) -> Dict[str, Any]:
+        entries = self.artifacts()
+        return {
+            'files': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'oldest': entries[0][2].isoformat() if entries else None,
+            'newest': entries[-1][2].isoformat() if entries else None,
+        }
+
+    def collect_garbage(
+        self,
+        max_bytes: Optional[int] = None,
+        max_age: Optional[timedelta] = None,
+        dry_run: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Delete PDFs older than max_age, then the oldest remaining ones
+        until the store fits in max_bytes. Returns what was (or, on a dry
+        run, would be) removed.
+        """
+        entries = self.artifacts()
+        total = sum(size for _, size, _ in entries)
+        cutoff = timezone.now() - max_age if max_age is not None else None
+
+        removed = []
+        freed = 0
+        for name, size, modified in entries:
+            expired = cutoff is not None and modified < cutoff
+            over_budget = max_bytes is not None and total > max_bytes
+            if not expired and not over_budget:
+                # Entries are oldest first, so nothing later is expired either
+                break
+            removed.append(name)
+            freed += size
+            total -= size
+            if not dry_run:
+                self.delete(name)
+
+        return {
+            'removed': removed,
+            'freed_bytes': freed,
+            'remaining_bytes': total,
+        }
+
+def get_pdf_storage() -> PDFStorage:
+    """Return the storage configured by PDF_STORAGE_BACKEND"""
+    backend = getattr(
+        settings,
+        'PDF_STORAGE_BACKEND',
+        'shopify.services.pdf_storage.PDFStorage'
+    )
+    return import_string(backend)()
@@ -0,0 +1,219 @@
+from PyPDF2 import PdfReader
+from PyPDF2.generic import (
+    ArrayObject,
+    DictionaryObject,
+    IndirectObject,
+    NameObject,
+    NumberObject,
+    StreamObject,
+    TextStringObject,
+)
+from typing import Any, BinaryIO, Dict, List, Optional, Set, Tuple, Union
+import hashlib
+import io
+
+# Page attributes a page may inherit from its ancestors in the page tree
+INHERITABLE_PAGE_KEYS = ('/Resources', '/MediaBox', '/CropBox', '/Rotate')
+
+class StreamingPDFWriter:
+    """
+    Concatenates PDF documents into one file while writing it front to
+    back. Each appended document's pages are copied to the output straight
+    away, and only the xref offsets, page references and outline titles
+    are held until close(). Because nothing is written out of order, the
+    output can be a socket or a generator buffer rather than a seekable file.
+
+    Objects are copied children first, so identical resources (fonts,
+    images, the label chrome form) serialize to identical bytes in every
+    document. With dedupe on, each distinct object is written once and
+    later copies reuse its number; only a digest per object is retained.
+    """
+
+    HEADER = b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n'
+
+    def __init__(self, output: BinaryIO, dedupe: bool = True):
+        self.output = output
+        self.dedupe = dedupe
+        self.position = 0
+        self.offsets: List[Optional[int]] = [None]  # Index is the object number
+        self.page_refs: List[IndirectObject] = []
+        self.outline: List[Tuple[str, IndirectObject]] = []
+        self.objects_written = 0
+        self.objects_reused = 0
+        self._digests: Dict[bytes, IndirectObject] = {}
+        self._write(self.HEADER)
+        self.pages_ref = self._reserve()
+
+    def _write(self, data: bytes) -> None:
+        self.output.write(data)
+        self.position += len(data)
+
+    def _reserve(self) -> IndirectObject:
+        self.offsets.append(None)
+        return IndirectObject(len(self.offsets) - 1, 0, None)
+
+    @staticmethod
+    def _serialize(obj: Any) -> bytes:
+        buffer = io.BytesIO()
+        obj.write_to_stream(buffer, None)
+        return buffer.getvalue()
+
+    def _write_serialized(self, ref: IndirectObject, data: bytes) -> None:
+        self.offsets[ref.idnum] = self.position
+        self._write(f"{ref.idnum} 0 obj\n".encode() + data + b"\nendobj\n")
+        self.objects_written += 1
+
+    def _write_object(self, ref: IndirectObject, obj: Any) -> None:
+        self._write_serialized(ref, self._serialize(obj))
+
+    def _copy(self, obj: Any, mapping: Dict[int, IndirectObject], in_progress: Set[int]) -> Any:
+        """Copy obj, renumbering indirect references into this file"""
+        if isinstance(obj, IndirectObject):
+            return self._copy_indirect(obj, mapping, in_progress)
+        if isinstance(obj, StreamObject):
+            copied = obj.__class__()
+            copied._data = obj._data
+            for key, value in obj.items():
+                copied[NameObject(key)] = self._copy(value, mapping, in_progress)
+            return copied
+        if isinstance(obj, DictionaryObject):
+            copied = DictionaryObject()
+            for key, value in obj.items():
+                copied[NameObject(key)] = self._copy(value, mapping, in_progress)
+            return copied
+        if isinstance(obj, ArrayObject):
+            return ArrayObject(self._copy(value, mapping, in_progress) for value in obj)
+        return obj
+
+    def _copy_indirect(
+        self,
+        obj: IndirectObject,
+        mapping: Dict[int, IndirectObject],
+        in_progress: Set[int]
+    ) -> IndirectObject:
+        """Write the object obj refers to, or reuse an identical one, and return its reference"""
+        if obj.idnum in mapping:
+            return mapping[obj.idnum]
+        if obj.idnum in in_progress:
+            # A reference cycle: number the object now and write it once copied
+            mapping[obj.idnum] = self._reserve()
+            return mapping[obj.idnum]
+
+        in_progress.add(obj.idnum)
+        data = self._serialize(self._copy(obj.get_object(), mapping, in_progress))
+        in_progress.discard(obj.idnum)
+
+        ref = mapping.get(obj.idnum)
+        if ref is not None:
+            # Numbered by a cycle, so other objects already point at it
+            self._write_serialized(ref, data)
+            return ref
+
+        digest = hashlib.sha256(data).digest() if self.dedupe else None
+        ref = self._digests.get(digest) if digest else None
+        if ref is not None:
+            self.objects_reused += 1
+        else:
+            ref = self._reserve()
+            self._write_serialized(ref, data)
+            if digest:
+                self._digests[digest] = ref
+        mapping[obj.idnum] = ref
+        return ref
+
+    def append(self, pdf_data: Union[bytes, BinaryIO], title: Optional[str] = None) -> None:
+        """Copy every page of pdf_data, given as bytes or a readable file, to the output"""
+        if isinstance(pdf_data, bytes):
+            pdf_data = io.BytesIO(pdf_data)
+        reader = PdfReader(pdf_data)
+
+        # References to the source page tree or its pages must resolve to
+        # this file's copies rather than drag the whole tree along
+        mapping: Dict[int, IndirectObject] = {
+            reader.trailer['/Root'].raw_get('/Pages').idnum: self.pages_ref
+        }
+        page_refs = []
+        for page in reader.pages:
+            page_ref = self._reserve()
+            mapping[page.indirect_ref.idnum] = page_ref
+            page_refs.append(page_ref)
+
+        for index, (page, page_ref) in enumerate(zip(reader.pages, page_refs)):
+            page_dict = DictionaryObject(
+                (key, value) for key, value in page.items() if key != '/Parent'
+            )
+            for key in INHERITABLE_PAGE_KEYS:
+                if key not in page_dict:
+                    value = self._inherited(page, key)
+                    if value is not None:
+                        page_dict[NameObject(key)] = value
+
+            # Everything the page references is written before the page itself
+            copied = self._copy(page_dict, mapping, set())
+            copied[NameObject('/Parent')] = self.pages_ref
+            self._write_object(page_ref, copied)
+            self.page_refs.append(page_ref)
+            if index == 0 and title:
+                self.outline.append((title, page_ref))
+
+    @staticmethod
+    def _inherited(page: DictionaryObject, key: str) -> Any:
+        node = page.get('/Parent')
+        while node is not None:
+            node = node.get_object()
+            if key in node:
+                return node[key]
+            node = node.get('/Parent')
+        return None
+
+    def _write_outline(self) -> Optional[IndirectObject]:
+        if not self.outline:
+            return None
+        outlines_ref = self._reserve()
+        item_refs = [self._reserve() for _ in self.outline]
+        for index, ((title, page_ref), item_ref) in enumerate(zip(self.outline, item_refs)):
+            item = DictionaryObject({
+                NameObject('/Title'): TextStringObject(title),
+                NameObject('/Parent'): outlines_ref,
+                NameObject('/Dest'): ArrayObject([page_ref, NameObject('/Fit')]),
+            })
+            if index > 0:
+                item[NameObject('/Prev')] = item_refs[index - 1]
+            if index < len(item_refs) - 1:
+                item[NameObject('/Next')] = item_refs[index + 1]
+            self._write_object(item_ref, item)
+        self._write_object(outlines_ref, DictionaryObject({
+            NameObject('/Type'): NameObject('/Outlines'),
+            NameObject('/First'): item_refs[0],
+            NameObject('/Last'): item_refs[-1],
+            NameObject('/Count'): NumberObject(len(item_refs)),
+        }))
+        return outlines_ref
+
+    def close(self) -> None:
+        """Write the page tree, outline, catalog, xref table and trailer"""
+        self._write_object(self.pages_ref, DictionaryObject({
+            NameObject('/Type'): NameObject('/Pages'),
+            NameObject('/Kids'): ArrayObject(self.page_refs),
+            NameObject('/Count'): NumberObject(len(self.page_refs)),
+        }))
+
+        catalog = DictionaryObject({
+            NameObject('/Type'): NameObject('/Catalog'),
+            NameObject('/Pages'): self.pages_ref,
+        })
+        outlines_ref = self._write_outline()
+        if outlines_ref is not None:
+            catalog[NameObject('/Outlines')] = outlines_ref
+            catalog[NameObject('/PageMode')] = NameObject('/UseOutlines')
+        catalog_ref = self._reserve()
+        self._write_object(catalog_ref, catalog)
+
+        xref_position = self.position
+        lines = [f"xref\n0 {len(self.offsets)}\n", "0000000000 65535 f \n"]
+        lines.extend(f"{offset:010d} 00000 n \n" for offset in self.offsets[1:])
+        lines.append(
+            f"trailer\n<< /Size {len(self.offsets)} /Root {catalog_ref.idnum} 0 R >>\n"
+            f"startxref\n{xref_position}\n%%EOF\n"
+        )
+        self._write(''.join(lines).encode())
@@ -0,0 +1,360 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Max, Min, Sum
+from django.utils import timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import socket
+from .batch_pdf_generator import BatchPDFGenerator
+from .cache_manager import PDFCacheManager
+from .label_engine import LABEL_TEMPLATE_VERSION
+from .pdf_generator import PDFGenerator
+from .pdf_storage import PDFStorage, get_pdf_storage
+from ..models import PDFRenderJob, ShopifyOrder
+
+logger = logging.getLogger(__name__)
+
+class PDFJobQueue:
+    """
+    A render queue kept in the database, so it needs no broker and works
+    anywhere the app does. Requests enqueue jobs and return straight away;
+    ``manage.py run_pdf_worker`` claims and renders them.
+    """
+
+    # A running job whose worker has not reported in this long is presumed dead
+    STALE_AFTER = getattr(settings, 'PDF_JOB_STALE_AFTER', 10 * 60)
+    MAX_ATTEMPTS = getattr(settings, 'PDF_JOB_MAX_ATTEMPTS', 3)
+    # Queued jobs inspected per claim; losing a race moves on to the next one
+    CLAIM_BATCH = 10
+    # A failed job is handed back instead of a new one for this long, so
+    # clients polling a render that keeps failing do not requeue it each time
+    RETRY_FAILED_AFTER = getattr(settings, 'PDF_JOB_RETRY_FAILED_AFTER', 10 * 60)
+    # Jobs estimated at more label pages than this go to the bulk lane
+    INTERACTIVE_MAX_PAGES = getattr(settings, 'PDF_INTERACTIVE_MAX_PAGES', 100)
+    # Most jobs each lane may run at once across all workers; None is unlimited
+    LANE_CONCURRENCY = getattr(settings, 'PDF_JOB_LANE_CONCURRENCY', {
+        PDFRenderJob.LANE_INTERACTIVE: None,
+        PDFRenderJob.LANE_BULK: 2,
+    })
+
+    def __init__(self, storage: Optional[PDFStorage] = None):
+        self.storage = storage or get_pdf_storage()
+
+    @staticmethod
+    def dedupe_key(kind: str, order_ids: List[int]) -> str:
+        payload = json.dumps([kind, LABEL_TEMPLATE_VERSION, order_ids])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def enqueue(
+        self,
+        kind: str,
+        order_ids: List[int],
+        priority: int = PDFRenderJob.PRIORITY_NORMAL
+    ) -> Tuple[PDFRenderJob, bool]:
+        """
+        Queue a render and return (job, created). An identical request that
+        is still queued or running, or that finished after the orders were
+        last changed, is returned instead of queueing a duplicate; so is one
+        that failed within RETRY_FAILED_AFTER.
+        """
+        order_ids = [int(order_id) for order_id in order_ids]
+        key = self.dedupe_key(kind, order_ids)
+
+        existing = self._reusable_job(key, order_ids)
+        if existing is not None:
+            if existing.status == PDFRenderJob.STATUS_QUEUED and priority > existing.priority:
+                PDFRenderJob.objects.filter(pk=existing.pk).update(priority=priority)
+                existing.priority = priority
+            return existing, False
+
+        pages = self.estimate_pages(kind, order_ids)
+        try:
+            with transaction.atomic():
+                job = PDFRenderJob.objects.create(
+                    kind=kind,
+                    order_ids=order_ids,
+                    dedupe_key=key,
+                    priority=priority,
+                    total=len(order_ids),
+                    lane=self.lane_for(pages),
+                    estimated_pages=pages,
+                )
+        except IntegrityError:
+            # Another request queued the same job between the lookup and the insert
+            return PDFRenderJob.objects.get(
+                dedupe_key=key, status__in=PDFRenderJob.ACTIVE_STATUSES
+            ), False
+        return job, True
+
+    @staticmethod
+    def estimate_pages(kind: str, order_ids: List[int]) -> int:
+        """Pages a job will render, from the counts stored on each order"""
+        if kind == PDFRenderJob.KIND_ORDER:
+            return 1
+        return ShopifyOrder.objects.filter(id__in=order_ids).aggregate(
+            pages=Sum('estimated_pages')
+        )['pages'] or 1
+
+    @classmethod
+    def lane_for(cls, pages: int) -> str:
+        if pages > cls.INTERACTIVE_MAX_PAGES:
+            return PDFRenderJob.LANE_BULK
+        return PDFRenderJob.LANE_INTERACTIVE
+
+    def _reusable_job(self, key: str, order_ids: List[int]) -> Optional[PDFRenderJob]:
+        active = PDFRenderJob.objects.filter(
+            dedupe_key=key, status__in=PDFRenderJob.ACTIVE_STATUSES
+        ).first()
+        if active is not None:
+            return active
+
+        finished = PDFRenderJob.objects.filter(
+            dedupe_key=key, status__in=[PDFRenderJob.STATUS_COMPLETED, PDFRenderJob.STATUS_FAILED]
+        ).order_by('-finished_at').first()
+        if finished is None or finished.started_at is None:
+            return None
+        if finished.status == PDFRenderJob.STATUS_FAILED and self.retry_at(finished) <= timezone.now():
+            return None
+        last_changed = ShopifyOrder.objects.filter(id__in=order_ids).aggregate(
+            last=Max('updated_at')
+        )['last']
+        if last_changed is None or last_changed > finished.started_at:
+            return None
+        if finished.status == PDFRenderJob.STATUS_COMPLETED and not self.storage.exists(finished.artifact):
+            return None
+        return finished
+
+    def retry_at(self, job: PDFRenderJob):
+        """When enqueue() stops handing back a failed job and queues a new run"""
+        return job.finished_at + timedelta(seconds=self.RETRY_FAILED_AFTER)
+
+    def claim(self, worker: str, lanes: Optional[List[str]] = None) -> Optional[PDFRenderJob]:
+        """
+        Mark the highest priority queued job as running and return it.
+        Lanes are tried in order, interactive first, skipping any already
+        running at their concurrency cap. The claim is a conditional
+        UPDATE, so concurrent workers never share a job.
+        """
+        for lane in lanes or PDFRenderJob.LANES:
+            if not self._has_capacity(lane):
+                continue
+            job = self._claim_from_lane(worker, lane)
+            if job is not None:
+                return job
+        return None
+
+    def _running(self, lane: str) -> int:
+        return PDFRenderJob.objects.filter(status=PDFRenderJob.STATUS_RUNNING, lane=lane).count()
+
+    def _has_capacity(self, lane: str, starting: int = 1) -> bool:
+        """Whether lane stays within its cap with starting more jobs running"""
+        limit = self.LANE_CONCURRENCY.get(lane)
+        return limit is None or self._running(lane) + starting <= limit
+
+    def _claim_from_lane(self, worker: str, lane: str) -> Optional[PDFRenderJob]:
+        candidates = PDFRenderJob.objects.filter(
+            status=PDFRenderJob.STATUS_QUEUED, lane=lane
+        ).order_by('-priority', 'created_at').values_list('id', flat=True)[:self.CLAIM_BATCH]
+
+        for job_id in candidates:
+            if not self._mark_running(job_id, worker):
+                continue
+            if not self._has_capacity(lane, starting=0):
+                # Another worker took the lane's last slot at the same moment
+                self._release(job_id)
+                return None
+            return PDFRenderJob.objects.get(pk=job_id)
+        return None
+
+    @staticmethod
+    def _mark_running(job_id: int, worker: str) -> bool:
+        """Claim job_id for worker if it is still queued"""
+        now = timezone.now()
+        return bool(PDFRenderJob.objects.filter(
+            pk=job_id, status=PDFRenderJob.STATUS_QUEUED
+        ).update(
+            status=PDFRenderJob.STATUS_RUNNING,
+            worker=worker,
+            started_at=now,
+            heartbeat_at=now,
+            progress=0,
+            attempts=F('attempts') + 1,
+        ))
+
+    def claim_job(self, job: PDFRenderJob, worker: str) -> Optional[PDFRenderJob]:
+        """
+        Claim one particular queued job whatever its lane, returning it as
+        running, or None if someone else claimed it first
+        """
+        if not self._mark_running(job.pk, worker):
+            return None
+        return PDFRenderJob.objects.get(pk=job.pk)
+
+    @staticmethod
+    def _release(job_id: int) -> None:
+        PDFRenderJob.objects.filter(pk=job_id, status=PDFRenderJob.STATUS_RUNNING).update(
+            status=PDFRenderJob.STATUS_QUEUED,
+            worker='',
+            started_at=None,
+            heartbeat_at=None,
+            attempts=F('attempts') - 1,
+        )
+
+    def requeue_stale(self) -> int:
+        """Return jobs abandoned by a dead worker to the queue, or fail them"""
+        cutoff = timezone.now() - timedelta(seconds=self.STALE_AFTER)
+        stale = PDFRenderJob.objects.filter(
+            status=PDFRenderJob.STATUS_RUNNING, heartbeat_at__lt=cutoff
+        )
+        stale.filter(attempts__gte=self.MAX_ATTEMPTS).update(
+            status=PDFRenderJob.STATUS_FAILED,
+            error_message='Worker stopped responding',
+            finished_at=timezone.now(),
+        )
+        return stale.update(status=PDFRenderJob.STATUS_QUEUED, worker='')
+
+    def run(self, job: PDFRenderJob) -> PDFRenderJob:
+        """Render a claimed job and record the artifact or the error"""
+        try:
+            if job.kind == PDFRenderJob.KIND_ORDER:
+                artifact = self._render_order(job)
+            elif job.kind == PDFRenderJob.KIND_LABELS:
+                artifact = self._render_labels(job)
+            else:
+                artifact = self._render_batch(job)
+        except Exception as e:
+            logger.error(f"PDF job {job.id} failed: {str(e)}")
+            job.status = PDFRenderJob.STATUS_FAILED
+            job.error_message = str(e)
+        else:
+            job.status = PDFRenderJob.STATUS_COMPLETED
+            job.artifact = artifact
+            job.progress = job.total
+        job.finished_at = timezone.now()
+        # Only while this worker still holds the job; one requeued as stale
+        # may since have been claimed by another worker
+        recorded = PDFRenderJob.objects.filter(
+            pk=job.pk, worker=job.worker, status=PDFRenderJob.STATUS_RUNNING
+        ).update(
+            status=job.status,
+            artifact=job.artifact,
+            progress=job.progress,
+            error_message=job.error_message,
+            finished_at=job.finished_at,
+        )
+        if not recorded:
+            logger.warning(f"PDF job {job.id} was reclaimed from {job.worker}; result discarded")
+            job.refresh_from_db()
+        return job
+
+    def _render_order(self, job: PDFRenderJob) -> str:
+        order = ShopifyOrder.objects.get(pk=job.order_ids[0])
+        generator = PDFGenerator()
+        pdf_data = generator.render_order_pdf(generator.order_context(order))
+        self.heartbeat(job)
+        return self.storage.save(f"order_{order.order_reference}", pdf_data)
+
+    def _render_labels(self, job: PDFRenderJob) -> str:
+        # Cached under the content-addressed key the label views look up,
+        # so the next request for these labels is served from the cache
+        order = ShopifyOrder.objects.get(pk=job.order_ids[0])
+        generator = PDFGenerator()
+        # A heartbeat per page window, so a long order is not taken for stale
+        pdf_data = PDFCacheManager().get_or_render(
+            order.order_data,
+            lambda order_data: generator.generate_sample_labels(
+                order_data, on_window=lambda count: self.heartbeat(job)
+            )
+        )
+        return self.storage.save(f"labels_{order.order_reference}", pdf_data)
+
+    def _render_batch(self, job: PDFRenderJob) -> str:
+        stream = BatchPDFGenerator().stream_batch_pdf(job.order_ids)
+        return self.storage.save_chunks("batch", self._track_progress(job, stream))
+
+    def _track_progress(self, job: PDFRenderJob, stream: Iterable[bytes]) -> Iterator[bytes]:
+        # Report progress about twenty times over the job, not once per order
+        report_every = max(1, job.total // 20)
+        # One chunk per order, then the trailer
+        for rendered, chunk in enumerate(stream, 1):
+            yield chunk
+            if rendered < job.total and rendered % report_every == 0:
+                self.report_progress(job, rendered)
+
+    @staticmethod
+    def heartbeat(job: PDFRenderJob) -> None:
+        """Show job's worker is still rendering it, where there is no progress to report"""
+        PDFRenderJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now())
+
+    @staticmethod
+    def report_progress(job: PDFRenderJob, progress: int) -> None:
+        job.progress = progress
+        PDFRenderJob.objects.filter(pk=job.pk).update(
+            progress=progress, heartbeat_at=timezone.now()
+        )
+
+    def run_next(
+        self,
+        worker: Optional[str] = None,
+        lanes: Optional[List[str]] = None
+    ) -> Optional[PDFRenderJob]:
+        """Claim and run one job, returning it, or None when nothing can be claimed"""
+        job = self.claim(worker or default_worker_name(), lanes)
+        if job is None:
+            return None
+        return self.run(job)
+
+    def run_pending(self, worker: Optional[str] = None, lanes: Optional[List[str]] = None) -> int:
+        """Run jobs until nothing more can be claimed and return how many ran"""
+        count = 0
+        while self.run_next(worker, lanes) is not None:
+            count += 1
+        return count
+
+    def lane_stats(self, window: int = 60 * 60) -> Dict[str, Dict[str, Any]]:
+        """
+        Depth and wait time per lane. Mean wait covers jobs started in the
+        last window seconds; the oldest wait is that of the longest queued job.
+        """
+        now = timezone.now()
+        wait = ExpressionWrapper(F('started_at') - F('created_at'), output_field=DurationField())
+        stats = {}
+        for lane in PDFRenderJob.LANES:
+            jobs = PDFRenderJob.objects.filter(lane=lane)
+            queued = jobs.filter(status=PDFRenderJob.STATUS_QUEUED).aggregate(
+                count=Count('id'), pages=Sum('estimated_pages'), oldest=Min('created_at')
+            )
+            mean_wait = jobs.filter(
+                started_at__gte=now - timedelta(seconds=window)
+            ).aggregate(wait=Avg(wait))['wait']
+            stats[lane.lower()] = {
+                'queued': queued['count'],
+                'queued_pages': queued['pages'] or 0,
+                'running': self._running(lane),
+                'concurrency': self.LANE_CONCURRENCY.get(lane),
+                'oldest_wait_seconds': (
+                    round((now - queued['oldest']).total_seconds(), 1) if queued['oldest'] else 0
+                ),
+                'mean_wait_seconds': round(mean_wait.total_seconds(), 1) if mean_wait else 0,
+            }
+        return stats
+
+def schedule_prewarm(order: ShopifyOrder) -> Optional[PDFRenderJob]:
+    """
+    Queue order's labels at low priority so the next preview is a cache
+    hit. The job goes to the lane its page count selects, like any other.
+    Orders without samples, and content already cached, queue nothing.
+    """
+    if not order.sample_count or PDFCacheManager().has_pdf(order.order_data):
+        return None
+    job, _ = PDFJobQueue().enqueue(
+        PDFRenderJob.KIND_LABELS, [order.id], priority=PDFRenderJob.PRIORITY_LOW
+    )
+    return job
+
+def default_worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
@@ -0,0 +1,81 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+# Per-process generator, created by the pool initializer
+_worker_generator = None
+
+def _warm_worker() -> None:
+    """
+    Pool initializer: import reportlab and build the label layout and
+    chrome up front so the first order a worker receives renders warm
+    """
+    global _worker_generator
+    from .pdf_generator import PDFGenerator
+    _worker_generator = PDFGenerator()
+
+def _render_sample_labels(order_data: Dict[str, Any]) -> bytes:
+    return _worker_generator.generate_sample_labels(order_data)
+
+def get_render_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Return the shared pool of warm render processes, creating it on first
+    use. The pool lives for the life of the web worker so the cost of
+    starting processes and importing reportlab is paid once.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # spawn avoids inheriting the parent's database connections and locks
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_warm_worker,
+            )
+            _pool_workers = workers
+        return _pool
+
+def shutdown_render_pool() -> None:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+        _pool = None
+        _pool_workers = 0
+
+atexit.register(shutdown_render_pool)
+
+def render_sample_labels_parallel(
+    order_data_list: List[Dict[str, Any]],
+    workers: Optional[int] = None,
+    chunksize: int = 1
+) -> List[bytes]:
+    """
+    Render each order's labels in the process pool. Results are returned
+    in the same order as order_data_list.
+    """
+    workers = workers or os.cpu_count() or 1
+    try:
+        return list(get_render_pool(workers).map(
+            _render_sample_labels, order_data_list, chunksize=chunksize
+        ))
+    except BrokenProcessPool:
+        # A worker died (OOM killer, segfault); start a fresh pool and retry once
+        logger.warning("PDF render pool broke, restarting it")
+        shutdown_render_pool()
+        return list(get_render_pool(workers).map(
+            _render_sample_labels, order_data_list, chunksize=chunksize
+        ))
@@ -0,0 +1,248 @@
+from collections import Counter, OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from typing import Any, Dict, Optional, Tuple
+import threading
+import time
+import zlib
+
+class LocalLRUCache:
+    """
+    In-process LRU bounded by the total size of its values rather than by
+    entry count, so a few large batch PDFs cannot crowd out memory.
+    """
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[str, Tuple[bytes, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def __contains__(self, key: str) -> bool:
+        """Whether a live entry exists, without touching recency or the counters"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[1] >= time.monotonic()
+
+    def set(self, key: str, value: bytes, timeout: Optional[int]) -> Dict[str, bytes]:
+        """
+        Store value and return the entries evicted to make room, so the
+        caller can demote them to the next tier
+        """
+        if len(value) > self.max_entry_bytes:
+            return {}
+        evicted = {}
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            # None never expires, as with Django's cache backends
+            expires = float('inf') if timeout is None else time.monotonic() + timeout
+            self._entries[key] = (value, expires)
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                old_key, (old_value, _) = self._entries.popitem(last=False)
+                self.size -= len(old_value)
+                evicted[old_key] = old_value
+        return evicted
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        value, _ = self._entries.pop(key)
+        self.size -= len(value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+            'entries': len(self._entries),
+            'bytes': self.size,
+            'max_bytes': self.max_bytes,
+        }
+
+_local_cache: Optional[LocalLRUCache] = None
+_local_cache_lock = threading.Lock()
+
+def get_local_cache() -> LocalLRUCache:
+    """The process-wide local tier, shared by every TieredPDFCache"""
+    global _local_cache
+    with _local_cache_lock:
+        if _local_cache is None:
+            _local_cache = LocalLRUCache(
+                max_bytes=getattr(settings, 'PDF_CACHE_LOCAL_MAX_BYTES', 64 * 1024 * 1024),
+                max_entry_bytes=getattr(settings, 'PDF_CACHE_LOCAL_MAX_ENTRY_BYTES', 8 * 1024 * 1024),
+            )
+        return _local_cache
+
+class BufferedCounters:
+    """
+    Counter increments gathered in process and added to the shared cache
+    in batches, every flush_every increments or flush_seconds, so
+    counting a cache lookup costs no round trip of its own.
+    """
+
+    def __init__(self, alias: str, flush_every: int, flush_seconds: float):
+        self.alias = alias
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self._pending: Counter = Counter()
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def incr(self, key: str, delta: int = 1) -> None:
+        with self._lock:
+            self._pending[key] += delta
+            due = (
+                sum(self._pending.values()) >= self.flush_every
+                or time.monotonic() - self._last_flush >= self.flush_seconds
+            )
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        """Add every pending increment to the shared counters"""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._last_flush = time.monotonic()
+        shared = caches[self.alias]
+        for key, delta in pending.items():
+            # add() is a no-op when the counter exists; incr() is atomic on shared backends
+            shared.add(key, 0, None)
+            try:
+                shared.incr(key, delta)
+            except ValueError:
+                # Evicted between add() and incr()
+                shared.set(key, delta, None)
+
+    def discard(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._pending.pop(key, None)
+
+_counters: Dict[str, BufferedCounters] = {}
+
+def get_counter_buffer(alias: str) -> BufferedCounters:
+    """The process-wide counter buffer for a shared cache alias"""
+    with _local_cache_lock:
+        if alias not in _counters:
+            _counters[alias] = BufferedCounters(
+                alias,
+                flush_every=getattr(settings, 'PDF_CACHE_STATS_FLUSH_EVERY', 100),
+                flush_seconds=getattr(settings, 'PDF_CACHE_STATS_FLUSH_SECONDS', 30),
+            )
+        return _counters[alias]
+
+class TieredPDFCache:
+    """
+    A local in-process LRU in front of the shared cache backend. Values
+    are zlib-compressed once and stored compressed in both tiers. Shared
+    hits are promoted into the local tier, and entries evicted locally are
+    demoted back to the shared tier in case it has already dropped them.
+    """
+
+    def __init__(self, alias: Optional[str] = None, local: Optional[LocalLRUCache] = None):
+        alias = alias or getattr(settings, 'PDF_CACHE_ALIAS', 'default')
+        self.shared = caches[alias]
+        self.local = local or get_local_cache()
+        self.counters = get_counter_buffer(alias)
+        self.compression_level = getattr(settings, 'PDF_CACHE_COMPRESSION_LEVEL', 6)
+        prefix = getattr(settings, 'PDF_CACHE_PREFIX', 'pdf_')
+        self.shared_hits_key = f'{prefix}tier_shared_hits'
+        self.shared_misses_key = f'{prefix}tier_shared_misses'
+
+    def get(self, key: str) -> Optional[bytes]:
+        compressed = self.local.get(key)
+        if compressed is None:
+            compressed = self.shared.get(key)
+            self.incr(self.shared_hits_key if compressed is not None else self.shared_misses_key)
+            if compressed is None:
+                return None
+            self._set_local(key, compressed, self.default_timeout)
+        return zlib.decompress(compressed)
+
+    def contains(self, key: str) -> bool:
+        """Whether either tier holds key, without fetching the value"""
+        return key in self.local or self.shared.has_key(key)
+
+    def set(self, key: str, value: bytes, timeout: int) -> None:
+        compressed = zlib.compress(value, self.compression_level)
+        self.shared.set(key, compressed, timeout)
+        self._set_local(key, compressed, timeout)
+
+    def delete(self, key: str) -> None:
+        self.local.delete(key)
+        self.shared.delete(key)
+
+    def _set_local(self, key: str, compressed: bytes, timeout: int) -> None:
+        for evicted_key, evicted_value in self.local.set(key, compressed, timeout).items():
+            # add() leaves the shared entry alone when it is still there
+            self.shared.add(evicted_key, evicted_value, self.default_timeout)
+
+    @property
+    def default_timeout(self) -> int:
+        return getattr(settings, 'PDF_CACHE_TIMEOUT', 60 * 60 * 24 * 30)
+
+    def incr(self, key: str) -> None:
+        """
+        Increment a counter held in the shared tier. Increments reach it
+        in batches, so other processes see them up to a flush late.
+        """
+        self.counters.incr(key)
+
+    def get_counters(self, *keys: str) -> Dict[str, int]:
+        self.counters.flush()
+        counters = self.shared.get_many(keys)
+        return {key: counters.get(key, 0) for key in keys}
+
+    def delete_counters(self, *keys: str) -> None:
+        self.counters.discard(*keys)
+        self.shared.delete_many(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        counters = self.get_counters(self.shared_hits_key, self.shared_misses_key)
+        hits = counters[self.shared_hits_key]
+        misses = counters[self.shared_misses_key]
+        lookups = hits + misses
+        return {
+            'local': self.local.stats(),
+            'shared': {
+                'hits': hits,
+                'misses': misses,
+                'hit_ratio': round(hits / lookups, 4) if lookups else None,
+            },
+        }
+
+    def reset_stats(self) -> None:
+        self.delete_counters(self.shared_hits_key, self.shared_misses_key)
+        self.local.reset_stats()
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .models import ShopifyOrder
+from .services.render_jobs import schedule_prewarm
+
+def _touches_order_data(update_fields) -> bool:
+    return update_fields is None or 'order_data' in update_fields
+
+@receiver(post_save, sender=ShopifyOrder)
+def prewarm_cached_pdf(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """
+    Optionally queue labels for the new order_data. Entries for the old
+    content need no invalidation: cache keys are derived from the content,
+    so they are no longer looked up and age out of the cache.
+    """
+    if raw or not _touches_order_data(update_fields):
+        return
+    # Set by ShopifyOrder.save() from the row it replaced
+    if not created and getattr(instance, '_previous_order_data', None) == instance.order_data:
+        return
+
+    if getattr(settings, 'PDF_CACHE_PREWARM', False):
+        transaction.on_commit(lambda: schedule_prewarm(instance))
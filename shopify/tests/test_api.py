@@ -2,8 +2,9 @@ from rest_framework.test import APITestCase
 from rest_framework import status
 from django.urls import reverse
 from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from shopify.models import ShopifyOrder, PaymentAttempt
-from unittest.mock import patch
 import json
 
 class APITests(APITestCase):
@@ -28,36 +29,40 @@ class APITests(APITestCase):
         # Authenticate
         self.client.force_authenticate(user=self.user)
 
-    @patch('shopify.api.views.PDFGenerator')
-    def test_generate_pdf(self, mock_pdf_generator):
-        """Test PDF generation endpoint"""
-        # Mock the PDF generator
-        mock_instance = mock_pdf_generator.return_value
-        mock_instance.generate_order_pdf.return_value = '/path/to/test.pdf'
-
+    def test_generate_pdf(self):
+        """Test PDF generation endpoint queues a job"""
         url = reverse('api:order-pdf-generate', args=[self.order.id])
         response = self.client.post(url)
         
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertIn('pdf_url', response.data)
-        self.assertEqual(response.data['pdf_url'], '/path/to/test.pdf')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertIn('id', response.data)
+        self.assertEqual(response.data['status'], 'QUEUED')
+        self.assertEqual(
+            response.data['status_url'],
+            reverse('api:pdf-job-detail', args=[response.data['id']])
+        )
+
+    def test_generate_pdf_priority_is_one_of_the_levels(self):
+        url = reverse('api:order-pdf-generate', args=[self.order.id])
+        response = self.client.post(url, {'priority': 7}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], 'priority must be one of 0, 5, 10')
 
-    @patch('shopify.api.views.PDFGenerator')
-    def test_batch_operations(self, mock_pdf_generator):
-        """Test batch PDF generation"""
-        # Mock the PDF generator
-        mock_instance = mock_pdf_generator.return_value
-        mock_instance.generate_order_pdf.return_value = '/path/to/test.pdf'
+        response = self.client.post(url, {'priority': '10'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['priority'], 10)
 
+    def test_batch_operations(self):
+        """Test batch PDF generation queues one job"""
         url = reverse('api:batch-pdf-generate')
         data = {
             'order_ids': [self.order.id]
         }
         response = self.client.post(url, data, format='json')
         
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertIn('pdf_urls', response.data)
-        self.assertEqual(response.data['pdf_urls'], ['/path/to/test.pdf'])
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['kind'], 'BATCH')
+        self.assertEqual(response.data['order_ids'], [self.order.id])
 
     def test_list_orders(self):
         """Test retrieving order list"""
@@ -65,6 +70,163 @@ class APITests(APITestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_list_orders_payment_state_in_constant_queries(self):
+        """Payment state comes from the list query, not a query per order"""
+        PaymentAttempt.objects.create(order=self.order, amount=self.order.amount, status='COMPLETED')
+        for i in range(10):
+            ShopifyOrder.objects.create(
+                order_reference=f"LIST{i}",
+                amount=50.00,
+                currency="USD",
+                customer_email="test@example.com",
+                customer_name="Test User"
+            )
+
+        url = reverse('api:order-list')
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        orders = {order['order_reference']: order for order in response.data['results']}
+        self.assertEqual(orders['TEST123']['payment_status'], 'PAID')
+        self.assertEqual(orders['TEST123']['total_paid'], '100.00')
+        self.assertTrue(orders['TEST123']['is_paid'])
+        self.assertFalse(orders['LIST0']['is_paid'])
+
+    def test_list_orders_pages_by_cursor(self):
+        """Every order is seen exactly once paging forwards, then backwards"""
+        for i in range(6):
+            ShopifyOrder.objects.create(
+                order_reference=f"PAGE{i}",
+                amount=50.00,
+                currency="USD",
+                customer_email="test@example.com",
+                customer_name="Test User"
+            )
+        expected = list(ShopifyOrder.objects.order_by('-created_at', '-id').values_list('order_reference', flat=True))
+
+        seen, pages = [], []
+        url = reverse('api:order-list') + '?page_size=3'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append(response.data)
+            seen += [order['order_reference'] for order in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0]['previous'])
+
+        response = self.client.get(pages[-1]['previous'])
+        self.assertEqual(
+            [order['order_reference'] for order in response.data['results']],
+            [order['order_reference'] for order in pages[1]['results']]
+        )
+        self.assertIsNotNone(response.data['next'])
+
+    def test_list_orders_filters(self):
+        """Status and currency take comma lists; dates bound created_at"""
+        ShopifyOrder.objects.create(
+            order_reference="EUR1",
+            amount=50.00,
+            currency="EUR",
+            status='PROCESSING',
+            customer_email="eu@example.com",
+            customer_name="Test User"
+        )
+        url = reverse('api:order-list')
+
+        response = self.client.get(url, {'currency': 'EUR'})
+        self.assertEqual([order['order_reference'] for order in response.data['results']], ['EUR1'])
+        response = self.client.get(url, {'status': 'PENDING,PROCESSING'})
+        self.assertEqual(len(response.data['results']), 2)
+        response = self.client.get(url, {'customer_email': 'eu@example.com'})
+        self.assertEqual(len(response.data['results']), 1)
+        response = self.client.get(url, {'created_after': '2999-01-01'})
+        self.assertEqual(response.data['results'], [])
+
+    def test_list_orders_rejects_bad_cursor_and_filters(self):
+        url = reverse('api:order-list')
+        self.assertEqual(self.client.get(url, {'cursor': 'not-a-cursor'}).status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(url, {'created_after': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('created_after', response.data)
+
+    def test_list_payments_filtered_by_order(self):
+        other = ShopifyOrder.objects.create(
+            order_reference="TEST456",
+            amount=10.00,
+            currency="USD",
+            customer_email="test2@example.com",
+            customer_name="Test User 2"
+        )
+        payment = PaymentAttempt.objects.create(order=self.order, amount=100.00, status='INITIATED')
+        PaymentAttempt.objects.create(order=other, amount=10.00, status='COMPLETED')
+        url = reverse('api:payment-list')
+
+        response = self.client.get(url, {'order': self.order.id})
+        self.assertEqual([row['id'] for row in response.data['results']], [payment.id])
+        response = self.client.get(url, {'status': 'COMPLETED'})
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(self.client.get(url, {'order': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_orders_default_to_summary(self):
+        """Lists leave out order_data unless asked; detail includes it"""
+        response = self.client.get(reverse('api:order-list'))
+        order = response.data['results'][0]
+        self.assertNotIn('order_data', order)
+        self.assertEqual(order['payment_status'], 'UNPAID')
+
+        response = self.client.get(reverse('api:order-list'), {'fields': 'order_reference,order_data'})
+        self.assertEqual(set(response.data['results'][0]), {'order_reference', 'order_data'})
+
+        response = self.client.get(reverse('api:order-detail', args=[self.order.id]))
+        self.assertIn('order_data', response.data)
+
+    def test_update_answers_with_current_payment_status(self):
+        PaymentAttempt.objects.create(order=self.order, amount=100.00, status='COMPLETED')
+        self.order.refresh_payment_totals()
+        url = reverse('api:order-detail', args=[self.order.id])
+        self.assertEqual(self.client.get(url).data['payment_status'], 'PAID')
+
+        response = self.client.patch(url, {'amount': '150.00'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['payment_status'], 'PARTIALLY_PAID')
+        self.assertEqual(response.data['total_paid'], self.client.get(url).data['total_paid'])
+
+    def test_sparse_fields_are_not_read_from_the_database(self):
+        url = reverse('api:order-list')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'fields': 'order_reference,status'})
+        self.assertEqual(response.data['results'], [{'order_reference': 'TEST123', 'status': 'PENDING'}])
+        sql = queries[-1]['sql']
+        self.assertNotIn('order_data', sql)
+        self.assertNotIn('shopify_paymentattempt', sql)
+
+        response = self.client.get(reverse('api:order-detail', args=[self.order.id]), {'exclude': 'order_data,notes'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('notes', response.data['exclude'][0])
+        response = self.client.get(reverse('api:order-detail', args=[self.order.id]), {'exclude': 'order_data'})
+        self.assertNotIn('order_data', response.data)
+        self.assertIn('updated_at', response.data)
+
+    def test_sample_lookup_by_id_and_prefix(self):
+        self.order.order_data = {'fields': [{'name': 'Field 1', 'crops': [{'name': 'Corn', 'cultivars': [
+            {'name': 'Sweet Corn', 'sample_id': 'SC001'},
+            {'name': 'Sweet Corn', 'sample_id': 'SC002'},
+            {'name': 'Flint Corn', 'sample_id': 'FC001'},
+        ]}]}]}
+        self.order.save()
+        url = reverse('api:sample-list')
+
+        response = self.client.get(url, {'sample_id': 'FC001'})
+        self.assertEqual(response.data['results'], [{
+            'sample_id': 'FC001', 'field': 'Field 1', 'crop': 'Corn', 'cultivar': 'Flint Corn',
+            'position': 2, 'order': self.order.id, 'order_reference': 'TEST123',
+        }])
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'prefix': 'SC'})
+        self.assertEqual([sample['sample_id'] for sample in response.data['results']], ['SC001', 'SC002'])
+
     def test_create_order(self):
         """Test creating a new order"""
         url = reverse('api:order-list')
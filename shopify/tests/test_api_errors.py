@@ -4,6 +4,7 @@ from django.urls import reverse
 from django.contrib.auth.models import User
 from shopify.models import ShopifyOrder, PaymentAttempt
 from unittest.mock import patch
+from shopify.services.render_jobs import PDFJobQueue
 import json
 
 class APIErrorTests(APITestCase):
@@ -33,7 +34,7 @@ class APIErrorTests(APITestCase):
         response = self.client.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
-    @patch('shopify.api.views.PDFGenerator')
+    @patch('shopify.services.render_jobs.PDFGenerator')
     def test_pdf_generation_failure(self, mock_pdf_generator):
         """Test PDF generation failure handling"""
         # Create test order
@@ -45,12 +46,17 @@ class APIErrorTests(APITestCase):
         
         # Mock PDF generator to raise an exception
         mock_instance = mock_pdf_generator.return_value
-        mock_instance.generate_order_pdf.side_effect = Exception("PDF generation failed")
+        mock_instance.render_order_pdf.side_effect = Exception("PDF generation failed")
 
         url = reverse('api:order-pdf-generate', args=[order.id])
         response = self.client.post(url)
-        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
-        self.assertIn('error', response.data)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        # The failure is recorded on the job once the worker runs it
+        PDFJobQueue().run_pending()
+        response = self.client.get(response.data['status_url'])
+        self.assertEqual(response.data['status'], 'FAILED')
+        self.assertEqual(response.data['error_message'], 'PDF generation failed')
 
     def test_unauthorized_access(self):
         """Test unauthorized access to API"""
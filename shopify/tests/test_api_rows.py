@@ -0,0 +1,108 @@
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from unittest import skipIf
+import json
+from ..api import renderers
+from ..api.renderers import FastJSONRenderer
+from ..api.rows import RowSerializer
+from ..api.serializers import ORDER_VALUE_SOURCES, OrderSerializer, PaymentSerializer
+from ..models import PaymentAttempt, ShopifyOrder
+
+class FastJSONRendererTests(SimpleTestCase):
+    data = {
+        'results': [{
+            'amount': Decimal('12.50'),
+            'created_at': datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=dt_timezone.utc),
+            'name': 'Ünïcode \u2028 line',
+            'tags': ('a', 'b'),
+            'empty': None,
+            'order_data': {'depth': 0.00001, 'area': 1e16, 'rate': 2.5},
+        }],
+        'next': None,
+    }
+
+    def test_same_json_as_json_renderer(self):
+        self.assertEqual(
+            json.loads(FastJSONRenderer().render(self.data)),
+            json.loads(JSONRenderer().render(self.data))
+        )
+
+    def test_line_separators_are_escaped(self):
+        self.assertIn(b'\\u2028', FastJSONRenderer().render(self.data))
+
+    def test_indented_output_falls_back(self):
+        media_type = 'application/json; indent=4'
+        self.assertEqual(
+            FastJSONRenderer().render(self.data, media_type),
+            JSONRenderer().render(self.data, media_type)
+        )
+
+    @skipIf(renderers.orjson is None, 'orjson is not installed')
+    def test_unencodable_values_fall_back(self):
+        with self.assertRaises(TypeError):
+            FastJSONRenderer().render({'value': object()})
+
+class RowSerializerTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(user=User.objects.create_user(username='rows', password='rowspass123'))
+        self.orders = [
+            ShopifyOrder.objects.create(
+                order_reference=f'ROW-{i}',
+                amount=Decimal('40.00'),
+                currency='USD',
+                customer_email=f'row{i}@example.com',
+                customer_name=f'Row Üser {i}',
+                order_data={'fields': [{'name': 'Field 1', 'crops': []}]},
+            )
+            for i in range(3)
+        ]
+        PaymentAttempt.objects.create(order=self.orders[0], amount=Decimal('40.00'), status='COMPLETED')
+        PaymentAttempt.objects.create(order=self.orders[1], amount=Decimal('15.00'), status='COMPLETED')
+
+    def test_order_list_matches_model_serializer(self):
+        fields = list(OrderSerializer().fields)
+        response = self.client.get(reverse('api:order-list'), {'fields': ','.join(fields)})
+        queryset = ShopifyOrder.objects.with_payment_summary().order_by('-created_at', '-id')
+        expected = OrderSerializer(queryset, many=True).data
+
+        self.assertEqual(response.json()['results'], [dict(order) for order in expected])
+        self.assertEqual(
+            [order['payment_status'] for order in response.json()['results']],
+            ['UNPAID', 'PARTIALLY_PAID', 'PAID']
+        )
+
+    def test_payment_list_matches_model_serializer(self):
+        response = self.client.get(reverse('api:payment-list'))
+        expected = PaymentSerializer(PaymentAttempt.objects.order_by('-created_at', '-id'), many=True).data
+
+        self.assertEqual(response.json()['results'], [dict(payment) for payment in expected])
+        self.assertEqual(response.json()['results'][0]['order'], self.orders[1].id)
+
+    def test_order_list_uses_one_query(self):
+        with self.assertNumQueries(1):
+            self.client.get(reverse('api:order-list'))
+
+    def test_method_fields_need_a_source(self):
+        with self.assertRaises(ImproperlyConfigured):
+            RowSerializer(OrderSerializer())
+
+        row_serializer = RowSerializer(OrderSerializer(), ORDER_VALUE_SOURCES)
+        self.assertIn('live_total_paid', row_serializer.columns)
+
+    def test_dotted_sources_are_rejected(self):
+        class ReferenceSerializer(serializers.ModelSerializer):
+            order_reference = serializers.CharField(source='order.order_reference')
+
+            class Meta:
+                model = PaymentAttempt
+                fields = ('id', 'order_reference')
+
+        with self.assertRaises(ImproperlyConfigured):
+            RowSerializer(ReferenceSerializer())
@@ -3,7 +3,6 @@ from rest_framework import status
 from django.urls import reverse
 from django.contrib.auth.models import User
 from shopify.models import ShopifyOrder, PaymentAttempt
-from unittest.mock import patch
 import json
 
 class IntegrationTests(APITestCase):
@@ -32,15 +31,11 @@ class IntegrationTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         order_id = response.data['id']
 
-        # 2. Generate PDF for order
-        with patch('shopify.api.views.PDFGenerator') as mock_pdf_generator:
-            mock_instance = mock_pdf_generator.return_value
-            mock_instance.generate_order_pdf.return_value = '/path/to/test.pdf'
-            
-            pdf_url = reverse('api:order-pdf-generate', args=[order_id])
-            response = self.client.post(pdf_url)
-            self.assertEqual(response.status_code, status.HTTP_200_OK)
-            self.assertIn('pdf_url', response.data)
+        # 2. Queue PDF generation for order
+        pdf_url = reverse('api:order-pdf-generate', args=[order_id])
+        response = self.client.post(pdf_url)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertIn('status_url', response.data)
 
         # 3. Create payment for order
         payment_url = reverse('api:payment-list')
@@ -82,18 +77,14 @@ class IntegrationTests(APITestCase):
             )
             orders.append(order)
 
-        # 2. Generate PDFs in batch
-        with patch('shopify.api.views.PDFGenerator') as mock_pdf_generator:
-            mock_instance = mock_pdf_generator.return_value
-            mock_instance.generate_order_pdf.return_value = '/path/to/test.pdf'
-            
-            url = reverse('api:batch-pdf-generate')
-            data = {
-                'order_ids': [order.id for order in orders]
-            }
-            response = self.client.post(url, data, format='json')
-            self.assertEqual(response.status_code, status.HTTP_200_OK)
-            self.assertEqual(len(response.data['pdf_urls']), 3)
+        # 2. Queue PDFs in batch
+        url = reverse('api:batch-pdf-generate')
+        data = {
+            'order_ids': [order.id for order in orders]
+        }
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['total'], 3)
 
         # 3. Verify all orders
         for order in orders:
@@ -1,7 +1,13 @@
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.core.exceptions import ValidationError
 from decimal import Decimal
-from ..models import ShopifyOrder, PaymentAttempt
+import io
+import json
+from ..models import ShopifyOrder, PaymentAttempt, Sample
 
 class ShopifyOrderTests(TestCase):
     def setUp(self):
@@ -44,6 +50,133 @@ class ShopifyOrderTests(TestCase):
         )
         self.assertEqual(self.order.payment_status, 'PAID')
 
+    def test_payment_totals_are_stored(self):
+        payment = PaymentAttempt.objects.create(
+            order=self.order,
+            amount=Decimal('40.00'),
+            status='COMPLETED'
+        )
+        PaymentAttempt.objects.create(order=self.order, amount=Decimal('60.00'), status='FAILED')
+
+        order = ShopifyOrder.objects.get(pk=self.order.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(order.total_paid, Decimal('40.00'))
+            self.assertEqual(order.payment_count, 1)
+            self.assertEqual(order.payment_status, 'PARTIALLY_PAID')
+            self.assertTrue(order.is_paid)
+
+        payment.refund()
+        order.refresh_from_db()
+        self.assertEqual((order.total_paid, order.payment_count), (Decimal('0.00'), 0))
+        self.assertEqual(order.payment_status, 'UNPAID')
+
+    def test_stale_save_keeps_payment_totals(self):
+        stale = ShopifyOrder.objects.get(pk=self.order.pk)
+        PaymentAttempt.objects.create(order=self.order, amount=Decimal('40.00'), status='COMPLETED')
+
+        stale.status = 'PROCESSING'
+        stale.save()
+
+        stored = ShopifyOrder.objects.get(pk=self.order.pk)
+        self.assertEqual(stored.status, 'PROCESSING')
+        self.assertEqual((stored.total_paid, stored.payment_count), (Decimal('40.00'), 1))
+        self.assertEqual(stored.payment_status, 'PARTIALLY_PAID')
+
+    def test_amount_change_restates_payment_status(self):
+        PaymentAttempt.objects.create(order=self.order, amount=Decimal('40.00'), status='COMPLETED')
+        stale = ShopifyOrder.objects.get(pk=self.order.pk)
+        PaymentAttempt.objects.create(order=self.order, amount=Decimal('20.00'), status='COMPLETED')
+
+        stale.amount = Decimal('60.00')
+        stale.save(update_fields=['amount'])
+        self.assertEqual((stale.total_paid, stale.payment_status), (Decimal('60.00'), 'PAID'))
+
+        stale.amount = Decimal('80.00')
+        stale.save()
+        stored = ShopifyOrder.objects.get(pk=self.order.pk)
+        self.assertEqual((stored.total_paid, stored.payment_status), (Decimal('60.00'), 'PARTIALLY_PAID'))
+
+    def test_payment_totals_command_rebuilds_drift(self):
+        PaymentAttempt.objects.create(order=self.order, amount=Decimal('100.00'), status='COMPLETED')
+        ShopifyOrder.objects.filter(pk=self.order.pk).update(total_paid=0, payment_status='UNPAID')
+
+        with self.assertRaises(CommandError):
+            call_command('payment_totals', '--check', stdout=io.StringIO())
+        call_command('payment_totals', stdout=io.StringIO())
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_paid, Decimal('100.00'))
+        self.assertEqual(self.order.payment_status, 'PAID')
+        call_command('payment_totals', '--check', stdout=io.StringIO())
+
+    def test_payment_summary_annotations(self):
+        PaymentAttempt.objects.create(order=self.order, amount=Decimal('30.00'), status='COMPLETED')
+        PaymentAttempt.objects.create(order=self.order, amount=Decimal('70.00'), status='FAILED')
+        unpaid = ShopifyOrder.objects.create(
+            order_reference='TEST125',
+            amount=Decimal('10.00'),
+            currency='USD',
+            customer_email='test@example.com',
+            customer_name='Test User'
+        )
+
+        orders = ShopifyOrder.objects.with_payment_summary().in_bulk([self.order.pk, unpaid.pk])
+
+        order = orders[self.order.pk]
+        self.assertEqual(order.live_total_paid, Decimal('30.00'))
+        self.assertEqual(order.live_payment_count, 1)
+        self.assertTrue(order.live_is_paid)
+        self.assertEqual(order.live_payment_status, 'PARTIALLY_PAID')
+        self.assertEqual(orders[unpaid.pk].live_total_paid, Decimal('0.00'))
+        self.assertFalse(orders[unpaid.pk].live_is_paid)
+        self.assertEqual(orders[unpaid.pk].live_payment_status, 'UNPAID')
+
+    def test_samples_follow_order_data(self):
+        self.order.order_data = {'fields': [{'name': 'North', 'crops': [{'name': 'Corn', 'cultivars': [
+            {'name': 'Sweet Corn', 'sample_id': 'SC001'},
+            {'name': 'Dent Corn', 'sample_id': 'SC002'},
+            {'name': 'No ID'},
+        ]}]}]}
+        self.order.save()
+
+        self.assertEqual(
+            list(self.order.samples.values_list('position', 'field', 'crop', 'cultivar', 'sample_id')),
+            [(0, 'North', 'Corn', 'Sweet Corn', 'SC001'), (1, 'North', 'Corn', 'Dent Corn', 'SC002')]
+        )
+
+        # Saves that leave order_data as stored do not touch the rows
+        with CaptureQueriesContext(connection) as queries:
+            self.order.save()
+            self.order.cancel()
+        self.assertFalse([query for query in queries if 'shopify_sample' in query['sql']])
+
+        self.order.order_data['fields'][0]['crops'][0]['cultivars'].pop(0)
+        self.order.save(update_fields=['order_data'])
+        self.assertEqual(list(self.order.samples.values_list('sample_id', flat=True)), ['SC002'])
+
+    def test_sample_ids_must_fit_the_table(self):
+        self.order.order_data = {'fields': [{'name': 'F', 'crops': [{'name': 'C', 'cultivars': [
+            {'name': 'K', 'sample_id': 'S' * 256},
+        ]}]}]}
+        with self.assertRaises(ValidationError):
+            self.order.save()
+
+    def test_backfill_samples_command(self):
+        self.order.order_data = {'fields': [{'name': 'F', 'crops': [{'name': 'C', 'cultivars': [
+            {'name': 'K', 'sample_id': 'BF001'},
+        ]}]}]}
+        self.order.save()
+        Sample.objects.all().delete()
+
+        with self.assertRaises(CommandError):
+            call_command('backfill_samples', '--check', stdout=io.StringIO())
+        out = io.StringIO()
+        call_command('backfill_samples', stdout=out)
+
+        self.assertEqual(json.loads(out.getvalue())['drifted'], ['TEST123'])
+        self.assertTrue(Sample.objects.filter(order=self.order, sample_id='BF001').exists())
+        call_command('backfill_samples', '--check', stdout=io.StringIO())
+
     def test_cancel_order(self):
         self.assertTrue(self.order.can_cancel())
         self.order.cancel()
@@ -0,0 +1,150 @@
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from decimal import Decimal
+from rest_framework.test import APITestCase
+import io
+import json
+import os
+import tempfile
+from ..models import Sample, ShopifyOrder
+from ..services.order_import import OrderImporter, iter_ndjson
+
+def order_row(reference, **overrides):
+    row = {
+        'order_reference': reference,
+        'amount': '25.00',
+        'currency': 'USD',
+        'customer_email': 'lab@example.com',
+        'customer_name': 'Lab Customer',
+        'order_data': {'fields': [{'name': 'Field 1', 'crops': [{'name': 'Corn', 'cultivars': [
+            {'name': 'Sweet Corn', 'sample_id': f'{reference}-1'},
+            {'name': 'Sweet Corn', 'sample_id': f'{reference}-2'},
+        ]}]}]},
+    }
+    row.update(overrides)
+    return row
+
+def ndjson(*rows):
+    return ''.join(f"{json.dumps(row)}\n" for row in rows).encode()
+
+class OrderImporterTests(TestCase):
+    def setUp(self):
+        ShopifyOrder.objects.create(**order_row('EXISTING'))
+
+    def test_valid_rows_are_created_with_render_cost(self):
+        report = OrderImporter().import_rows(enumerate([order_row('IMP-1'), order_row('IMP-2')], 1))
+
+        self.assertEqual((report.created, report.failed), (2, 0))
+        order = ShopifyOrder.objects.get(order_reference='IMP-1')
+        self.assertEqual(order.amount, Decimal('25.00'))
+        self.assertEqual(order.sample_count, 2)
+        self.assertEqual(order.payment_status, 'UNPAID')
+
+    def test_each_bad_row_is_reported(self):
+        lines = ndjson(
+            order_row('IMP-1'),
+            order_row('IMP-2', currency='XXX'),
+            order_row('EXISTING'),
+            order_row('IMP-1'),
+            order_row('IMP-3', colour='red'),
+        ) + b'{not json\n\n' + ndjson(order_row('IMP-4'))
+
+        report = OrderImporter(chunk_size=3).import_rows(iter_ndjson(io.BytesIO(lines)))
+
+        self.assertEqual(report.created, 2)
+        errors = {error['row']: error for error in report.errors}
+        self.assertEqual(sorted(errors), [2, 3, 4, 5, 6])
+        self.assertIn('currency', errors[2]['errors'])
+        self.assertIn('order_reference', errors[3]['errors'])
+        self.assertIn('order_reference', errors[4]['errors'])
+        self.assertIn('colour', errors[5]['errors']['__all__'][0])
+        self.assertIn('Invalid JSON', errors[6]['errors']['__all__'][0])
+        self.assertEqual(
+            set(ShopifyOrder.objects.values_list('order_reference', flat=True)),
+            {'EXISTING', 'IMP-1', 'IMP-4'}
+        )
+
+    def test_misshapen_order_data_is_reported(self):
+        shapes = [
+            [1],
+            {'fields': 'abc'},
+            {'fields': [1]},
+            {'fields': [{'name': 'Field 1', 'crops': [{'name': 'Corn', 'cultivars': 'SC001'}]}]},
+        ]
+        rows = [order_row(f'BAD-{i}', order_data=shape) for i, shape in enumerate(shapes)]
+
+        report = OrderImporter().import_rows(enumerate(rows + [order_row('IMP-1')], 1))
+
+        self.assertEqual((report.created, report.failed), (1, 4))
+        messages = [error['errors']['order_data'][0] for error in report.errors]
+        self.assertEqual(messages, [
+            'Order data must be a JSON object',
+            'fields must be a list of objects',
+            'fields must be a list of objects',
+            'fields[0].crops[0].cultivars must be a list of objects',
+        ])
+
+    def test_queries_per_chunk_not_per_row(self):
+        rows = [order_row(f'IMP-{i}') for i in range(50)]
+
+        # Per chunk: the reference lookup, plus the order and sample inserts in a savepoint
+        with self.assertNumQueries(5):
+            report = OrderImporter(chunk_size=100).import_rows(enumerate(rows, 1))
+        self.assertEqual(report.created, 50)
+        self.assertEqual(Sample.objects.filter(order__order_reference='IMP-7').count(), 2)
+
+    def test_error_list_is_capped(self):
+        importer = OrderImporter()
+        importer.MAX_ERRORS = 2
+        report = importer.import_rows(enumerate([order_row('EXISTING')] * 5, 1))
+
+        self.assertEqual(report.failed, 5)
+        self.assertEqual(len(report.errors), 2)
+        self.assertTrue(report.as_dict()['errors_truncated'])
+
+    def test_import_orders_command(self):
+        with tempfile.NamedTemporaryFile('wb', suffix='.ndjson', delete=False) as upload:
+            upload.write(ndjson(order_row('CMD-1'), order_row('CMD-2')))
+        self.addCleanup(os.remove, upload.name)
+
+        out = io.StringIO()
+        call_command('import_orders', upload.name, stdout=out)
+
+        self.assertEqual(json.loads(out.getvalue())['created'], 2)
+
+class BulkOrderAPITests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(user=User.objects.create_user(username='bulk', password='bulkpass123'))
+        self.url = reverse('api:order-bulk')
+
+    def test_ndjson_body(self):
+        response = self.client.generic(
+            'POST', self.url, ndjson(order_row('NDJ-1'), order_row('NDJ-2', amount='0')),
+            content_type='application/x-ndjson'
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['errors'][0]['row'], 2)
+        self.assertIn('amount', response.data['errors'][0]['errors'])
+
+    def test_ndjson_file_upload(self):
+        upload = SimpleUploadedFile('orders.ndjson', ndjson(*(order_row(f'FILE-{i}') for i in range(5))))
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 5)
+
+    def test_json_list(self):
+        response = self.client.post(self.url, {'orders': [order_row('JSON-1')]}, format='json')
+        self.assertEqual(response.data['created'], 1)
+
+        response = self.client.post(self.url, {'orders': [order_row('JSON-1')]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['failed'], 1)
+
+        response = self.client.post(self.url, {'orders': 'JSON-2'}, format='json')
+        self.assertEqual(response.status_code, 400)
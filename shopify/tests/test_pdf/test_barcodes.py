@@ -0,0 +1,98 @@
+from django.test import SimpleTestCase
+from reportlab.pdfgen import canvas
+from unittest import skipIf
+from unittest.mock import patch
+import io
+import PyPDF2
+from ...services import barcodes
+from ...services.barcodes import (
+    CODE128_QUIET_MODULES,
+    SYMBOLOGY_CODE128,
+    SYMBOLOGY_QR,
+    draw_barcode,
+    encode_barcode,
+    encode_barcodes,
+)
+from ...services.pdf_generator import PDFGenerator
+
+class BarcodeTests(SimpleTestCase):
+    def setUp(self):
+        encode_barcode.cache_clear()
+
+    def test_code128_geometry(self):
+        shape = encode_barcode('SC001', SYMBOLOGY_CODE128)
+
+        # Start, five data symbols and check symbol at 11 modules, stop at
+        # 13, inside a quiet zone on each side
+        quiet = CODE128_QUIET_MODULES
+        self.assertEqual(shape.columns, quiet + 11 * 7 + 13 + quiet)
+        self.assertEqual(shape.rows, 1)
+        self.assertTrue(shape.ops.startswith(f'{quiet} 0 '))
+        last_bar = shape.ops[:-len(' re f')].split(' re ')[-1].split()
+        self.assertEqual(int(last_bar[0]) + int(last_bar[2]), shape.columns - quiet)
+        self.assertTrue(shape.ops.endswith(' re f'))
+
+    def test_ids_code128_cannot_hold_fall_back_to_qr(self):
+        # reportlab would encode these as '-12', '1' and FNC1 followed by '1'
+        for value in ('Ü-12', '样本1', '\xf11'):
+            with self.subTest(value=value):
+                shape = encode_barcode(value, SYMBOLOGY_CODE128)
+                self.assertEqual(shape.symbology, SYMBOLOGY_QR)
+                self.assertEqual(shape, encode_barcode(value, SYMBOLOGY_QR))
+
+    def test_qr_is_square(self):
+        shape = encode_barcode('SC001', SYMBOLOGY_QR)
+
+        self.assertEqual(shape.columns, shape.rows)
+        rects = shape.ops[:-2].split(' re')[:-1]
+        self.assertTrue(all(0 <= int(rect.split()[1]) < shape.rows for rect in rects))
+
+    @skipIf(barcodes.segno is None, 'segno is not installed')
+    def test_qr_backends_agree_on_size(self):
+        with_segno = encode_barcode('SC001', SYMBOLOGY_QR)
+        encode_barcode.cache_clear()
+        with patch.object(barcodes, 'segno', None):
+            without = encode_barcode('SC001', SYMBOLOGY_QR)
+
+        self.assertEqual((with_segno.columns, with_segno.rows), (21, 21))
+        self.assertEqual((without.columns, without.rows), (21, 21))
+
+    def test_unknown_symbology(self):
+        with self.assertRaises(ValueError):
+            encode_barcode('SC001', 'ean13')
+
+    def test_batch_encoding_encodes_each_value_once(self):
+        shapes = encode_barcodes(['SC001', 'SC002', 'SC001'])
+
+        self.assertEqual(list(shapes), ['SC001', 'SC002'])
+        self.assertEqual(encode_barcode.cache_info().misses, 2)
+        encode_barcode('SC001')
+        self.assertEqual(encode_barcode.cache_info().hits, 1)
+
+    def test_draw_barcode_scales_into_box(self):
+        c = canvas.Canvas(io.BytesIO())
+
+        draw_barcode(c, encode_barcode('SC001'), 10, 20, 90, 15)
+        draw_barcode(c, encode_barcode('SC001', SYMBOLOGY_QR), 10, 20, 90, 15)
+
+        # Code128 and its quiet zones (110 modules) stretch to the box; QR
+        # keeps square modules sized by the height
+        self.assertIn('q .818182 0 0 15 10 20 cm', c._code[-2])
+        self.assertIn('q .714286 0 0 .714286 10 20 cm', c._code[-1])
+
+    def test_labels_include_each_barcode(self):
+        order_data = {
+            'fields': [{'name': 'Field 1', 'crops': [{'name': 'Corn', 'cultivars': [
+                {'name': 'Sweet Corn', 'sample_id': f'SC{i:03}'} for i in range(3)
+            ]}]}]
+        }
+
+        for symbology in (SYMBOLOGY_CODE128, SYMBOLOGY_QR):
+            with self.subTest(symbology=symbology):
+                pdf_data = PDFGenerator(barcode=symbology).generate_sample_labels(order_data)
+                page = PyPDF2.PdfReader(io.BytesIO(pdf_data)).pages[0]
+                content = page.get_contents().get_data()
+
+                for i in range(3):
+                    self.assertIn(encode_barcode(f'SC{i:03}', symbology).ops.encode(), content)
+                self.assertIn('SC002', page.extract_text())
@@ -0,0 +1,138 @@
+from django.test import TestCase
+from django.urls import reverse
+from decimal import Decimal
+from unittest.mock import patch
+import PyPDF2
+import io
+from ...models import ShopifyOrder
+from ...services.batch_pdf_generator import BatchPDFGenerator
+from ...services.pdf_stream import StreamingPDFWriter
+from ...services.render_pool import shutdown_render_pool
+
+class BatchPDFGeneratorTests(TestCase):
+    def setUp(self):
+        self.orders = []
+        for i in range(3):
+            self.orders.append(ShopifyOrder.objects.create(
+                order_reference=f'BATCH-{i}',
+                amount=Decimal('100.00'),
+                currency='USD',
+                customer_email=f'batch{i}@example.com',
+                customer_name=f'Batch User {i}',
+                order_data={
+                    'fields': [{
+                        'name': 'Field 1',
+                        'crops': [{
+                            'name': 'Corn',
+                            'cultivars': [{'name': 'Sweet Corn', 'sample_id': f'SC{i:03}'}]
+                        }]
+                    }]
+                }
+            ))
+        self.order_ids = [order.id for order in reversed(self.orders)]
+
+    def page_texts(self, pdf_data):
+        return [page.extract_text() for page in PyPDF2.PdfReader(io.BytesIO(pdf_data)).pages]
+
+    def test_every_mode_keeps_requested_order(self):
+        for mode in BatchPDFGenerator.MODES:
+            with self.subTest(mode=mode):
+                if mode == BatchPDFGenerator.MODE_PARALLEL:
+                    self.addCleanup(shutdown_render_pool)
+                pdf_data = BatchPDFGenerator(workers=2).generate_batch_pdf(self.order_ids, mode=mode)
+
+                texts = self.page_texts(pdf_data)
+                self.assertEqual(len(texts), 3)
+                for text, sample_id in zip(texts, ['SC002', 'SC001', 'SC000']):
+                    self.assertIn(sample_id, text)
+
+    def test_single_canvas_bookmarks_each_order(self):
+        pdf_data = BatchPDFGenerator().generate_batch_pdf(
+            self.order_ids, mode=BatchPDFGenerator.MODE_CANVAS
+        )
+
+        reader = PyPDF2.PdfReader(io.BytesIO(pdf_data))
+        self.assertEqual(
+            [item.title for item in reader.outline],
+            ['BATCH-2', 'BATCH-1', 'BATCH-0']
+        )
+        self.assertEqual(
+            [reader.get_destination_page_number(item) for item in reader.outline],
+            [0, 1, 2]
+        )
+
+    def test_single_canvas_is_the_default(self):
+        generator = BatchPDFGenerator(workers=8)
+        self.assertEqual(generator.choose_mode(1000), BatchPDFGenerator.MODE_CANVAS)
+        with self.settings(PDF_BATCH_MODE=BatchPDFGenerator.MODE_PARALLEL):
+            self.assertEqual(generator.choose_mode(1000), BatchPDFGenerator.MODE_PARALLEL)
+            self.assertEqual(generator.choose_mode(2), BatchPDFGenerator.MODE_CANVAS)
+
+    def test_single_canvas_bookmarks_repeated_orders(self):
+        order_ids = [self.orders[0].id, self.orders[1].id, self.orders[0].id]
+        pdf_data = BatchPDFGenerator().generate_batch_pdf(order_ids, mode=BatchPDFGenerator.MODE_CANVAS)
+
+        reader = PyPDF2.PdfReader(io.BytesIO(pdf_data))
+        self.assertEqual(
+            [reader.get_destination_page_number(item) for item in reader.outline],
+            [0, 1, 2]
+        )
+
+    def test_parallel_batch_matches_serial(self):
+        self.addCleanup(shutdown_render_pool)
+        generator = BatchPDFGenerator(workers=2, chunksize=1)
+
+        parallel = generator.generate_batch_pdf(self.order_ids, mode=BatchPDFGenerator.MODE_PARALLEL)
+        serial = generator.generate_batch_pdf(self.order_ids, mode=BatchPDFGenerator.MODE_MERGE)
+
+        self.assertEqual(self.page_texts(parallel), self.page_texts(serial))
+
+    def test_merge_writes_shared_resources_once(self):
+        generator = BatchPDFGenerator()
+        documents = list(generator.render_documents([order.order_data for order in self.orders]))
+
+        shared, separate = io.BytesIO(), io.BytesIO()
+        writers = [StreamingPDFWriter(shared), StreamingPDFWriter(separate, dedupe=False)]
+        for writer in writers:
+            for pdf_data in documents:
+                writer.append(pdf_data)
+            writer.close()
+
+        self.assertGreater(writers[0].objects_reused, 0)
+        self.assertEqual(writers[1].objects_reused, 0)
+        self.assertLess(len(shared.getvalue()), len(separate.getvalue()))
+        self.assertEqual(self.page_texts(shared.getvalue()), self.page_texts(separate.getvalue()))
+
+    def test_missing_order_raises(self):
+        with self.assertRaises(ShopifyOrder.DoesNotExist):
+            BatchPDFGenerator().generate_batch_pdf([self.orders[0].id, 999999])
+
+    def test_stream_yields_before_batch_is_rendered(self):
+        generator = BatchPDFGenerator()
+        with patch.object(
+            generator.pdf_generator,
+            'generate_sample_labels',
+            wraps=generator.pdf_generator.generate_sample_labels
+        ) as render:
+            stream = generator.stream_batch_pdf(self.order_ids)
+            first_chunk = next(stream)
+            self.assertTrue(first_chunk.startswith(b'%PDF'))
+            self.assertEqual(render.call_count, 1)
+            pdf_data = first_chunk + b''.join(stream)
+
+        reader = PyPDF2.PdfReader(io.BytesIO(pdf_data))
+        self.assertEqual(len(reader.pages), 3)
+        self.assertIn('SC002', reader.pages[0].extract_text())
+        self.assertEqual([item.title for item in reader.outline], ['BATCH-2', 'BATCH-1', 'BATCH-0'])
+
+    def test_stream_rejects_missing_orders_before_sending(self):
+        with self.assertRaises(ShopifyOrder.DoesNotExist):
+            BatchPDFGenerator().stream_batch_pdf([self.orders[0].id, 999999])
+
+    def test_batch_download_streams_response(self):
+        response = self.client.post(reverse('shopify:batch_download'), {'order_ids': self.order_ids})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        pdf_data = b''.join(response.streaming_content)
+        self.assertEqual(len(PyPDF2.PdfReader(io.BytesIO(pdf_data)).pages), 3)
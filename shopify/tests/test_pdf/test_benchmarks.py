@@ -0,0 +1,17 @@
+from django.test import SimpleTestCase
+from ...benchmarks.compare import compare_results
+
+class CompareResultsTests(SimpleTestCase):
+    def test_flags_only_changes_in_the_wrong_direction(self):
+        baseline = {'small': {'single': {'timing': {'mean_ms': 10.0}, 'pages_per_sec': 100.0, 'pdf_bytes': 1000}}}
+        current = {'small': {'single': {'timing': {'mean_ms': 12.0}, 'pages_per_sec': 120.0, 'pdf_bytes': 1050}}}
+
+        changes = {change['metric']: change for change in compare_results(baseline, current, 0.1)}
+
+        self.assertTrue(changes['small.single.timing.mean_ms']['regression'])
+        self.assertFalse(changes['small.single.pages_per_sec']['regression'])
+        self.assertFalse(changes['small.single.pdf_bytes']['regression'])
+        self.assertEqual(changes['small.single.pdf_bytes']['change'], 0.05)
+
+    def test_ignores_metrics_missing_from_baseline(self):
+        self.assertEqual(compare_results({}, {'mean_ms': 5.0}), [])
@@ -0,0 +1,201 @@
+from django.test import TestCase, override_settings
+from django.core.cache import caches
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework.test import APIClient
+from decimal import Decimal
+from unittest.mock import patch
+import os
+import shutil
+import tempfile
+from ...models import PDFRenderJob, ShopifyOrder
+from ...services.cache_manager import PDFCacheManager
+from ...services.render_jobs import PDFJobQueue, schedule_prewarm
+from ...services.tiered_cache import LocalLRUCache, TieredPDFCache, get_local_cache
+
+class PDFCacheManagerTests(TestCase):
+    def setUp(self):
+        caches['pdf'].clear()
+        get_local_cache().clear()
+        self.cache_manager = PDFCacheManager()
+        self.cache_manager.reset_stats()
+        self.order_data = {
+            'fields': [{
+                'name': 'Field 1',
+                'crops': [{'name': 'Corn', 'cultivars': [{'name': 'Sweet Corn 1', 'sample_id': 'SC001'}]}]
+            }]
+        }
+
+    def test_key_ignores_dict_ordering(self):
+        reordered = {
+            'fields': [{
+                'crops': [{'cultivars': [{'sample_id': 'SC001', 'name': 'Sweet Corn 1'}], 'name': 'Corn'}],
+                'name': 'Field 1'
+            }]
+        }
+        self.assertEqual(
+            self.cache_manager.get_cache_key(self.order_data),
+            self.cache_manager.get_cache_key(reordered)
+        )
+
+    def test_key_changes_with_content_and_template_version(self):
+        edited = {'fields': [dict(self.order_data['fields'][0], name='Field 2')]}
+        key = self.cache_manager.get_cache_key(self.order_data)
+
+        self.assertNotEqual(key, self.cache_manager.get_cache_key(edited))
+        self.assertNotEqual(key, PDFCacheManager(template_version='next').get_cache_key(self.order_data))
+
+    def test_get_or_render_counts_hits_and_misses(self):
+        renders = []
+
+        def render(order_data):
+            renders.append(order_data)
+            return b'%PDF-test'
+
+        self.assertEqual(self.cache_manager.get_or_render(self.order_data, render), b'%PDF-test')
+        # A different order with identical content is served from the same entry
+        self.assertEqual(self.cache_manager.get_or_render(dict(self.order_data), render), b'%PDF-test')
+
+        self.assertEqual(len(renders), 1)
+        stats = self.cache_manager.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['hit_ratio']), (1, 1, 0.5))
+        self.assertEqual(stats['tiers']['local']['hits'], 1)
+
+    def test_stats_endpoint_requires_staff(self):
+        client = APIClient()
+        url = reverse('api:pdf-cache-stats')
+        client.force_authenticate(User.objects.create_user('lab', password='labpass123'))
+        self.assertEqual(client.get(url).status_code, 403)
+
+        client.force_authenticate(User.objects.create_user('admin', password='adminpass123', is_staff=True))
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['hits'], 0)
+
+class TieredPDFCacheTests(TestCase):
+    def setUp(self):
+        caches['pdf'].clear()
+        self.local = LocalLRUCache(max_bytes=100, max_entry_bytes=60)
+        self.tiered = TieredPDFCache(alias='pdf', local=self.local)
+        self.tiered.reset_stats()
+
+    def test_local_tier_is_bounded_by_bytes(self):
+        self.local.set('a', b'x' * 40, 60)
+        self.local.set('b', b'x' * 40, 60)
+        self.local.get('a')  # 'b' becomes least recently used
+        evicted = self.local.set('c', b'x' * 40, 60)
+
+        self.assertEqual(list(evicted), ['b'])
+        self.assertEqual(self.local.size, 80)
+        self.assertEqual(self.local.set('huge', b'x' * 61, 60), {})
+        self.assertIsNone(self.local.get('huge'))
+
+    def test_values_are_compressed_and_promoted_from_shared_tier(self):
+        pdf_data = b'%PDF-1.4 ' + b'0 0 m 10 10 l S ' * 200
+        self.tiered.set('key', pdf_data, 60)
+        self.assertLess(len(caches['pdf'].get('key')), len(pdf_data))
+
+        self.local.clear()
+        self.assertEqual(self.tiered.get('key'), pdf_data)
+        self.assertEqual(self.tiered.stats()['shared']['hits'], 1)
+        # Second read is served by the promoted local copy
+        self.assertEqual(self.tiered.get('key'), pdf_data)
+        self.assertEqual(self.local.stats()['hits'], 1)
+
+    def test_counters_are_flushed_in_batches(self):
+        self.tiered.set('key', b'%PDF', 60)
+        with patch.object(caches['pdf'], 'incr', wraps=caches['pdf'].incr) as incr:
+            for _ in range(5):
+                self.tiered.get('key')
+            self.local.clear()
+            self.tiered.get('key')
+            self.assertEqual(incr.call_count, 0)
+            self.assertEqual(self.tiered.stats()['shared']['hits'], 1)
+        self.assertIn('pdf_tier_shared_hits', caches['pdf'].get_many(['pdf_tier_shared_hits']))
+
+    def test_entries_without_timeout_never_expire(self):
+        self.local.set('forever', b'x', None)
+        self.assertEqual(self.local.get('forever'), b'x')
+
+    def test_local_evictions_are_demoted_to_shared_tier(self):
+        # Random bytes don't compress, so each entry takes ~40 of the 100 byte budget
+        self.tiered.set('a', os.urandom(40), 60)
+        caches['pdf'].delete('a')  # Shared tier dropped it first
+        for key in ('b', 'c'):
+            self.tiered.set(key, os.urandom(40), 60)
+
+        self.assertIsNotNone(caches['pdf'].get('a'))
+
+@override_settings(PDF_CACHE_PREWARM=True)
+class PDFCacheSignalTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        caches['pdf'].clear()
+        get_local_cache().clear()
+        self.cache_manager = PDFCacheManager()
+        self.cache_manager.reset_stats()
+        self.order_data = {
+            'fields': [{
+                'name': 'Field 1',
+                'crops': [{'name': 'Corn', 'cultivars': [{'name': 'Sweet Corn 1', 'sample_id': 'SC001'}]}]
+            }]
+        }
+        with patch('shopify.signals.schedule_prewarm'):
+            self.order = ShopifyOrder.objects.create(
+                order_reference='SIG-001',
+                amount=Decimal('100.00'),
+                currency='USD',
+                customer_email='sig@example.com',
+                customer_name='Signal User',
+                order_data=self.order_data
+            )
+        self.cache_manager.save_pdf(self.order_data, b'%PDF-old')
+
+    def test_editing_order_data_prewarms(self):
+        new_data = {'fields': [dict(self.order_data['fields'][0], name='Field 2')]}
+
+        with patch('shopify.signals.schedule_prewarm') as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.order.order_data = new_data
+                self.order.save()
+
+        schedule.assert_called_once_with(self.order)
+        # Nothing looks the old content up any more; it ages out of the cache
+        self.assertFalse(self.cache_manager.has_pdf(new_data))
+
+    def test_status_change_keeps_cached_labels(self):
+        with patch('shopify.signals.schedule_prewarm') as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.order.status = 'PROCESSING'
+                self.order.save()
+
+        self.assertEqual(self.cache_manager.get_pdf(self.order_data), b'%PDF-old')
+        schedule.assert_not_called()
+
+    def test_prewarm_queues_a_labels_job(self):
+        new_data = {'fields': [dict(self.order_data['fields'][0], name='Field 3')]}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order.order_data = new_data
+            self.order.save()
+
+        job = PDFRenderJob.objects.get()
+        self.assertEqual(job.kind, PDFRenderJob.KIND_LABELS)
+        self.assertEqual(job.priority, PDFRenderJob.PRIORITY_LOW)
+        self.assertEqual(job.lane, PDFRenderJob.LANE_INTERACTIVE)
+
+        with override_settings(MEDIA_ROOT=self.media_root):
+            PDFJobQueue().run_pending('worker-1')
+        self.assertTrue(self.cache_manager.get_pdf(new_data).startswith(b'%PDF'))
+
+    def test_prewarm_skips_cached_content(self):
+        self.assertIsNone(schedule_prewarm(self.order))
+        self.assertFalse(PDFRenderJob.objects.exists())
+
+    def test_prewarm_skips_orders_without_samples(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order.order_data = {'fields': []}
+            self.order.save()
+
+        self.assertEqual(self.order.sample_count, 0)
+        self.assertFalse(PDFRenderJob.objects.exists())
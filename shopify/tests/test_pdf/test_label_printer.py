@@ -0,0 +1,146 @@
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from decimal import Decimal
+from ...models import PDFRenderJob, ShopifyOrder
+from ...services.barcodes import SYMBOLOGY_QR
+from ...services.error_handler import PDFGenerationError
+from ...services.label_printer import EPLRenderer, ZPLRenderer, get_printer_renderer
+
+def order_data(*sample_ids, cultivar='Sweet Corn'):
+    return {
+        'fields': [{'name': 'Field 1', 'crops': [{'name': 'Corn', 'cultivars': [
+            {'name': cultivar, 'sample_id': sample_id} for sample_id in sample_ids
+        ]}]}]
+    }
+
+class LabelPrinterTests(SimpleTestCase):
+    def test_zpl_stores_the_format_once_and_recalls_it_per_label(self):
+        commands = ZPLRenderer().render(order_data('SC001', 'SC002', 'SC003')).decode()
+
+        self.assertEqual(commands.count('^DFR:APSAMPLE.ZPL'), 1)
+        self.assertEqual(commands.count('^XFR:APSAMPLE.ZPL'), 3)
+        self.assertIn('^FDCROP / FIELD^FS', commands)
+        self.assertIn('^FN1^FDSC002^FS', commands)
+        self.assertIn('^FN4^FDSC002^FS', commands)
+        self.assertIn('^BCN,', commands)
+
+    def test_zpl_escapes_control_characters(self):
+        commands = ZPLRenderer().render(order_data('SC_1', cultivar='A^B~C')).decode()
+
+        self.assertIn('^FN1^FH^FDSC_5F1^FS', commands)
+        self.assertIn('^FDA_5EB_7EC^FS', commands)
+
+    def test_zpl_qr_field_data(self):
+        commands = ZPLRenderer(barcode=SYMBOLOGY_QR).render(order_data('SC001')).decode()
+
+        self.assertIn('^BQN,2,', commands)
+        self.assertIn('^FN4^FDMA,SC001^FS', commands)
+
+    def test_zpl_prints_ids_code128_cannot_hold_as_qr(self):
+        commands = ZPLRenderer().render(order_data('SC001', 'Ü-12')).decode()
+
+        self.assertIn('^FN4^FDSC001^FS', commands)
+        self.assertNotIn('^FN4^FDÜ-12^FS', commands)
+        self.assertIn('^BQN,2,', commands.split('^XFR:APSAMPLE.ZPL')[2])
+        self.assertIn('^FDMA,Ü-12^FS', commands)
+
+    def test_epl_prints_one_label_per_sample(self):
+        commands = EPLRenderer().render(order_data('SC001', 'SC"2')).decode('latin-1')
+
+        self.assertEqual(commands.count('\nP1\n'), 2)
+        self.assertIn('"SC001"', commands)
+        self.assertIn('"SC\\"2"', commands)
+
+    def test_epl_refuses_ids_code128_cannot_hold(self):
+        with self.assertRaises(PDFGenerationError):
+            EPLRenderer().render(order_data('SC001', '样本1'))
+
+    def test_epl_rejects_qr(self):
+        with self.assertRaises(ValueError):
+            EPLRenderer(barcode=SYMBOLOGY_QR)
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            get_printer_renderer('pcl')
+
+class LabelPrinterViewTests(TestCase):
+    def setUp(self):
+        self.orders = [
+            ShopifyOrder.objects.create(
+                order_reference=f'ZPL-{i}',
+                amount=Decimal('10.00'),
+                currency='USD',
+                customer_email=f'zpl{i}@example.com',
+                customer_name=f'ZPL User {i}',
+                order_data=order_data(f'SC{i}00', f'SC{i}01')
+            )
+            for i in range(2)
+        ]
+
+    def test_print_labels_serves_zpl(self):
+        url = reverse('shopify:print_labels', args=[self.orders[0].id])
+        response = self.client.get(url, {'format': 'zpl'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-zpl')
+        self.assertIn('sample_labels_ZPL-0.zpl', response['Content-Disposition'])
+        self.assertEqual(response.content.count(b'^XFR:APSAMPLE.ZPL'), 2)
+
+        # Revalidation is answered without rendering, like the PDF
+        cached = self.client.get(url, {'format': 'zpl'}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        pdf = self.client.get(url)
+        self.assertNotEqual(pdf['ETag'], response['ETag'])
+
+    def test_print_labels_body_matches_its_etag(self):
+        url = reverse('shopify:print_labels', args=[self.orders[0].id])
+        etag = self.client.get(url, {'format': 'zpl'})['ETag']
+        # A queryset update leaves the Sample rows behind; the labels follow order_data
+        ShopifyOrder.objects.filter(pk=self.orders[0].pk).update(order_data=order_data('SC900'))
+
+        response = self.client.get(url, {'format': 'zpl'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'^FDSC900^FS', response.content)
+        self.assertNotIn(b'^FDSC000^FS', response.content)
+
+    def test_print_labels_rejects_unknown_format(self):
+        url = reverse('shopify:print_labels', args=[self.orders[0].id])
+        self.assertEqual(self.client.get(url, {'format': 'pcl'}).status_code, 400)
+
+    def test_batch_download_streams_one_zpl_job(self):
+        response = self.client.post(reverse('shopify:batch_download'), {
+            'order_ids': [order.id for order in reversed(self.orders)],
+            'format': 'zpl',
+        })
+        commands = b''.join(response.streaming_content).decode()
+
+        self.assertEqual(response['Content-Type'], 'application/x-zpl')
+        self.assertEqual(commands.count('^DFR:APSAMPLE.ZPL'), 1)
+        self.assertLess(commands.index('^FDSC100^FS'), commands.index('^FDSC000^FS'))
+
+    def test_batch_labels_follow_order_data(self):
+        # A queryset update leaves the Sample rows behind
+        ShopifyOrder.objects.filter(pk=self.orders[0].pk).update(order_data=order_data('SC900'))
+        response = self.client.post(reverse('shopify:batch_download'), {
+            'order_ids': [order.id for order in self.orders],
+            'format': 'zpl',
+        })
+        commands = b''.join(response.streaming_content)
+
+        self.assertIn(b'^FDSC900^FS', commands)
+        self.assertNotIn(b'^FDSC000^FS', commands)
+        self.assertEqual(commands.count(b'^XFR:APSAMPLE.ZPL'), 3)
+
+    def test_api_batch_returns_zpl_without_queueing(self):
+        self.client.force_login(User.objects.create_user(username='zpl', password='zplpass123'))
+        response = self.client.post(
+            reverse('api:batch-pdf-generate'),
+            {'order_ids': [order.id for order in self.orders], 'format': 'zpl'},
+            content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-zpl')
+        self.assertEqual(response.content.count(b'^XFR:APSAMPLE.ZPL'), 4)
+        self.assertFalse(PDFRenderJob.objects.exists())
@@ -1,8 +1,10 @@
 from django.test import TestCase
-from django.core.files.base import ContentFile
+from django.urls import reverse
 import PyPDF2
 import io
-from ..services.pdf_generator import PDFGenerator
+import os
+from ...services.label_engine import AVERY_5160, fit_text, iter_samples
+from ...services.pdf_generator import PDFGenerator
 
 class PDFGeneratorTests(TestCase):
     def setUp(self):
@@ -59,4 +61,103 @@ class PDFGeneratorTests(TestCase):
         invalid_data = None
         
         with self.assertRaises(Exception):
-            self.pdf_generator.generate_sample_labels(invalid_data) 
\ No newline at end of file
+            self.pdf_generator.generate_sample_labels(invalid_data)
+
+    def test_render_order_pdf_in_memory(self):
+        order_data = dict(self.sample_order_data, currency='USD', amount='100.00')
+        cwd_before = set(os.listdir('.'))
+
+        pdf_data = self.pdf_generator.render_order_pdf(order_data)
+
+        self.assertTrue(pdf_data.startswith(b'%PDF'))
+        self.assertEqual(set(os.listdir('.')), cwd_before)
+        pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_data))
+        self.assertIn('TEST-001', pdf_reader.pages[0].extract_text())
+
+    def test_pdf_views_answer_missing_orders_with_404(self):
+        for name in ('order_pdf', 'preview_pdf', 'download_labels'):
+            with self.subTest(name):
+                response = self.client.get(reverse(f'shopify:{name}', args=[999999]))
+                self.assertEqual(response.status_code, 404)
+
+    def test_windowed_labels_match_single_canvas(self):
+        per_page = AVERY_5160.labels_per_page
+        cultivars = [
+            {'name': f'Cultivar {i}', 'sample_id': f'SC{i:03}'}
+            for i in range(per_page * 4 + 5)
+        ]
+        order_data = {
+            'fields': [{'name': 'Field 1', 'crops': [{'name': 'Corn', 'cultivars': cultivars}]}]
+        }
+
+        single = PyPDF2.PdfReader(io.BytesIO(self.pdf_generator.generate_sample_labels(order_data)))
+        output = io.BytesIO()
+        count = PDFGenerator(page_window=2).write_sample_labels(order_data, output)
+        windowed = PyPDF2.PdfReader(io.BytesIO(output.getvalue()))
+
+        self.assertEqual(count, len(cultivars))
+        self.assertEqual(len(windowed.pages), 5)
+        self.assertEqual(
+            [page.extract_text() for page in windowed.pages],
+            [page.extract_text() for page in single.pages]
+        )
+
+    def test_sample_labels_fill_pages_in_order(self):
+        cultivars = [
+            {'name': f'Cultivar {i}', 'sample_id': f'SC{i:03}'}
+            for i in range(AVERY_5160.labels_per_page + 1)
+        ]
+        order_data = {
+            'fields': [{'name': 'Field 1', 'crops': [{'name': 'Corn', 'cultivars': cultivars}]}]
+        }
+
+        pdf_reader = PyPDF2.PdfReader(
+            io.BytesIO(self.pdf_generator.generate_sample_labels(order_data))
+        )
+
+        self.assertEqual(len(pdf_reader.pages), 2)
+        self.assertIn('SC000', pdf_reader.pages[0].extract_text())
+        self.assertIn('SC030', pdf_reader.pages[1].extract_text())
+        self.assertNotIn('SC030', pdf_reader.pages[0].extract_text())
+
+    def test_iter_samples_skips_cultivars_without_sample_id(self):
+        order_data = {
+            'fields': [{
+                'name': 'Field 1',
+                'crops': [{'name': 'Corn', 'cultivars': [
+                    {'name': 'Sweet Corn 1', 'sample_id': 'SC001'},
+                    {'name': 'Unlabelled'},
+                ]}]
+            }]
+        }
+        samples = list(iter_samples(order_data))
+        self.assertEqual(len(samples), 1)
+        self.assertEqual(samples[0].sample_id, 'SC001')
+        self.assertEqual(samples[0].crop, 'Corn')
+
+    def test_fit_text_truncates_long_names(self):
+        long_name = 'Extremely Long Cultivar Name ' * 5
+        fitted = fit_text(long_name, 'Helvetica', 10, 100)
+        self.assertTrue(fitted.endswith('...'))
+        self.assertLess(len(fitted), len(long_name))
+        self.assertEqual(fit_text('Corn', 'Helvetica', 10, 100), 'Corn')
+
+    def test_label_chrome_is_shared_form_xobject(self):
+        cultivars = [
+            {'name': f'Cultivar {i}', 'sample_id': f'SC{i:03}'}
+            for i in range(AVERY_5160.labels_per_page * 3)
+        ]
+        order_data = {
+            'fields': [{'name': 'Field 1', 'crops': [{'name': 'Corn', 'cultivars': cultivars}]}]
+        }
+
+        pdf_reader = PyPDF2.PdfReader(
+            io.BytesIO(self.pdf_generator.generate_sample_labels(order_data))
+        )
+
+        form_refs = set()
+        for page in pdf_reader.pages:
+            xobjects = page['/Resources']['/XObject']
+            self.assertEqual(len(xobjects), 1)
+            form_refs.update(xobjects.raw_get(name).idnum for name in xobjects)
+        self.assertEqual(len(form_refs), 1)
@@ -0,0 +1,100 @@
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+from decimal import Decimal
+from unittest.mock import patch
+from ...models import ShopifyOrder
+from ...services.pdf_response import parse_range
+from ...services.tiered_cache import get_local_cache
+
+class ParseRangeTests(TestCase):
+    def test_ranges(self):
+        self.assertEqual(parse_range('bytes=0-99', 1000), (0, 99))
+        self.assertEqual(parse_range('bytes=900-', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=-100', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=990-5000', 1000), (990, 999))
+
+    def test_ignored_ranges(self):
+        self.assertIsNone(parse_range('bytes=0-1,5-9', 1000))
+        self.assertIsNone(parse_range('items=0-1', 1000))
+
+    def test_unsatisfiable_ranges(self):
+        with self.assertRaises(ValueError):
+            parse_range('bytes=1000-', 1000)
+        with self.assertRaises(ValueError):
+            parse_range('bytes=10-5', 1000)
+
+class ConditionalPDFViewTests(TestCase):
+    def setUp(self):
+        caches['pdf'].clear()
+        get_local_cache().clear()
+        with patch('shopify.signals.schedule_prewarm'):
+            self.order = ShopifyOrder.objects.create(
+                order_reference='ETAG-001',
+                amount=Decimal('100.00'),
+                currency='USD',
+                customer_email='etag@example.com',
+                customer_name='Etag User',
+                order_data={
+                    'fields': [{
+                        'name': 'Field 1',
+                        'crops': [{'name': 'Corn', 'cultivars': [{'name': 'Sweet Corn', 'sample_id': 'SC001'}]}]
+                    }]
+                }
+            )
+        self.urls = [
+            reverse(f'shopify:{name}', args=[self.order.id])
+            for name in ('preview_pdf', 'download_labels', 'print_labels')
+        ]
+
+    def test_matching_etag_skips_renderer(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['Accept-Ranges'], 'bytes')
+                self.assertIn('Last-Modified', response)
+                etag = response['ETag']
+
+                with patch('shopify.views.render_labels') as render:
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], etag)
+                render.assert_not_called()
+
+    def test_etag_changes_with_order_data(self):
+        etag = self.client.get(self.urls[0])['ETag']
+        with patch('shopify.signals.schedule_prewarm'):
+            self.order.order_data['fields'][0]['name'] = 'Field 2'
+            self.order.save()
+
+        response = self.client.get(self.urls[0], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_byte_range(self):
+        full = self.client.get(self.urls[0])
+        body = full.content
+
+        response = self.client.get(self.urls[0], HTTP_RANGE='bytes=0-99')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.content, body[:100])
+        self.assertEqual(response['Content-Range'], f'bytes 0-99/{len(body)}')
+
+        response = self.client.get(self.urls[0], HTTP_RANGE=f'bytes={len(body)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(body)}')
+
+    def test_stale_if_range_gets_full_body(self):
+        response = self.client.get(
+            self.urls[0], HTTP_RANGE='bytes=0-99', HTTP_IF_RANGE='"stale"'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content.startswith(b'%PDF'))
+
+    def test_render_failure_is_a_server_error(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                with patch('shopify.views.render_labels', side_effect=RuntimeError('broken')):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 500)
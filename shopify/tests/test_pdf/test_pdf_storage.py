@@ -0,0 +1,74 @@
+from datetime import timedelta
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from ...services.pdf_storage import PDFStorage
+
+class PDFStorageTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.storage = PDFStorage(FileSystemStorage(location=self.media_root))
+
+    def age(self, name, days):
+        path = os.path.join(self.media_root, name)
+        mtime = time.time() - days * 24 * 60 * 60
+        os.utime(path, (mtime, mtime))
+
+    def test_save_chunks_matches_save(self):
+        pdf_data = b'%PDF-1.4 ' + os.urandom(1024)
+        name = self.storage.save_chunks('batch', [pdf_data[:100], pdf_data[100:]])
+
+        self.assertEqual(name, self.storage.save('batch', pdf_data))
+        self.assertEqual(len(self.storage.artifacts()), 1)
+        with self.storage.open(name) as stored:
+            self.assertEqual(stored.read(), pdf_data)
+
+    def test_collect_garbage_by_age_then_size(self):
+        names = [self.storage.save(f'doc{i}', os.urandom(1000)) for i in range(4)]
+        for days, name in zip((40, 20, 10, 0), names):
+            self.age(name, days)
+
+        dry_run = self.storage.collect_garbage(max_age=timedelta(days=30), dry_run=True)
+        self.assertEqual(dry_run['removed'], names[:1])
+        self.assertEqual(len(self.storage.artifacts()), 4)
+
+        result = self.storage.collect_garbage(max_bytes=2000, max_age=timedelta(days=30))
+        self.assertEqual(result['removed'], names[:2])
+        self.assertEqual(result['freed_bytes'], 2000)
+        self.assertEqual([name for name, _, _ in self.storage.artifacts()], names[2:])
+
+    def test_saving_stored_content_again_keeps_it_from_pruning(self):
+        pdf_data = os.urandom(1000)
+        hot = self.storage.save('hot', pdf_data)
+        cold = self.storage.save('cold', os.urandom(1000))
+        self.age(hot, 2)
+        self.age(cold, 1)
+
+        self.assertEqual(self.storage.save('hot', pdf_data), hot)
+        self.assertEqual(self.storage.collect_garbage(max_bytes=1000)['removed'], [cold])
+
+        self.age(hot, 2)
+        self.assertEqual(self.storage.save_chunks('hot', [pdf_data]), hot)
+        self.assertEqual(self.storage.collect_garbage(max_age=timedelta(days=1))['removed'], [])
+
+    def test_command_reports_and_prunes(self):
+        with override_settings(MEDIA_ROOT=self.media_root):
+            storage = PDFStorage()
+            for i in range(3):
+                storage.save(f'doc{i}', os.urandom(1000))
+
+            out = io.StringIO()
+            call_command('pdf_artifacts', stdout=out)
+            self.assertEqual(json.loads(out.getvalue())['usage']['files'], 3)
+
+            out = io.StringIO()
+            call_command('pdf_artifacts', '--prune', '--max-bytes', '1000', stdout=out)
+            self.assertEqual(len(json.loads(out.getvalue())['pruned']['removed']), 2)
+            self.assertEqual(storage.usage()['files'], 1)
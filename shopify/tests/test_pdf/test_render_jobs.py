@@ -0,0 +1,311 @@
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from decimal import Decimal
+from rest_framework.test import APIClient
+from unittest.mock import patch
+import io
+import PyPDF2
+import shutil
+import tempfile
+from ...models import PDFRenderJob, ShopifyOrder
+from ...services.cache_manager import PDFCacheManager
+from ...services.render_jobs import PDFJobQueue
+from ...services.tiered_cache import get_local_cache
+
+class PDFJobQueueTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        with patch('shopify.signals.schedule_prewarm'):
+            self.orders = [
+                ShopifyOrder.objects.create(
+                    order_reference=f'JOB-{i}',
+                    amount=Decimal('100.00'),
+                    currency='USD',
+                    customer_email=f'job{i}@example.com',
+                    customer_name=f'Job User {i}',
+                    order_data={
+                        'fields': [{
+                            'name': 'Field 1',
+                            'crops': [{
+                                'name': 'Corn',
+                                'cultivars': [{'name': 'Sweet Corn', 'sample_id': f'SC{i:03}'}]
+                            }]
+                        }]
+                    }
+                )
+                for i in range(3)
+            ]
+        self.order_ids = [order.id for order in self.orders]
+        self.queue = PDFJobQueue()
+
+    def test_identical_requests_share_a_job(self):
+        job, created = self.queue.enqueue(PDFRenderJob.KIND_BATCH, self.order_ids)
+        again, created_again = self.queue.enqueue(PDFRenderJob.KIND_BATCH, self.order_ids)
+
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(job.id, again.id)
+
+    def test_duplicate_raises_priority_of_queued_job(self):
+        job, _ = self.queue.enqueue(PDFRenderJob.KIND_BATCH, self.order_ids)
+        self.queue.enqueue(
+            PDFRenderJob.KIND_BATCH, self.order_ids, priority=PDFRenderJob.PRIORITY_HIGH
+        )
+
+        job.refresh_from_db()
+        self.assertEqual(job.priority, PDFRenderJob.PRIORITY_HIGH)
+
+    def test_completed_job_reused_until_an_order_changes(self):
+        job, _ = self.queue.enqueue(PDFRenderJob.KIND_BATCH, self.order_ids)
+        self.queue.run_pending()
+
+        reused, created = self.queue.enqueue(PDFRenderJob.KIND_BATCH, self.order_ids)
+        self.assertFalse(created)
+        self.assertEqual(reused.id, job.id)
+
+        with patch('shopify.signals.schedule_prewarm'):
+            self.orders[0].customer_name = 'Renamed'
+            self.orders[0].save()
+        _, created = self.queue.enqueue(PDFRenderJob.KIND_BATCH, self.order_ids)
+        self.assertTrue(created)
+
+    def test_claims_highest_priority_first(self):
+        low, _ = self.queue.enqueue(
+            PDFRenderJob.KIND_ORDER, [self.order_ids[0]], priority=PDFRenderJob.PRIORITY_LOW
+        )
+        high, _ = self.queue.enqueue(
+            PDFRenderJob.KIND_ORDER, [self.order_ids[1]], priority=PDFRenderJob.PRIORITY_HIGH
+        )
+
+        claimed = self.queue.claim('test-worker')
+        self.assertEqual(claimed.id, high.id)
+        self.assertEqual(claimed.status, PDFRenderJob.STATUS_RUNNING)
+        self.assertEqual(claimed.attempts, 1)
+        self.assertEqual(self.queue.claim('test-worker').id, low.id)
+        self.assertIsNone(self.queue.claim('test-worker'))
+
+    def test_batch_job_renders_artifact(self):
+        job, _ = self.queue.enqueue(PDFRenderJob.KIND_BATCH, self.order_ids)
+        job = self.queue.run_next('test-worker')
+
+        self.assertEqual(job.status, PDFRenderJob.STATUS_COMPLETED)
+        self.assertEqual(job.progress, 3)
+        with self.queue.storage.open(job.artifact) as artifact:
+            reader = PyPDF2.PdfReader(io.BytesIO(artifact.read()))
+        self.assertEqual(len(reader.pages), 3)
+
+    def test_stale_job_is_requeued_then_failed(self):
+        job, _ = self.queue.enqueue(PDFRenderJob.KIND_BATCH, self.order_ids)
+        self.queue.claim('dead-worker')
+        stale = timezone.now() - timedelta(seconds=PDFJobQueue.STALE_AFTER + 1)
+        PDFRenderJob.objects.filter(pk=job.pk).update(heartbeat_at=stale)
+
+        self.assertEqual(self.queue.requeue_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, PDFRenderJob.STATUS_QUEUED)
+
+        PDFRenderJob.objects.filter(pk=job.pk).update(
+            status=PDFRenderJob.STATUS_RUNNING,
+            attempts=PDFJobQueue.MAX_ATTEMPTS,
+            heartbeat_at=stale
+        )
+        self.queue.requeue_stale()
+        job.refresh_from_db()
+        self.assertEqual(job.status, PDFRenderJob.STATUS_FAILED)
+
+    def test_slow_worker_does_not_overwrite_a_reclaimed_job(self):
+        self.queue.enqueue(PDFRenderJob.KIND_BATCH, self.order_ids)
+        slow = self.queue.claim('slow-worker')
+        stale = timezone.now() - timedelta(seconds=PDFJobQueue.STALE_AFTER + 1)
+        PDFRenderJob.objects.filter(pk=slow.pk).update(heartbeat_at=stale)
+        self.queue.requeue_stale()
+        self.assertEqual(self.queue.claim('worker-2').pk, slow.pk)
+
+        with patch.object(PDFJobQueue, '_render_batch', side_effect=RuntimeError('too late')):
+            job = self.queue.run(slow)
+
+        self.assertEqual(job.status, PDFRenderJob.STATUS_RUNNING)
+        self.assertEqual(job.worker, 'worker-2')
+        self.assertEqual(job.error_message, '')
+
+    def test_worker_command_drains_queue(self):
+        self.queue.enqueue(PDFRenderJob.KIND_ORDER, [self.order_ids[0]])
+        self.queue.enqueue(PDFRenderJob.KIND_BATCH, self.order_ids)
+
+        call_command('run_pdf_worker', '--once', stdout=io.StringIO())
+
+        self.assertEqual(
+            set(PDFRenderJob.objects.values_list('status', flat=True)),
+            {PDFRenderJob.STATUS_COMPLETED}
+        )
+
+    def test_status_and_download_endpoints(self):
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username='jobs', password='pass'))
+
+        response = client.post(
+            reverse('api:batch-pdf-generate'), {'order_ids': self.order_ids}, format='json'
+        )
+        self.assertEqual(response.status_code, 202)
+        download_url = reverse('api:pdf-job-download', args=[response.data['id']])
+        self.assertEqual(client.get(download_url).status_code, 409)
+
+        self.queue.run_pending()
+
+        response = client.get(response.data['status_url'])
+        self.assertEqual(response.data['status'], PDFRenderJob.STATUS_COMPLETED)
+        self.assertEqual(response.data['download_url'], download_url)
+        response = client.get(download_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+    def test_orders_store_their_render_cost(self):
+        order = self.orders[0]
+        self.assertEqual((order.sample_count, order.estimated_pages), (1, 1))
+
+        cultivars = [{'name': 'Sweet Corn', 'sample_id': f'SC{i:03}'} for i in range(31)]
+        order.order_data['fields'][0]['crops'][0]['cultivars'] = cultivars
+        with patch('shopify.signals.schedule_prewarm'):
+            order.save(update_fields=['order_data'])
+        order.refresh_from_db()
+        self.assertEqual((order.sample_count, order.estimated_pages), (31, 2))
+
+    def test_large_batches_use_the_capped_bulk_lane(self):
+        with patch.object(PDFJobQueue, 'INTERACTIVE_MAX_PAGES', 2), \
+                patch.object(PDFJobQueue, 'LANE_CONCURRENCY', {PDFRenderJob.LANE_BULK: 1}):
+            bulk, _ = self.queue.enqueue(
+                PDFRenderJob.KIND_BATCH, self.order_ids, priority=PDFRenderJob.PRIORITY_HIGH
+            )
+            other_bulk, _ = self.queue.enqueue(PDFRenderJob.KIND_BATCH, self.order_ids[::-1])
+            small, _ = self.queue.enqueue(PDFRenderJob.KIND_BATCH, self.order_ids[:2])
+
+            self.assertEqual((bulk.lane, bulk.estimated_pages), (PDFRenderJob.LANE_BULK, 3))
+            self.assertEqual(small.lane, PDFRenderJob.LANE_INTERACTIVE)
+
+            # Interactive work is claimed first despite the bulk job's priority
+            self.assertEqual(self.queue.claim('worker-1').id, small.id)
+            self.assertEqual(self.queue.claim('worker-1').id, bulk.id)
+            # The bulk lane is at its cap of one running job
+            self.assertIsNone(self.queue.claim('worker-2'))
+
+            stats = self.queue.lane_stats()
+            self.assertEqual(stats['bulk']['queued'], 1)
+            self.assertEqual(stats['bulk']['queued_pages'], 3)
+            self.assertEqual(stats['bulk']['running'], 1)
+            self.assertEqual(stats['interactive']['running'], 1)
+
+            self.queue.run(PDFRenderJob.objects.get(pk=bulk.pk))
+            self.assertEqual(self.queue.claim('worker-2').id, other_bulk.id)
+
+    def test_labels_job_heartbeats_per_page_window(self):
+        order = self.orders[0]
+        order.order_data['fields'][0]['crops'][0]['cultivars'] = [
+            {'name': f'Cultivar {i}', 'sample_id': f'SC{i:03}'} for i in range(65)
+        ]
+        with patch('shopify.signals.schedule_prewarm'):
+            order.save()
+        job, _ = self.queue.enqueue(PDFRenderJob.KIND_LABELS, [order.id])
+        job = self.queue.claim('worker-1')
+        stale = timezone.now() - timedelta(seconds=PDFJobQueue.STALE_AFTER + 1)
+        PDFRenderJob.objects.filter(pk=job.pk).update(heartbeat_at=stale)
+
+        # Three pages of labels, rendered a page at a time
+        with patch('shopify.services.pdf_generator.PDFGenerator.PAGE_WINDOW', 1), \
+                patch.object(PDFJobQueue, 'heartbeat', wraps=PDFJobQueue.heartbeat) as heartbeat:
+            job = self.queue.run(job)
+
+        self.assertEqual(job.status, PDFRenderJob.STATUS_COMPLETED)
+        self.assertEqual(heartbeat.call_count, 3)
+        job.refresh_from_db()
+        self.assertGreater(job.heartbeat_at, stale)
+
+    def test_large_orders_are_rendered_by_the_worker(self):
+        caches['pdf'].clear()
+        get_local_cache().clear()
+        url = reverse('shopify:preview_pdf', args=[self.order_ids[0]])
+        with patch.object(PDFJobQueue, 'INTERACTIVE_MAX_PAGES', 0):
+            response = self.client.get(url)
+            self.assertContains(response, 'Rendering labels', status_code=202)
+            self.assertEqual(response['Retry-After'], '5')
+            job = PDFRenderJob.objects.get()
+            self.assertEqual(job.kind, PDFRenderJob.KIND_LABELS)
+            self.assertEqual(job.lane, PDFRenderJob.LANE_BULK)
+            self.assertEqual(job.order_ids, [self.order_ids[0]])
+
+            # Reloading while the job waits does not queue another
+            self.assertEqual(self.client.get(url).status_code, 202)
+            self.assertEqual(PDFRenderJob.objects.count(), 1)
+
+            self.queue.run_pending('worker-1')
+            self.assertTrue(PDFCacheManager().has_pdf(self.orders[0].order_data))
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'application/pdf')
+            self.assertTrue(response.content.startswith(b'%PDF'))
+
+            # Once evicted from the cache, the worker's copy is served
+            caches['pdf'].clear()
+            get_local_cache().clear()
+            response = self.client.get(
+                reverse('shopify:download_labels', args=[self.order_ids[0]])
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment', response['Content-Disposition'])
+        self.assertTrue(response.content.startswith(b'%PDF'))
+        self.assertEqual(PDFRenderJob.objects.count(), 1)
+
+    def test_current_copy_of_large_order_is_not_queued(self):
+        caches['pdf'].clear()
+        get_local_cache().clear()
+        url = reverse('shopify:preview_pdf', args=[self.order_ids[0]])
+        etag = PDFCacheManager().etag(self.orders[0].order_data)
+        with patch.object(PDFJobQueue, 'INTERACTIVE_MAX_PAGES', 0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertFalse(PDFRenderJob.objects.exists())
+
+    def test_failed_labels_are_reported_not_requeued(self):
+        caches['pdf'].clear()
+        get_local_cache().clear()
+        url = reverse('shopify:preview_pdf', args=[self.order_ids[0]])
+        with patch.object(PDFJobQueue, 'INTERACTIVE_MAX_PAGES', 0):
+            self.client.get(url)
+            with patch.object(PDFJobQueue, '_render_labels', side_effect=RuntimeError('out of paper')):
+                self.queue.run_pending('worker-1')
+
+            response = self.client.get(url)
+            self.assertContains(response, 'out of paper', status_code=503)
+            self.assertLessEqual(int(response['Retry-After']), PDFJobQueue.RETRY_FAILED_AFTER)
+            self.assertEqual(PDFRenderJob.objects.count(), 1)
+
+            # Once the retry window has passed, asking again queues a new run
+            PDFRenderJob.objects.update(
+                finished_at=timezone.now() - timedelta(seconds=PDFJobQueue.RETRY_FAILED_AFTER + 1)
+            )
+            self.assertEqual(self.client.get(url).status_code, 202)
+        self.assertEqual(PDFRenderJob.objects.count(), 2)
+
+    def test_unclaimed_labels_are_rendered_by_the_request(self):
+        caches['pdf'].clear()
+        get_local_cache().clear()
+        url = reverse('shopify:download_labels', args=[self.order_ids[0]])
+        with patch.object(PDFJobQueue, 'INTERACTIVE_MAX_PAGES', 0), \
+                patch('shopify.views.LABELS_INLINE_AFTER', 0):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content.startswith(b'%PDF'))
+        self.assertEqual(PDFRenderJob.objects.get().status, PDFRenderJob.STATUS_COMPLETED)
@@ -9,6 +9,7 @@ urlpatterns = [
     path('payment/success/', views.payment_success, name='payment_success'),
     path('payment/error/', views.payment_error, name='payment_error'),
     path('webhook/', views.webhook, name='webhook'),
+    path('order-pdf/<int:order_id>/', views.order_pdf, name='order_pdf'),
     path('download-labels/<int:order_id>/', views.download_labels, name='download_labels'),
     path('print-labels/<int:order_id>/', views.print_labels, name='print_labels'),
     path('preview-pdf/<int:order_id>/', views.preview_pdf, name='preview_pdf'),
@@ -1,19 +1,30 @@
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import add_never_cache_headers
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods, require_POST
 import json
-from .models import ShopifyOrder, PaymentAttempt
+from .models import ShopifyOrder, PaymentAttempt, PDFRenderJob
 from .services.shopify_client import ShopifyClient
 from .services.pdf_generator import PDFGenerator
-from .services.error_handler import handle_pdf_errors
+from .services.error_handler import handle_pdf_errors, PDFGenerationError
 import logging
 from .services.cache_manager import PDFCacheManager
 from .services.batch_pdf_generator import BatchPDFGenerator
+from .services.label_printer import get_printer_renderer
 from .services.email_service import EmailService
+from .services.pdf_response import conditional_response, pdf_response
+from .services.render_jobs import PDFJobQueue, default_worker_name
 
 logger = logging.getLogger(__name__)
 cache_manager = PDFCacheManager()
+# Seconds a browser waits before asking again for labels still being rendered
+LABELS_RETRY_AFTER = 5
+# Seconds a labels job may wait unclaimed before a request renders it itself
+LABELS_INLINE_AFTER = getattr(settings, 'PDF_LABELS_INLINE_AFTER', 2 * 60)
 
 def home(request):
     """Home page view"""
@@ -32,14 +43,11 @@ def initiate_payment(request):
         data = json.loads(request.body)
         order = ShopifyOrder.objects.create(**data)
         
-        # Generate PDF
-        pdf_generator = PDFGenerator()
-        pdf_file = pdf_generator.generate_order_pdf(data)
-        
+        # The order PDF is rendered in memory when this URL is requested
         return JsonResponse({
             'success': True,
             'order_id': order.id,
-            'pdf_file': pdf_file
+            'pdf_url': reverse('shopify:order_pdf', args=[order.id])
         })
         
     except Exception as e:
@@ -82,36 +90,137 @@ def payment_error(request):
     return render(request, 'shopify/payment_error.html')
 
 @handle_pdf_errors
-def download_labels(request, order_id):
-    """Generates and serves PDF for download"""
-    order = ShopifyOrder.objects.get(id=order_id)
+def order_pdf(request, order_id):
+    """Renders the order summary PDF in memory and serves it inline"""
+    order = get_object_or_404(ShopifyOrder, id=order_id)
     pdf_generator = PDFGenerator()
+    pdf_data = pdf_generator.render_order_pdf(pdf_generator.order_context(order))
     
+    response = HttpResponse(pdf_data, content_type='application/pdf')
+    response['Content-Disposition'] = f'inline; filename="order_{order.order_reference}.pdf"'
+    return response
+
+def render_labels(order):
+    """Labels for order, from the cache when identical content was rendered before"""
     try:
-        pdf_data = pdf_generator.generate_sample_labels(order.order_data)
+        return cache_manager.get_or_render(
+            order.order_data,
+            PDFGenerator().generate_sample_labels
+        )
     except Exception as e:
-        logger.error(f"Failed to generate PDF for order {order_id}: {str(e)}")
-        raise PDFGenerationError(f"Could not generate PDF for order {order_id}")
-    
-    response = HttpResponse(pdf_data, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="sample_labels_{order.order_reference}.pdf"'
+        logger.error(f"Failed to generate PDF for order {order.id}: {str(e)}")
+        raise PDFGenerationError(f"Could not generate PDF for order {order.id}") from e
+
+def read_artifact(queue, name):
+    with queue.storage.open(name) as artifact:
+        return artifact.read()
+
+def labels_status_response(request, order, job, status, retry_after):
+    """Page shown in place of labels the worker has yet to render, or failed to"""
+    response = render(request, 'shopify/labels_rendering.html', {
+        'order': order,
+        'job': job,
+        'retry_after': retry_after,
+    }, status=status)
+    response['Retry-After'] = str(retry_after)
+    add_never_cache_headers(response)
     return response
 
+def worker_labels_response(request, order, disposition, etag):
+    """
+    Labels for an order too large to render inside a request, rendered
+    by the worker in the bulk lane: its PDF once it is ready, else a page
+    that reloads itself until then or reports a recent failure. A job no
+    worker has claimed for LABELS_INLINE_AFTER is rendered by the request
+    itself, so large orders are still served without a worker running.
+    """
+    queue = PDFJobQueue()
+    job, _ = queue.enqueue(PDFRenderJob.KIND_LABELS, [order.id])
+    waited = (timezone.now() - job.created_at).total_seconds()
+    if job.status == PDFRenderJob.STATUS_QUEUED and waited >= LABELS_INLINE_AFTER:
+        claimed = queue.claim_job(job, default_worker_name())
+        if claimed is not None:
+            job = queue.run(claimed)
+
+    if job.status == PDFRenderJob.STATUS_COMPLETED:
+        # Rendered by the worker, but not (or no longer) in the cache
+        return pdf_response(
+            request,
+            lambda: read_artifact(queue, job.artifact),
+            etag=etag,
+            last_modified=order.updated_at,
+            disposition=disposition
+        )
+    if job.status == PDFRenderJob.STATUS_FAILED:
+        retry_after = max(1, round((queue.retry_at(job) - timezone.now()).total_seconds()))
+        return labels_status_response(request, order, job, 503, retry_after)
+    return labels_status_response(request, order, job, 202, LABELS_RETRY_AFTER)
+
+def labels_response(request, order, disposition):
+    """
+    Serve order's labels, answering conditional and Range requests.
+    Orders too large to render inside a request go to the worker unless
+    already cached; the ETag needs only order_data, so a client whose
+    copy is current still gets a 304 without anything being queued.
+    """
+    etag = cache_manager.etag(order.order_data)
+    if (
+        order.estimated_pages > PDFJobQueue.INTERACTIVE_MAX_PAGES
+        and not cache_manager.has_pdf(order.order_data)
+    ):
+        return (
+            conditional_response(request, etag, order.updated_at)
+            or worker_labels_response(request, order, disposition, etag)
+        )
+    return pdf_response(
+        request,
+        lambda: render_labels(order),
+        etag=etag,
+        last_modified=order.updated_at,
+        disposition=disposition
+    )
+
+@handle_pdf_errors
+def download_labels(request, order_id):
+    """Generates and serves PDF for download"""
+    order = get_object_or_404(ShopifyOrder, id=order_id)
+    return labels_response(
+        request,
+        order,
+        f'attachment; filename="sample_labels_{order.order_reference}.pdf"'
+    )
+
+def printer_labels_response(request, order, renderer):
+    """Serve order's labels as printer commands; they render too fast to cache"""
+    filename = f"sample_labels_{order.order_reference}.{renderer.format}"
+    # Rendered from the order_data the ETag is derived from
+    return pdf_response(
+        request,
+        lambda: renderer.render(order.order_data),
+        etag=cache_manager.etag(order.order_data, kind=f'labels-{renderer.format}'),
+        last_modified=order.updated_at,
+        disposition=f'inline; filename="{filename}"',
+        content_type=renderer.content_type
+    )
+
 def print_labels(request, order_id):
     """
-    Generates and serves PDF for printing
+    Generates and serves PDF for printing, or ZPL/EPL printer commands
+    with ?format=zpl or ?format=epl
     """
+    label_format = request.GET.get('format', 'pdf')
     try:
         order = ShopifyOrder.objects.get(id=order_id)
-        
-        # Generate PDF
-        pdf_generator = PDFGenerator()
-        pdf_data = pdf_generator.generate_sample_labels(order.order_data)
+
+        if label_format != 'pdf':
+            try:
+                renderer = get_printer_renderer(label_format)
+            except ValueError as e:
+                return HttpResponse(str(e), status=400)
+            return printer_labels_response(request, order, renderer)
         
         # Serve the PDF with print-friendly headers
-        response = HttpResponse(pdf_data, content_type='application/pdf')
-        response['Content-Disposition'] = 'inline'
-        return response
+        return labels_response(request, order, 'inline')
         
     except ShopifyOrder.DoesNotExist:
         return HttpResponse('Order not found', status=404)
@@ -122,27 +231,17 @@ def print_labels(request, order_id):
 @handle_pdf_errors
 def preview_pdf(request, order_id):
     """Renders PDF preview in browser"""
-    order = ShopifyOrder.objects.get(id=order_id)
-    
-    # Try to get from cache first
-    pdf_data = cache_manager.get_pdf(order_id)
-    
-    if not pdf_data:
-        # Generate new PDF
-        pdf_generator = PDFGenerator()
-        pdf_data = pdf_generator.generate_sample_labels(order.order_data)
-        cache_manager.save_pdf(order_id, pdf_data)
+    order = get_object_or_404(ShopifyOrder, id=order_id)
     
-    response = HttpResponse(pdf_data, content_type='application/pdf')
-    response['Content-Disposition'] = 'inline'
-    return response
+    # Viewers re-request constantly; unchanged labels are answered with a 304
+    return labels_response(request, order, 'inline')
 
 @require_POST
 def email_pdf(request, order_id):
     """Emails PDF to specified recipients"""
     try:
         order = ShopifyOrder.objects.get(id=order_id)
-        pdf_data = cache_manager.get_pdf(order_id) or PDFGenerator().generate_sample_labels(order.order_data)
+        pdf_data = render_labels(order)
         
         success = EmailService.send_pdf_email(
             order.customer_email,
@@ -155,14 +254,34 @@ def email_pdf(request, order_id):
         return JsonResponse({'success': False, 'error': str(e)})
 
 def batch_download(request):
-    """Handles batch PDF generation and download"""
+    """
+    Streams the batch labels PDF to the client as each order is rendered,
+    or ZPL/EPL printer commands when format is posted
+    """
     order_ids = request.POST.getlist('order_ids')
+    if not order_ids:
+        return HttpResponse('No orders selected', status=400)
+    
+    label_format = request.POST.get('format', 'pdf')
+    renderer = None
+    if label_format != 'pdf':
+        try:
+            renderer = get_printer_renderer(label_format)
+        except ValueError as e:
+            return HttpResponse(str(e), status=400)
     
     generator = BatchPDFGenerator()
-    pdf_data = generator.generate_batch_pdf(order_ids)
+    try:
+        if renderer:
+            stream = generator.stream_batch_labels(order_ids, renderer)
+        else:
+            stream = generator.stream_batch_pdf(order_ids)
+    except (ShopifyOrder.DoesNotExist, ValueError):
+        return HttpResponse('Order not found', status=404)
     
-    response = HttpResponse(pdf_data, content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="batch_labels.pdf"'
+    content_type = renderer.content_type if renderer else 'application/pdf'
+    response = StreamingHttpResponse(stream, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="batch_labels.{label_format}"'
     return response
 
 def payment_form(request, order_id):